@@ -0,0 +1,146 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request would overload the server or exceed its client's quota."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        self.status_code = status_code  # 503 for server capacity, 429 for client quota
+        self.retry_after = retry_after
+        super().__init__(detail)
+
+
+class AdmissionTicket:
+    """Compute reserved for one admitted request; release it when the work ends."""
+
+    __slots__ = ("client_id", "audio_seconds", "compute_seconds", "released")
+
+    def __init__(self, client_id: str, audio_seconds: float, compute_seconds: float):
+        self.client_id = client_id
+        self.audio_seconds = audio_seconds
+        self.compute_seconds = compute_seconds
+        self.released = False
+
+
+class AdmissionController:
+    """Admits requests by estimated compute rather than request count.
+
+    Outstanding work is the estimated compute seconds of every admitted request
+    that has not finished. A request that would push it over ``capacity_seconds``
+    is rejected with a Retry-After covering the time ``workers`` need to drain
+    the excess; a request larger than the whole capacity is only admitted when
+    nothing else is outstanding. Each client may also submit at most
+    ``quota_audio_seconds`` of audio per ``quota_window_seconds``.
+    """
+
+    def __init__(
+        self,
+        capacity_seconds: float,
+        workers: int = 1,
+        quota_audio_seconds: float = 0.0,
+        quota_window_seconds: float = 3600.0
+    ):
+        self.capacity_seconds = capacity_seconds
+        self.workers = max(1, workers)
+        self.quota_audio_seconds = quota_audio_seconds
+        self.quota_window_seconds = quota_window_seconds
+        self._lock = threading.Lock()
+        self._outstanding = 0.0
+        self._in_flight = 0
+        self._usage: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._admitted = 0
+        self._rejected_capacity = 0
+        self._rejected_quota = 0
+
+    def _client_usage(self, client_id: str, now: float) -> Deque[Tuple[float, float]]:
+        """The client's (timestamp, audio seconds) log within the quota window."""
+        usage = self._usage.setdefault(client_id, deque())
+        while usage and usage[0][0] <= now - self.quota_window_seconds:
+            usage.popleft()
+        return usage
+
+    def admit(
+        self, client_id: str, audio_seconds: float, compute_seconds: float
+    ) -> AdmissionTicket:
+        """Reserve capacity for a request or raise AdmissionRejected."""
+        now = time.time()
+        with self._lock:
+            if self.quota_audio_seconds > 0:
+                usage = self._client_usage(client_id, now)
+                used = sum(seconds for _, seconds in usage)
+                if used + audio_seconds > self.quota_audio_seconds:
+                    self._rejected_quota += 1
+                    raise AdmissionRejected(
+                        429,
+                        self._quota_retry_after(usage, used, audio_seconds, now),
+                        f"Audio quota exceeded: {used:.0f}s of "
+                        f"{self.quota_audio_seconds:.0f}s used in the last "
+                        f"{self.quota_window_seconds:.0f}s"
+                    )
+
+            excess = self._outstanding + compute_seconds - self.capacity_seconds
+            if self.capacity_seconds > 0 and excess > 0 and self._in_flight > 0:
+                self._rejected_capacity += 1
+                retry_after = max(1, math.ceil(min(excess, self._outstanding) / self.workers))
+                raise AdmissionRejected(
+                    503,
+                    retry_after,
+                    f"Server is at capacity ({self._outstanding:.0f}s of compute "
+                    f"outstanding), retry after {retry_after}s"
+                )
+
+            self._outstanding += compute_seconds
+            self._in_flight += 1
+            self._admitted += 1
+            if self.quota_audio_seconds > 0:
+                self._usage[client_id].append((now, audio_seconds))
+            return AdmissionTicket(client_id, audio_seconds, compute_seconds)
+
+    def _quota_retry_after(
+        self, usage: Deque[Tuple[float, float]], used: float, needed: float, now: float
+    ) -> int:
+        """Seconds until enough of the client's usage ages out of the window."""
+        if needed > self.quota_audio_seconds:
+            return math.ceil(self.quota_window_seconds)
+        for timestamp, seconds in usage:
+            used -= seconds
+            if used + needed <= self.quota_audio_seconds:
+                return max(1, math.ceil(timestamp + self.quota_window_seconds - now))
+        return math.ceil(self.quota_window_seconds)
+
+    def release(self, ticket: Optional[AdmissionTicket]):
+        """Return a ticket's compute to the pool; safe to call more than once."""
+        if ticket is None:
+            return
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._outstanding = max(0.0, self._outstanding - ticket.compute_seconds)
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Outstanding work, capacity and rejection counters."""
+        now = time.time()
+        with self._lock:
+            for client_id in list(self._usage):
+                if not self._client_usage(client_id, now):
+                    del self._usage[client_id]
+            return {
+                "capacity_seconds": self.capacity_seconds,
+                "outstanding_seconds": round(self._outstanding, 1),
+                "in_flight": self._in_flight,
+                "admitted": self._admitted,
+                "rejected_capacity": self._rejected_capacity,
+                "rejected_quota": self._rejected_quota,
+                "quota_audio_seconds": self.quota_audio_seconds,
+                "quota_window_seconds": self.quota_window_seconds,
+                "clients": {
+                    client_id: round(sum(seconds for _, seconds in usage), 1)
+                    for client_id, usage in self._usage.items()
+                }
+            }
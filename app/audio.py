@@ -0,0 +1,231 @@
+import json
+import math
+import struct
+import subprocess
+import wave
+import numpy as np
+import whisper
+from typing import List, Optional, Tuple, Union
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def load_audio(audio: Union[str, np.ndarray]) -> np.ndarray:
+    """Decode an audio file to 16 kHz mono float32 PCM; decoded PCM passes through.
+
+    PCM and float WAV files are parsed in-process; everything else goes
+    through ffmpeg.
+    """
+    if isinstance(audio, np.ndarray):
+        return audio
+    with open(audio, "rb") as f:
+        header = f.read(12)
+        decoded = decode_wav(header + f.read()) if is_wav(header) else None
+    if decoded is not None:
+        return decoded
+    return whisper.load_audio(audio)
+
+
+def is_wav(header: bytes) -> bool:
+    """Whether the first 12 bytes of a file are a RIFF/WAVE header."""
+    return len(header) >= 12 and header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+
+def parse_wav(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """Samples as float32 ``(frames, channels)`` and the sample rate of a WAV file.
+
+    Handles integer PCM (8/16/24/32-bit) and 32/64-bit float, including
+    WAVE_FORMAT_EXTENSIBLE headers. Returns None for anything else (ADPCM,
+    mu-law, malformed files) so the caller can fall back to ffmpeg.
+    """
+    if not is_wav(data):
+        return None
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        body = data[pos + 8:pos + 8 + size]
+        if chunk_id == b"fmt " and len(body) >= 16:
+            tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+            if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # The real format is the first field of the sub-format GUID
+                tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (tag, channels, rate, block_align, bits)
+        elif chunk_id == b"data" and fmt is not None:
+            # Streamed WAVs may declare a bogus size; the slice stops at the end
+            return _wav_samples(body, *fmt)
+        pos += 8 + size + (size & 1)
+    return None
+
+
+def _wav_samples(
+    body: bytes, tag: int, channels: int, rate: int, block_align: int, bits: int
+) -> Optional[Tuple[np.ndarray, int]]:
+    if channels < 1 or rate < 1 or block_align != channels * bits // 8:
+        return None
+    body = body[:len(body) - len(body) % block_align]
+    if tag == WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(body, np.uint8).astype(np.float32) - 128) / 128
+    elif tag == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(body, "<i2").astype(np.float32) / 32768
+    elif tag == WAVE_FORMAT_PCM and bits == 24:
+        raw = np.frombuffer(body, np.uint8).reshape(-1, 3).astype(np.int32)
+        # Place the three bytes in the top of an int32 so the sign extends
+        samples = ((raw[:, 0] << 8) | (raw[:, 1] << 16) | (raw[:, 2] << 24)).astype(np.float32)
+        samples /= 2 ** 31
+    elif tag == WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(body, "<i4").astype(np.float32) / 2 ** 31
+    elif tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(body, "<f4" if bits == 32 else "<f8").astype(np.float32)
+    else:
+        return None
+    return samples.reshape(-1, channels), rate
+
+
+def decode_wav(data: bytes) -> Optional[np.ndarray]:
+    """Decode a PCM/float WAV to 16 kHz mono float32 without ffmpeg, or None."""
+    parsed = parse_wav(data)
+    if parsed is None:
+        return None
+    samples, rate = parsed
+    mono = samples[:, 0] if samples.shape[1] == 1 else samples.mean(axis=1)
+    return resample(np.ascontiguousarray(mono, dtype=np.float32), rate)
+
+
+def resample(
+    audio: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE, zero_crossings: int = 16
+) -> np.ndarray:
+    """Band-limited polyphase resampling with a Hann-windowed sinc kernel.
+
+    The kernel spans ``zero_crossings`` lobes of the low-pass filter on each
+    side; when downsampling the cutoff drops to the target Nyquist frequency.
+    Output samples sharing a phase are one matrix-vector product over strided
+    windows of the input.
+    """
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio.astype(np.float32, copy=False)
+    g = math.gcd(orig_sr, target_sr)
+    up, down = target_sr // g, orig_sr // g
+    cutoff = min(1.0, up / down)
+    half = int(math.ceil(zero_crossings / cutoff))
+    offsets = np.arange(-half + 1, half + 1)
+
+    # One set of kernel weights per output phase, normalised to unit DC gain
+    phases = np.arange(up)
+    frac = phases * down / up - (phases * down) // up
+    tau = frac[:, None] - offsets[None, :]
+    weights = cutoff * np.sinc(cutoff * tau) * 0.5 * (1 + np.cos(np.pi * tau / half))
+    weights = (weights / weights.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    n_out = int(math.ceil(len(audio) * up / down))
+    padded = np.pad(audio.astype(np.float32, copy=False), (half - 1, 2 * half + down))
+    # windows[i] holds the input samples i - half + 1 .. i + half
+    windows = np.lib.stride_tricks.sliding_window_view(padded, len(offsets))
+    out = np.empty(n_out, dtype=np.float32)
+    for p in range(min(up, n_out)):
+        count = (n_out - p + up - 1) // up
+        base = (p * down) // up
+        out[p::up] = windows[base:base + (count - 1) * down + 1:down] @ weights[p]
+    return out
+
+
+def decode_audio_bytes(data: bytes) -> np.ndarray:
+    """Decode an in-memory audio file to 16 kHz mono float32 PCM.
+
+    The bytes are piped into ffmpeg's stdin and PCM is read from its stdout,
+    so nothing is written to disk. Containers that need a seekable input (MP4
+    with the index at the end) fail here; callers should fall back to a file.
+    WAV input is parsed in-process without starting ffmpeg at all.
+    """
+    decoded = decode_wav(data)
+    if decoded is not None:
+        return decoded
+    cmd = [
+        "ffmpeg", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE),
+        "-loglevel", "error", "pipe:1"
+    ]
+    try:
+        output = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode(errors='replace')}") from e
+    if not output:
+        raise RuntimeError("Failed to load audio: no samples decoded")
+    return np.frombuffer(output, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """Duration of an audio file in seconds without decoding it, or None if unknown."""
+    try:
+        # PCM WAV headers give the length directly
+        with wave.open(audio_path, "rb") as f:
+            return f.getnframes() / float(f.getframerate())
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        pass
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-show_entries", "format=duration",
+                "-of", "json", audio_path
+            ],
+            capture_output=True,
+            check=True,
+            timeout=10
+        ).stdout
+        return float(json.loads(output)["format"]["duration"])
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, TypeError):
+        return None
+
+
+def frame_energy(audio: np.ndarray, frame_seconds: float = 0.1) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames."""
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+    return np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    window_seconds: float,
+    search_seconds: float = 30.0,
+    frame_seconds: float = 0.1
+) -> List[Tuple[int, int]]:
+    """Split audio into windows of about ``window_seconds``.
+
+    Each cut is placed at the quietest frame within the last ``search_seconds``
+    before the nominal boundary, so words are rarely cut in half. Returns
+    ``(start, end)`` sample offsets covering the whole input.
+    """
+    total = len(audio)
+    window = int(window_seconds * SAMPLE_RATE)
+    if total <= window:
+        return [(0, total)]
+
+    energy = frame_energy(audio, frame_seconds)
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    search_frames = max(1, int(search_seconds / frame_seconds))
+
+    windows = []
+    start = 0
+    while total - start > window:
+        target_frame = (start + window) // frame_length
+        lowest = max(start // frame_length + 1, target_frame - search_frames)
+        candidates = energy[lowest:target_frame + 1]
+        if len(candidates) == 0:
+            cut = start + window
+        else:
+            # Cut in the middle of the quietest frame
+            quietest = lowest + int(np.argmin(candidates))
+            cut = quietest * frame_length + frame_length // 2
+        windows.append((start, cut))
+        start = cut
+    windows.append((start, total))
+    return windows
@@ -0,0 +1,32 @@
+from typing import Dict
+
+from app.backends.base import InferenceBackend
+from app.backends.fasterwhisper import FasterWhisperBackend
+from app.backends.pytorch import PyTorchBackend
+from app.config import get_settings
+
+# Registered backends by name, as accepted by settings and requests
+BACKENDS: Dict[str, InferenceBackend] = {
+    backend.name: backend
+    for backend in (
+        PyTorchBackend(mmap_weights=get_settings().mmap_weights),
+        FasterWhisperBackend()
+    )
+}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    """Look up a backend by name."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend: {name}") from None
+
+
+__all__ = [
+    "BACKENDS",
+    "FasterWhisperBackend",
+    "InferenceBackend",
+    "PyTorchBackend",
+    "get_backend",
+]
@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from typing import Any, FrozenSet
+
+import numpy as np
+
+from app.model_pool import model_parameters
+
+# Capability flags a backend may advertise
+WORD_TIMESTAMPS = "word_timestamps"
+INITIAL_PROMPT = "initial_prompt"
+INT8 = "int8"  # int8 weights on CPU
+INT8_GPU = "int8_gpu"  # int8 weights on CUDA as well
+# Features built on openai-whisper internals (encoder outputs, mel batches, hooks)
+BATCHED_DECODING = "batched_decoding"
+SHARED_ENCODER = "shared_encoder"
+LONG_AUDIO = "long_audio"
+CASCADE = "cascade"
+STREAMING = "streaming"
+
+
+class InferenceBackend(ABC):
+    """An inference engine that can run Whisper checkpoints.
+
+    Models are loaded through the service's ModelPool; the backend only knows
+    how to build one and run it. Results use openai-whisper's format: ``text``,
+    ``language`` and ``segments`` with ``start``, ``end``, ``text``,
+    ``avg_logprob``, ``compression_ratio`` and ``no_speech_prob``.
+    """
+
+    name: str
+    capabilities: FrozenSet[str] = frozenset()
+
+    def available(self) -> bool:
+        """Whether the engine's package is installed."""
+        return True
+
+    def bytes_per_parameter(self, model_key: str, device: str) -> int:
+        """Bytes each weight of ``model_key`` takes once loaded on ``device``."""
+        return 4
+
+    def model_size(self, model: Any, model_key: str, device: str) -> int:
+        """Approximate bytes ``model``, loaded as ``model_key``, holds on ``device``.
+
+        ``model`` is None when the pool estimates a model it is about to load.
+        """
+        return model_parameters(model_key) * self.bytes_per_parameter(model_key, device)
+
+    @abstractmethod
+    def load(self, model_key: str, device: str, download_root: str) -> Any:
+        """Load ``model_key`` (a model name, optionally ending in ``:int8``)."""
+
+    @abstractmethod
+    def transcribe(self, model: Any, audio: np.ndarray, **options) -> dict:
+        """Transcribe 16 kHz PCM with openai-whisper style ``options``."""
+
+    @abstractmethod
+    def detect_language(self, model: Any, audio: np.ndarray) -> dict:
+        """``detected_language`` and ``probabilities`` for the first 30 s of ``audio``."""
@@ -0,0 +1,102 @@
+import importlib.util
+import os
+from typing import Any
+
+import numpy as np
+
+from app.backends.base import INITIAL_PROMPT, INT8, INT8_GPU, WORD_TIMESTAMPS, InferenceBackend
+from app.cancellation import check_cancelled
+from app.quantization import INT8_SUFFIX
+
+# openai-whisper option names that faster-whisper spells differently
+RENAMED_OPTIONS = {"logprob_threshold": "log_prob_threshold"}
+# openai-whisper options with no faster-whisper counterpart
+DROPPED_OPTIONS = {"fp16", "verbose", "clip_timestamps", "hallucination_silence_threshold"}
+# Bytes per weight of each CTranslate2 compute type used here
+COMPUTE_TYPE_BYTES = {"float32": 4, "float16": 2, "int8": 1, "int8_float16": 1}
+
+
+def compute_type(model_key: str, device: str) -> str:
+    """CTranslate2 compute type for a pool key (``:int8`` or not) on ``device``."""
+    quantized = model_key.endswith(INT8_SUFFIX)
+    if device == "cuda":
+        return "int8_float16" if quantized else "float16"
+    return "int8" if quantized else "float32"
+
+
+class FasterWhisperBackend(InferenceBackend):
+    """CTranslate2 engine from the ``faster-whisper`` package (optional dependency).
+
+    Several times faster than PyTorch on CPU at equal accuracy, with int8
+    weights on CPU and GPU. Converted checkpoints are downloaded from the
+    Hugging Face Hub into ``download_root/faster-whisper``.
+    """
+
+    name = "faster-whisper"
+    capabilities = frozenset({WORD_TIMESTAMPS, INITIAL_PROMPT, INT8, INT8_GPU})
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def load(self, model_key: str, device: str, download_root: str) -> Any:
+        from faster_whisper import WhisperModel
+
+        name = model_key
+        if model_key.endswith(INT8_SUFFIX):
+            name = model_key[:-len(INT8_SUFFIX)]
+        return WhisperModel(
+            name,
+            device=device,
+            compute_type=compute_type(model_key, device),
+            download_root=os.path.join(download_root, "faster-whisper")
+        )
+
+    def bytes_per_parameter(self, model_key: str, device: str) -> int:
+        # CTranslate2 holds its weights outside Python, so sizes are always estimated
+        return COMPUTE_TYPE_BYTES[compute_type(model_key, device)]
+
+    def transcribe(self, model: Any, audio: np.ndarray, **options) -> dict:
+        options = {
+            RENAMED_OPTIONS.get(key, key): value
+            for key, value in options.items() if key not in DROPPED_OPTIONS
+        }
+        # Segments are decoded lazily, one 30 s window at a time
+        segments, info = model.transcribe(audio, **options)
+        results = []
+        for segment in segments:
+            check_cancelled()
+            result = {
+                "id": len(results),
+                "seek": segment.seek,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "tokens": list(segment.tokens),
+                "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob,
+                "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob
+            }
+            if segment.words:
+                result["words"] = [
+                    {
+                        "word": word.word,
+                        "start": word.start,
+                        "end": word.end,
+                        "probability": word.probability
+                    }
+                    for word in segment.words
+                ]
+            results.append(result)
+        return {
+            "text": "".join(segment["text"] for segment in results),
+            "language": info.language,
+            "segments": results
+        }
+
+    def detect_language(self, model: Any, audio: np.ndarray) -> dict:
+        language, _, all_probs = model.detect_language(audio)
+        return {
+            "detected_language": language,
+            "probabilities": dict(all_probs)
+        }
@@ -0,0 +1,58 @@
+from typing import Any
+
+import numpy as np
+import torch
+import whisper
+
+from app.backends.base import (
+    BATCHED_DECODING,
+    CASCADE,
+    INITIAL_PROMPT,
+    INT8,
+    LONG_AUDIO,
+    SHARED_ENCODER,
+    STREAMING,
+    WORD_TIMESTAMPS,
+    InferenceBackend,
+)
+from app.cancellation import install_cancel_hook
+from app.model_pool import model_memory_bytes
+from app.quantization import load_model_variant
+
+
+class PyTorchBackend(InferenceBackend):
+    """openai-whisper on PyTorch; the reference backend every feature supports."""
+
+    name = "pytorch"
+    capabilities = frozenset({
+        WORD_TIMESTAMPS, INITIAL_PROMPT, INT8,
+        BATCHED_DECODING, SHARED_ENCODER, LONG_AUDIO, CASCADE, STREAMING
+    })
+
+    def __init__(self, mmap_weights: bool = True):
+        self.mmap_weights = mmap_weights
+
+    def load(self, model_key: str, device: str, download_root: str) -> Any:
+        model = load_model_variant(
+            model_key, device=device, download_root=download_root, mmap=self.mmap_weights
+        )
+        # Lets cancelled jobs stop at the next 30 s window
+        return install_cancel_hook(model)
+
+    def model_size(self, model: Any, model_key: str, device: str) -> int:
+        if isinstance(model, torch.nn.Module):
+            return model_memory_bytes(model)
+        return super().model_size(model, model_key, device)
+
+    def transcribe(self, model: Any, audio: np.ndarray, **options) -> dict:
+        return model.transcribe(audio, **options)
+
+    def detect_language(self, model: Any, audio: np.ndarray) -> dict:
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio), n_mels=model.dims.n_mels
+        ).to(model.device)
+        _, probs = model.detect_language(mel)
+        return {
+            "detected_language": max(probs, key=probs.get),
+            "probabilities": probs
+        }
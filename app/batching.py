@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+class MicroBatcher:
+    """Gathers concurrent requests that share a key and processes them together.
+
+    The first request for a key opens a batch; the batch is flushed once it
+    holds ``max_batch_size`` items or ``max_wait_seconds`` after it opened,
+    whichever comes first. ``process(key, items)`` must return one result per
+    item, in order; an exception fails every request in the batch.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[str, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait_seconds: float = 0.01
+    ):
+        self.process = process
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    async def submit(self, key: str, item: Any) -> Any:
+        """Add ``item`` to the open batch for ``key`` and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch_size or self.max_wait_seconds <= 0:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_seconds, self._flush, key)
+        return await future
+
+    def _flush(self, key: str):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        # Callers that gave up while the batch was open are left out
+        batch = [
+            (item, future) for item, future in self._pending.pop(key, [])
+            if not future.done()
+        ]
+        if not batch:
+            return
+        self._batches += 1
+        self._items += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key: str, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.process(key, [item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counts and sizes since startup."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+            "open_batches": len(self._pending),
+            "batches": self._batches,
+            "items": self._items,
+            "average_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest_batch
+        }
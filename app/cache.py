@@ -0,0 +1,200 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResultCache:
+    """Content-addressed cache for transcription and language-detection results.
+
+    Entries live in an in-memory LRU tier and, optionally, in JSON files under
+    ``disk_dir``. Both tiers expire entries after ``ttl_seconds`` and evict the
+    least recently used entries once they hold more than their size limit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: int = 86400,
+        disk_dir: Optional[str] = None,
+        max_disk_entries: int = 10000
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # Disk tier files, least recently used first, kept in step with every
+        # read and write; the directory is rescanned after every
+        # max_disk_entries writes to pick up files of other processes
+        self._disk_index: "OrderedDict[str, None]" = OrderedDict()
+        self._writes_since_scan = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(content_hash: str, **options) -> str:
+        """Build a cache key from the audio hash and every option affecting output."""
+        payload = json.dumps(
+            {"content_hash": content_hash, **options}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        entry = self._get_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            created_at, value = entry
+            self._hits += 1
+            self._disk_hits += 1
+            # Keep the original write time so reads never extend the TTL
+            self._store_in_memory(key, value, created_at)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result in every enabled tier."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store_in_memory(key, value, time.time())
+        if self.disk_dir:
+            self._put_on_disk(key, value)
+
+    def _store_in_memory(self, key: str, value: Dict[str, Any], created_at: float):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def _get_from_disk(self, key: str) -> Optional[tuple]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry["created_at"]):
+            self._remove_file(path)
+            with self._lock:
+                self._disk_index.pop(path, None)
+            return None
+        # Touch the file so disk eviction after a rescan follows recency of use
+        os.utime(path, None)
+        with self._lock:
+            self._disk_index[path] = None
+            self._disk_index.move_to_end(path)
+        return entry["created_at"], entry["value"]
+
+    def _put_on_disk(self, key: str, value: Dict[str, Any]):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing result cache entry {key}: {str(e)}")
+            self._remove_file(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_index[path] = None
+            self._disk_index.move_to_end(path)
+            self._writes_since_scan += 1
+            rescan = self._writes_since_scan >= self.max_disk_entries
+        if rescan:
+            self._scan_disk()
+        self._evict_disk()
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the directory, dropping expired files."""
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            # mtime is the last use, never earlier than the write time
+            if self._expired(mtime):
+                self._remove_file(entry.path)
+                continue
+            entries.append((mtime, entry.path))
+        with self._lock:
+            self._disk_index = OrderedDict((path, None) for _, path in sorted(entries))
+            self._writes_since_scan = 0
+
+    def _evict_disk(self):
+        """Drop the least recently used files beyond the size limit."""
+        with self._lock:
+            excess = len(self._disk_index) - self.max_disk_entries
+            paths = [self._disk_index.popitem(last=False)[0] for _ in range(max(excess, 0))]
+            self._evictions += len(paths)
+        for path in paths:
+            self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._disk_index.clear()
+        if self.disk_dir:
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith(".json"):
+                    self._remove_file(entry.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": bool(self.disk_dir),
+            }
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job that was cancelled or ran past its deadline."""
+
+    def __init__(self, reason: str = "cancelled"):
+        self.reason = reason  # "cancelled" or "timed_out"
+        message = (
+            "Transcription deadline exceeded" if reason == "timed_out"
+            else "Transcription job was cancelled"
+        )
+        super().__init__(message)
+
+
+class CancelToken:
+    """Thread-safe flag a blocking job polls to find out it should stop."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Raise JobCancelledError if the token has been cancelled."""
+        if self._event.is_set():
+            raise JobCancelledError(self.reason or "cancelled")
+
+
+_local = threading.local()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Make ``token`` the current thread's token for the duration of the block."""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def check_cancelled():
+    """Raise JobCancelledError if the current thread's job has been cancelled."""
+    token = getattr(_local, "token", None)
+    if token is not None:
+        token.check()
+
+
+def _encoder_pre_hook(module, inputs):
+    check_cancelled()
+
+
+def install_cancel_hook(model):
+    """Check for cancellation before every encoder pass of a Whisper model.
+
+    ``model.transcribe`` encodes each 30 s window (and every temperature
+    fallback) separately, so a cancelled job stops at the next window.
+    """
+    if not getattr(model, "_cancel_hook_installed", False):
+        model.encoder.register_forward_pre_hook(_encoder_pre_hook)
+        model._cancel_hook_installed = True
+    return model
+
+
+async def run_cancellable(
+    awaitable: Awaitable[T],
+    deadline_at: Optional[float] = None,
+    should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+    poll_seconds: float = 1.0
+) -> T:
+    """Await ``awaitable`` but give up at ``deadline_at`` or once ``should_stop()`` is true.
+
+    Giving up cancels the awaitable, which in turn cancels the token of the
+    inference job behind it, and raises JobCancelledError.
+    """
+    job = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            timeout = poll_seconds
+            if deadline_at is not None:
+                timeout = max(0.0, min(timeout, deadline_at - time.time()))
+            done, _ = await asyncio.wait({job}, timeout=timeout)
+            if done:
+                return job.result()
+            if deadline_at is not None and time.time() >= deadline_at:
+                raise JobCancelledError("timed_out")
+            if should_stop is not None and await should_stop():
+                raise JobCancelledError("cancelled")
+    finally:
+        job.cancel()
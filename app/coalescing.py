@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class _SharedJob:
+    __slots__ = ("job_id", "task", "waiters", "started_at")
+
+    def __init__(self, job_id: str, task: asyncio.Task):
+        self.job_id = job_id
+        self.task = task
+        self.waiters = 0
+        self.started_at = time.time()
+
+
+class RequestCoalescer:
+    """Collapses concurrent identical requests onto one running computation.
+
+    Callers that share a key attach to the same job and all receive its result,
+    or its exception. A waiter that is cancelled detaches without affecting the
+    others; the job itself is cancelled only once its last waiter has gone, and
+    cancelling the job cancels every waiter.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, _SharedJob] = {}
+        self._started = 0
+        self._coalesced = 0
+
+    def is_running(self, key: str) -> bool:
+        """Whether a job for ``key`` is currently in flight."""
+        return key in self._inflight
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight job for ``key``, starting it with ``factory`` if needed."""
+        job = self._inflight.get(key)
+        if job is None:
+            job = _SharedJob(key, asyncio.ensure_future(factory()))
+            self._inflight[key] = job
+            self._started += 1
+            job.task.add_done_callback(lambda _: self._forget(job))
+        else:
+            self._coalesced += 1
+
+        job.waiters += 1
+        try:
+            return await asyncio.shield(job.task)
+        finally:
+            job.waiters -= 1
+            if job.waiters == 0 and not job.task.done():
+                # Nobody is left to receive the result
+                job.task.cancel()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel the in-flight job for ``key``; every waiter sees CancelledError."""
+        job = self._inflight.get(key)
+        if job is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    def _forget(self, job: _SharedJob):
+        if self._inflight.get(job.job_id) is job:
+            del self._inflight[job.job_id]
+        if not job.task.cancelled():
+            # Mark the exception as retrieved even if every waiter has left
+            job.task.exception()
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """In-flight jobs with their waiter counts."""
+        now = time.time()
+        return [
+            {
+                "job_id": job.job_id,
+                "waiters": job.waiters,
+                "running_seconds": round(now - job.started_at, 3),
+            }
+            for job in self._inflight.values()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for started and coalesced requests."""
+        return {
+            "in_flight": len(self._inflight),
+            "started": self._started,
+            "coalesced": self._coalesced,
+        }
@@ -11,18 +11,100 @@ class Settings(BaseSettings):
     # Whisper Configuration
     whisper_model: str = "turbo"
     cache_dir: str = "./models"  # 改名避免 model_ 前綴衝突
+    model_memory_budget: str = "6GB"  # resident model weights per worker process
+    preload_enabled: bool = True
+    preload_models: str = ""  # comma-separated, defaults to whisper_model
+    warmup_enabled: bool = True  # run a synthetic transcription after preloading
+    mmap_weights: bool = True  # map weights pre-converted by download_models.py (cache_dir/mmap) when present
+    inference_backend: str = "pytorch"  # pytorch or faster-whisper (pip install faster-whisper)
+    model_precision: str = "fp32"  # fp32 or int8 (dynamic quantization of Linear layers, CPU only)
+    quantized_models: str = ""  # comma-separated models loaded as int8 regardless of model_precision
     
     # File Upload Configuration
     max_file_size: str = "100MB"
+    upload_chunk_size: str = "1MB"  # bytes held in memory per upload at a time
     upload_dir: str = "./uploads"
     temp_dir: str = "./temp"
+    in_memory_decode: bool = True  # pipe sync uploads through ffmpeg without a temp file
+    in_memory_max_size: str = "32MB"  # larger uploads are spooled to temp_dir
+    temp_file_max_age: int = 3600  # seconds before an orphaned temp file is swept
+    temp_sweep_interval: int = 600
+    upload_cache_size: str = "1GB"  # decoded PCM and spectrograms cached in memory per process for /uploads handles
+    upload_handle_ttl: int = 3600  # seconds an upload handle stays referenceable
+    
+    # Result Cache Configuration
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 256
+    result_cache_ttl: int = 86400  # seconds, 0 disables expiry
+    result_cache_disk: bool = False  # persist results under cache_dir/results
+    result_cache_disk_max_entries: int = 10000
+    
+    # Streaming Configuration
+    stream_window_seconds: int = 30  # audio decoded per streamed step
+    
+    # Live (WebSocket) Transcription Configuration
+    live_step_seconds: float = 1.0  # new audio needed before re-decoding the buffer
+    live_commit_seconds: float = 10.0  # buffer length after which segments become final
+    live_max_sessions: int = 32
+    
+    # Batch Transcription Configuration
+    batch_size: int = 16  # short clips per batched encoder/decoder pass
+    batch_max_files: int = 500  # files (or archive members) per /transcribe/batch request
+    
+    # Long Audio Configuration
+    long_audio_window_seconds: int = 300  # target window length before silence alignment
+    long_audio_processes: int = 2  # transcription processes for long-audio mode
+    
+    # Voice Activity Detection Configuration
+    vad_threshold_db: float = -45.0  # frames quieter than this (dBFS) are non-speech
+    vad_min_speech_seconds: float = 0.25
+    vad_min_silence_seconds: float = 0.5  # shorter pauses are kept
+    vad_padding_seconds: float = 0.2
+    
+    # Model Cascade Configuration
+    cascade_language_model: str = "base"  # language ID runs here instead of the requested model
+    cascade_draft_model: str = "base"  # first pass; only unreliable segments go to the requested model
+    cascade_logprob_threshold: float = -0.7  # segments decoded with a lower avg_logprob are refined
+    cascade_compression_threshold: float = 2.2  # ... or with a higher compression ratio (repetition)
+    cascade_no_speech_threshold: float = 0.5  # ... or that are probably not speech
     
     # Redis Configuration (for background tasks)
     redis_url: str = "redis://localhost:6379/0"
     
+    # Task Store Configuration
+    task_store: str = "memory"  # memory, sqlite or redis; use sqlite/redis with several workers
+    task_store_path: str = "./data/tasks.db"  # sqlite backend only
+    task_result_dir: str = "./data/results"  # large results are stored here gzipped
+    task_result_offload_size: str = "64KB"  # results above this go to task_result_dir; 0 keeps all inline
+    task_ttl_completed: int = 86400  # seconds to keep tasks in each status; 0 keeps them
+    task_ttl_failed: int = 86400
+    task_ttl_active: int = 0  # pending/processing tasks
+    task_max_count: int = 10000  # oldest finished tasks are evicted beyond this
+    task_prune_interval: int = 300
+    
+    # Worker Queue Configuration
+    task_queue: str = "local"  # local (in the API process) or celery (separate workers)
+    worker_models: str = ""  # comma-separated models a celery worker preloads and serves
+    worker_max_retries: int = 3
+    worker_retry_delay: int = 10  # seconds before the first retry, doubled each attempt
+    worker_heartbeat_seconds: int = 15
+    worker_visibility_timeout: int = 21600  # broker redelivers unacked jobs after this
+    
     # Performance Configuration
     workers: int = 1
-    max_workers: int = 2
+    max_workers: int = 2  # inference worker threads per process
+    max_queue_size: int = 8  # jobs allowed to wait for a worker before 503
+    scheduler_aging_rate: float = 1.0  # cost units a waiting job gains per second
+    scheduler_batch_offset: float = 300.0  # extra cost units async jobs carry behind sync ones
+    language_batch_max_size: int = 16  # detect-language requests per batched encoder pass
+    language_batch_wait_ms: float = 10.0  # how long an open batch waits for more requests
+    
+    # Admission Control Configuration
+    admission_capacity_seconds: float = 900.0  # outstanding compute seconds before 503; 0 disables
+    client_quota_audio_seconds: float = 0.0  # audio seconds per client per window before 429; 0 disables
+    client_quota_window_seconds: float = 3600.0
+    quota_api_keys: str = ""  # comma-separated X-API-Key values with their own quota; others are ignored
+    trust_proxy_headers: bool = True  # key quotas on nginx's X-Real-IP; disable if clients reach the app directly
     
     class Config:
         env_file = ".env"
@@ -32,3 +114,16 @@ class Settings(BaseSettings):
 
 def get_settings() -> Settings:
     return Settings()
+
+
+def parse_size(size_str: str) -> int:
+    """Parse size string like '100MB' to bytes."""
+    size_str = size_str.upper()
+    if size_str.endswith('KB'):
+        return int(size_str[:-2]) * 1024
+    elif size_str.endswith('MB'):
+        return int(size_str[:-2]) * 1024 * 1024
+    elif size_str.endswith('GB'):
+        return int(size_str[:-2]) * 1024 * 1024 * 1024
+    else:
+        return int(size_str)
@@ -0,0 +1,39 @@
+from typing import Optional
+
+# Decoding cost per audio second relative to large, from the relative speed
+# column of the openai-whisper model table (turbo ~8x, tiny ~10x faster)
+MODEL_COST_FACTORS = {
+    "tiny": 0.1,
+    "tiny.en": 0.1,
+    "base": 0.14,
+    "base.en": 0.14,
+    "small": 0.25,
+    "small.en": 0.25,
+    "medium": 0.5,
+    "medium.en": 0.5,
+    "large": 1.0,
+    "turbo": 0.125,
+}
+
+# Assumed length of audio whose duration could not be probed
+DEFAULT_DURATION_SECONDS = 60.0
+
+
+def estimate_cost(duration: Optional[float], model_name: str) -> float:
+    """Estimated cost of a job: audio seconds weighted by the model's relative speed.
+
+    One unit is one second of audio on ``large``; the scheduler learns how many
+    wall-clock seconds a unit takes on this hardware.
+    """
+    if duration is None or duration <= 0:
+        duration = DEFAULT_DURATION_SECONDS
+    return duration * MODEL_COST_FACTORS.get(model_name, 1.0)
+
+
+def combined_cost_factor(translate: bool) -> float:
+    """Cost of the combined endpoint relative to one transcription of the same audio.
+
+    The translation shares the encoder pass, but decoding dominates the work
+    and it decodes the audio a second time.
+    """
+    return 2.0 if translate else 1.0
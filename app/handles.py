@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+
+from app.audio import SAMPLE_RATE
+
+
+class AudioHandle:
+    """An upload decoded once and kept in memory for later requests.
+
+    The log-mel spectrogram of the whole recording is computed on first use
+    for each mel size (80 or 128 bins, depending on the model) and kept with it.
+    """
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        filename: str = "",
+        sha256: str = "",
+        size: int = 0,
+        handle_id: Optional[str] = None
+    ):
+        self.handle_id = handle_id or str(uuid.uuid4())
+        self.audio = audio
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.duration = len(audio) / SAMPLE_RATE
+        self.created_at = time.time()
+        self._mels: Dict[int, torch.Tensor] = {}
+        self._lock = threading.Lock()
+
+    def mel(self, n_mels: int) -> torch.Tensor:
+        """Log-mel spectrogram with 30 s of trailing padding, as ``model.transcribe`` computes it.
+
+        The combined endpoint and language detection decode from it directly.
+        """
+        with self._lock:
+            if n_mels not in self._mels:
+                self._mels[n_mels] = whisper.log_mel_spectrogram(
+                    self.audio, n_mels, padding=N_SAMPLES
+                )
+            return self._mels[n_mels]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the PCM and every cached spectrogram."""
+        return self.audio.nbytes + sum(
+            mel.numel() * mel.element_size() for mel in self._mels.values()
+        )
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.handle_id,
+            "filename": self.filename,
+            "size": self.size,
+            "sha256": self.sha256,
+            "duration": round(self.duration, 3),
+            "created_at": self.created_at,
+            "cached_mels": sorted(self._mels)
+        }
+
+
+class AudioHandleCache:
+    """Upload handles kept under a memory budget with LRU eviction.
+
+    Handles expire ``ttl_seconds`` after they were created. The most recently
+    used handle is never evicted for size, so one oversized upload still works.
+
+    With ``directory``, each handle's PCM is also written there, so every
+    worker process sharing the directory can serve it; memory then caches
+    handles, and the spectrograms computed from them, per process.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: int = 3600, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self._handles: "OrderedDict[str, AudioHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _expired(self, handle: AudioHandle, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - handle.created_at > self.ttl_seconds
+
+    def _paths(self, handle_id: str) -> Optional[tuple]:
+        """(PCM, metadata) file paths of a handle; None for IDs this cache never issues."""
+        try:
+            handle_id = str(uuid.UUID(handle_id))
+        except ValueError:
+            return None
+        base = os.path.join(self.directory, handle_id)
+        return f"{base}.npy", f"{base}.json"
+
+    def _write(self, handle: AudioHandle):
+        os.makedirs(self.directory, exist_ok=True)
+        audio_path, meta_path = self._paths(handle.handle_id)
+        # The metadata is written last, so its presence marks a complete handle
+        with open(f"{audio_path}.tmp", "wb") as f:
+            np.save(f, handle.audio)
+        os.replace(f"{audio_path}.tmp", audio_path)
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "filename": handle.filename,
+                "sha256": handle.sha256,
+                "size": handle.size,
+                "created_at": handle.created_at
+            }, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _read(self, handle_id: str) -> Optional[AudioHandle]:
+        """Load a handle another process stored; expired ones are removed."""
+        paths = self._paths(handle_id)
+        if paths is None:
+            return None
+        try:
+            with open(paths[1], encoding="utf-8") as f:
+                meta = json.load(f)
+            audio = np.load(paths[0])
+        except (OSError, ValueError):
+            return None
+        handle = AudioHandle(
+            audio, meta["filename"], meta["sha256"], meta["size"], handle_id=handle_id
+        )
+        handle.created_at = meta["created_at"]
+        if self._expired(handle, time.time()):
+            self._remove_files(handle_id)
+            return None
+        return handle
+
+    def _remove_files(self, handle_id: str) -> bool:
+        removed = False
+        for path in self._paths(handle_id) or ():
+            try:
+                os.remove(path)
+                removed = True
+            except OSError:
+                pass
+        return removed
+
+    def _purge_files(self):
+        """Remove the files of expired handles, whichever process stored them."""
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+    def _evict(self):
+        now = time.time()
+        for handle_id in [
+            handle_id for handle_id, handle in self._handles.items()
+            if self._expired(handle, now)
+        ]:
+            del self._handles[handle_id]
+            self._evictions += 1
+        # Spectrograms grow handles after they were added, so re-measure each time
+        total = sum(handle.nbytes for handle in self._handles.values())
+        while total > self.max_bytes and len(self._handles) > 1:
+            _, handle = self._handles.popitem(last=False)
+            total -= handle.nbytes
+            self._evictions += 1
+
+    def put(self, handle: AudioHandle) -> AudioHandle:
+        if self.directory:
+            self._purge_files()
+            self._write(handle)
+        with self._lock:
+            self._handles[handle.handle_id] = handle
+            self._evict()
+            return handle
+
+    def get(self, handle_id: str) -> Optional[AudioHandle]:
+        """Return a live handle and mark it most recently used, or None."""
+        with self._lock:
+            self._evict()
+            handle = self._handles.get(handle_id)
+        if self.directory:
+            paths = self._paths(handle_id)
+            if paths is None:
+                handle = None
+            elif handle is not None and not os.path.exists(paths[1]):
+                # Deleted through another process
+                with self._lock:
+                    self._handles.pop(handle_id, None)
+                handle = None
+            elif handle is None:
+                handle = self._read(handle_id)
+        with self._lock:
+            if handle is None:
+                self._misses += 1
+                return None
+            self._handles[handle_id] = handle
+            self._handles.move_to_end(handle_id)
+            self._hits += 1
+            self._evict()
+            return handle
+
+    def delete(self, handle_id: str) -> bool:
+        with self._lock:
+            removed = self._handles.pop(handle_id, None) is not None
+        if self.directory:
+            removed = self._remove_files(handle_id) or removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict()
+            return {
+                "handles": len(self._handles),
+                "bytes": sum(handle.nbytes for handle in self._handles.values()),
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions
+            }
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from app.models import BackendName, ModelPrecision, TaskStatus, TranscriptionResponse, WhisperModel
+from app.whisper_service import whisper_service
+from app.task_store import ACTIVE_STATUSES, TaskStateConflictError, create_task_store
+from app.cancellation import JobCancelledError, run_cancellable
+from app.scheduler import JobPriority
+from app.config import get_settings, parse_size
+
+
+settings = get_settings()
+
+# Async task records, shared between API and workers unless the memory backend is used
+task_store = create_task_store(
+    settings.task_store,
+    settings.task_store_path,
+    settings.redis_url,
+    result_dir=settings.task_result_dir,
+    offload_threshold=parse_size(settings.task_result_offload_size)
+)
+
+
+def prune_tasks() -> int:
+    """Apply the configured retention policy to the task store."""
+    return task_store.prune(
+        {
+            TaskStatus.COMPLETED: settings.task_ttl_completed,
+            TaskStatus.FAILED: settings.task_ttl_failed,
+            TaskStatus.CANCELLED: settings.task_ttl_failed,
+            TaskStatus.TIMED_OUT: settings.task_ttl_failed,
+            TaskStatus.PENDING: settings.task_ttl_active,
+            TaskStatus.PROCESSING: settings.task_ttl_active
+        },
+        max_tasks=settings.task_max_count
+    )
+
+
+def job_options(
+    model: WhisperModel,
+    task: str,
+    language: Optional[str],
+    temperature: Optional[float],
+    best_of: Optional[int],
+    beam_size: Optional[int],
+    content_hash: Optional[str] = None,
+    long_audio: bool = False,
+    vad: bool = False,
+    cascade: bool = False,
+    precision: Optional[ModelPrecision] = None,
+    backend: Optional[BackendName] = None,
+    deadline_seconds: Optional[float] = None,
+    duration: Optional[float] = None
+) -> Dict[str, Any]:
+    """JSON-serialisable description of a transcription job.
+
+    ``deadline_seconds`` counts from submission, so time spent queued counts too.
+    """
+    return {
+        "model": model.value,
+        "task": task,
+        "language": language,
+        "temperature": temperature,
+        "best_of": best_of,
+        "beam_size": beam_size,
+        "content_hash": content_hash,
+        "long_audio": long_audio,
+        "vad": vad,
+        "cascade": cascade,
+        "precision": precision.value if precision else None,
+        "backend": backend.value if backend else None,
+        "deadline_at": time.time() + deadline_seconds if deadline_seconds else None,
+        "duration": duration
+    }
+
+
+async def run_transcription_job(file_path: str, options: Dict[str, Any]) -> TranscriptionResponse:
+    """Transcribe ``file_path`` with ``options`` from job_options()."""
+    start_time = time.time()
+
+    # The job was admitted when the task was created
+    result = await whisper_service.run_transcription(
+        audio_path=file_path,
+        model_name=WhisperModel(options["model"]),
+        task=options["task"],
+        language=options["language"],
+        content_hash=options.get("content_hash"),
+        enforce_limit=False,
+        priority=JobPriority.BATCH,
+        duration=options.get("duration"),
+        temperature=options.get("temperature"),
+        best_of=options.get("best_of"),
+        beam_size=options.get("beam_size"),
+        long_audio=options.get("long_audio", False),
+        vad=options.get("vad", False),
+        cascade=options.get("cascade", False),
+        precision=ModelPrecision(options["precision"]) if options.get("precision") else None,
+        backend=BackendName(options["backend"]) if options.get("backend") else None
+    )
+
+    return TranscriptionResponse(
+        text=result["text"],
+        language=result.get("language"),
+        segments=result.get("segments"),
+        processing_time=time.time() - start_time,
+        whisper_model=result["whisper_model"],
+        backend=result.get("backend"),
+        vad=result.get("vad"),
+        cascade=result.get("cascade")
+    )
+
+
+async def run_task_job(
+    task_id: str, file_path: str, options: Dict[str, Any], poll_seconds: float = 1.0
+) -> TranscriptionResponse:
+    """run_transcription_job that stops early when the task is cancelled or times out.
+
+    Cancellation is noticed through the task store, so a DELETE handled by any
+    API process or host reaches the job. Raises JobCancelledError.
+    """
+    async def task_stopped() -> bool:
+        task = await asyncio.to_thread(task_store.get, task_id)
+        return task is None or task.status not in ACTIVE_STATUSES
+
+    deadline_at = options.get("deadline_at")
+    if deadline_at is not None and time.time() >= deadline_at:
+        # Spent its whole budget waiting in the queue
+        raise JobCancelledError("timed_out")
+    return await run_cancellable(
+        run_transcription_job(file_path, options),
+        deadline_at=deadline_at,
+        should_stop=task_stopped,
+        poll_seconds=poll_seconds
+    )
+
+
+def claim_task(task_id: str, claimable: Iterable[TaskStatus] = (TaskStatus.PENDING,)):
+    """Move a task to PROCESSING; raises TaskStateConflictError if someone else has it."""
+    task_store.update(task_id, expected_status=claimable, status=TaskStatus.PROCESSING)
+
+
+def complete_task(task_id: str, response: TranscriptionResponse):
+    task_store.update(
+        task_id,
+        expected_status=[TaskStatus.PROCESSING],
+        status=TaskStatus.COMPLETED,
+        result=response,
+        error=None,
+        completed_at=datetime.now().isoformat()
+    )
+
+
+def fail_task(task_id: str, error: str, status: TaskStatus = TaskStatus.FAILED):
+    """Finish an active task without a result; a task already finished is left alone."""
+    try:
+        task_store.update(
+            task_id,
+            expected_status=ACTIVE_STATUSES,
+            status=status,
+            error=error,
+            completed_at=datetime.now().isoformat()
+        )
+    except TaskStateConflictError:
+        pass
+
+
+def stop_task(task_id: str, e: JobCancelledError):
+    """Record a cancelled or timed-out task."""
+    status = TaskStatus.TIMED_OUT if e.reason == "timed_out" else TaskStatus.CANCELLED
+    fail_task(task_id, str(e), status=status)
+
+
+def remove_upload(file_path: str):
+    if os.path.exists(file_path):
+        os.remove(file_path)
@@ -0,0 +1,157 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.audio import SAMPLE_RATE
+
+
+class LiveSession:
+    """Rolling audio buffer and hypothesis state for one live-captioning connection.
+
+    Incoming 16 kHz mono int16 PCM is appended to a buffer of not-yet-final
+    audio. Each decode covers the whole buffer; once the buffer is longer than
+    ``commit_seconds`` every segment but the last is committed as final and
+    the buffer is trimmed to where the last committed segment ended. The
+    buffer never grows past ``max_buffer_seconds`` (Whisper's 30 s window).
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        language: Optional[str] = None,
+        step_seconds: float = 1.0,
+        commit_seconds: float = 10.0,
+        max_buffer_seconds: float = 28.0,
+        prompt_chars: int = 200
+    ):
+        self.session_id = session_id
+        self.language = language
+        self.step_seconds = step_seconds
+        self.commit_seconds = commit_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.prompt_chars = prompt_chars
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0  # stream time of buffer[0], in seconds
+        self.committed_text = ""
+        self.committed_segments = 0
+        self._pending_samples = 0
+        self._last_audio_at: Optional[float] = None
+        self._carry = b""
+
+        self.started_at = time.time()
+        self.received_seconds = 0.0
+        self.decodes = 0
+        self.latencies: List[float] = []
+
+    def append(self, pcm: bytes):
+        """Add little-endian int16 PCM frames to the buffer."""
+        pcm = self._carry + pcm
+        usable = len(pcm) - len(pcm) % 2
+        self._carry = pcm[usable:]
+        samples = np.frombuffer(pcm[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        self.buffer = np.concatenate([self.buffer, samples])
+        self._pending_samples += len(samples)
+        self.received_seconds += len(samples) / SAMPLE_RATE
+        self._last_audio_at = time.time()
+
+    def should_decode(self) -> bool:
+        """Whether enough new audio has arrived to be worth another decode."""
+        return self._pending_samples >= self.step_seconds * SAMPLE_RATE
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """Audio and prompt for the next decode; resets the pending-audio counter."""
+        self._pending_samples = 0
+        return {
+            "audio": self.buffer.copy(),
+            "buffer_start": self.buffer_start,
+            "prompt": self.committed_text[-self.prompt_chars:] or None,
+            "audio_received_at": self._last_audio_at or time.time()
+        }
+
+    def apply_result(
+        self, snapshot: Dict[str, Any], result: dict, final: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Turn a decode of ``snapshot`` into messages for the client.
+
+        Committed segments become a ``final`` message; the remainder of the
+        hypothesis becomes a ``partial`` message. With ``final=True`` everything
+        is committed.
+        """
+        latency = time.time() - snapshot["audio_received_at"]
+        self.decodes += 1
+        self.latencies.append(latency)
+        # Keep the first detected language for the rest of the session
+        self.language = self.language or result.get("language")
+
+        offset = snapshot["buffer_start"]
+        segments = result.get("segments", [])
+        buffer_seconds = len(snapshot["audio"]) / SAMPLE_RATE
+        flush = final or buffer_seconds >= self.max_buffer_seconds
+        if flush:
+            commit_count = len(segments)
+        elif buffer_seconds >= self.commit_seconds:
+            commit_count = max(0, len(segments) - 1)
+        else:
+            commit_count = 0
+
+        if commit_count or flush:
+            # Drop the committed audio (and anything before it) from the buffer
+            cut_seconds = (
+                buffer_seconds if commit_count == len(segments)
+                else segments[commit_count - 1]["end"]
+            )
+            cut = min(len(self.buffer), int(round(cut_seconds * SAMPLE_RATE)))
+            self.buffer = self.buffer[cut:]
+            self.buffer_start = offset + cut / SAMPLE_RATE
+
+        messages = []
+        if commit_count:
+            committed = [
+                {
+                    "id": self.committed_segments + index,
+                    "start": round(segment["start"] + offset, 3),
+                    "end": round(segment["end"] + offset, 3),
+                    "text": segment["text"]
+                }
+                for index, segment in enumerate(segments[:commit_count])
+            ]
+            self.committed_segments += commit_count
+            self.committed_text += "".join(segment["text"] for segment in committed)
+            messages.append({
+                "type": "final",
+                "segments": committed,
+                "text": "".join(segment["text"] for segment in committed),
+                "latency": round(latency, 3)
+            })
+
+        remainder = segments[commit_count:]
+        if remainder:
+            messages.append({
+                "type": "partial",
+                "text": "".join(segment["text"] for segment in remainder),
+                "start": round(remainder[0]["start"] + offset, 3),
+                "end": round(remainder[-1]["end"] + offset, 3),
+                "latency": round(latency, 3)
+            })
+        return messages
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-session latency and throughput figures."""
+        latencies = sorted(self.latencies)
+        return {
+            "session_id": self.session_id,
+            "language": self.language,
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "received_audio_seconds": round(self.received_seconds, 3),
+            "buffered_seconds": round(len(self.buffer) / SAMPLE_RATE, 3),
+            "decodes": self.decodes,
+            "committed_segments": self.committed_segments,
+            "avg_latency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p95_latency": (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+                if latencies else None
+            ),
+            "max_latency": round(latencies[-1], 3) if latencies else None
+        }
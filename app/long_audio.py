@@ -0,0 +1,170 @@
+import gc
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import whisper
+
+from app.audio import SAMPLE_RATE
+from app.cancellation import JobCancelledError, check_cancelled
+from app.quantization import load_model_variant
+
+# The one model held by each pool process and its key in the model pool
+# ("small", "small:int8"); a request for another model replaces it, so a child
+# never holds more than one model outside the pool's memory budget
+_process_model: Optional[Tuple[str, whisper.Whisper]] = None
+
+
+def _init_process(threads_per_process: int):
+    """Give each pool process a share of the cores instead of all of them."""
+    torch.set_num_threads(threads_per_process)
+
+
+def _transcribe_window(
+    audio: np.ndarray,
+    model_key: str,
+    download_root: str,
+    options: dict
+) -> dict:
+    """Transcribe one window inside a pool process."""
+    global _process_model
+    if _process_model is None or _process_model[0] != model_key:
+        # Free the previous model before loading the next one
+        _process_model = None
+        gc.collect()
+        model = load_model_variant(model_key, device="cpu", download_root=download_root)
+        _process_model = (model_key, model)
+    return _process_model[1].transcribe(audio, **options)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w]+", " ", text.lower()).strip()
+
+
+def _is_seam_duplicate(previous: dict, current: dict, tolerance: float) -> bool:
+    """Whether ``current`` repeats ``previous`` across a window seam."""
+    if current["start"] - previous["end"] > tolerance:
+        return False
+    previous_text = _normalize(previous["text"])
+    current_text = _normalize(current["text"])
+    if not current_text:
+        return True
+    return current_text == previous_text or previous_text.endswith(current_text)
+
+
+def offset_segment(segment: dict, offset: float) -> dict:
+    """Copy of ``segment`` with its timestamps shifted by ``offset`` seconds."""
+    segment = dict(segment)
+    segment["start"] = round(segment["start"] + offset, 3)
+    segment["end"] = round(segment["end"] + offset, 3)
+    if "seek" in segment:
+        segment["seek"] = segment["seek"] + int(offset * 100)
+    if segment.get("words"):
+        segment["words"] = [
+            {
+                **word,
+                "start": round(word["start"] + offset, 3),
+                "end": round(word["end"] + offset, 3)
+            }
+            for word in segment["words"]
+        ]
+    return segment
+
+
+def stitch_results(
+    results: Sequence[dict],
+    offsets: Sequence[float],
+    seam_tolerance: float = 1.0
+) -> dict:
+    """Merge per-window transcriptions into one result on the original timeline.
+
+    Segment ``start``/``end`` (and word timestamps) are shifted by each window's
+    offset, ``id`` and ``seek`` are renumbered, and a segment that repeats the
+    last one of the previous window right at the seam is dropped.
+    """
+    segments: List[dict] = []
+    languages = Counter()
+    for result, offset in zip(results, offsets):
+        if result.get("language"):
+            languages[result["language"]] += 1
+        for window_index, segment in enumerate(result.get("segments", [])):
+            segment = offset_segment(segment, offset)
+            if (
+                window_index == 0
+                and segments
+                and _is_seam_duplicate(segments[-1], segment, seam_tolerance)
+            ):
+                continue
+            segment["id"] = len(segments)
+            segments.append(segment)
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": languages.most_common(1)[0][0] if languages else None,
+        "segments": segments
+    }
+
+
+class LongAudioTranscriber:
+    """Transcribes long recordings as silence-aligned windows on a process pool."""
+
+    def __init__(self, processes: int, download_root: str):
+        self.processes = max(1, processes)
+        self.download_root = download_root
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self.processes)
+            # spawn keeps torch thread pools and CUDA state out of the children
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process,
+                initargs=(threads,)
+            )
+        return self._executor
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        windows: Sequence[tuple],
+        model_key: str,
+        options: dict
+    ) -> dict:
+        """Transcribe each ``(start, end)`` window in parallel and stitch the results."""
+        executor = self._get_executor()
+        futures = [
+            executor.submit(
+                _transcribe_window,
+                audio[start:end],
+                model_key,
+                self.download_root,
+                options
+            )
+            for start, end in windows
+        ]
+        try:
+            while True:
+                # Windows already running in a child finish; queued ones are dropped
+                _, pending = wait(futures, timeout=1.0)
+                if not pending:
+                    break
+                check_cancelled()
+        except JobCancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        results = [future.result() for future in futures]
+        return stitch_results(results, [start / SAMPLE_RATE for start, _ in windows])
+
+    def shutdown(self):
+        """Terminate the pool processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
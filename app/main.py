@@ -1,11 +1,16 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
+from fastapi import (
+    FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form, Request,
+    WebSocket, WebSocketDisconnect, Query
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import hashlib
+import json
 import os
 import time
 import uuid
-import aiofiles
-from typing import Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 
 from app.models import (
@@ -13,12 +18,50 @@ from app.models import (
     TranscriptionResponse,
     AsyncTaskResponse,
     TaskResult,
+    TaskListResponse,
     TaskStatus,
     WhisperModel,
-    TaskType
+    ModelPrecision,
+    BackendName,
+    TaskType,
+    BatchFileResult,
+    BatchTranscriptionResponse,
+    UploadHandleResponse,
+    CombinedTranscriptionResponse
+)
+from app.whisper_service import OPENAI_WHISPER, whisper_service
+from app.scheduler import QueueFullError
+from app.model_pool import ModelInUseError
+from app.live import LiveSession
+from app.audio import SAMPLE_RATE, decode_audio_bytes, load_audio, probe_duration
+from app.handles import AudioHandle
+from app.backends import BACKENDS
+from app.backends.base import BATCHED_DECODING, CASCADE, LONG_AUDIO, SHARED_ENCODER, STREAMING
+from app.uploads import (
+    ArchiveError,
+    IngestedUpload,
+    UploadTooLargeError,
+    extract_archive,
+    ingest_upload,
+    sweep_stale_files
+)
+from app.task_store import ACTIVE_STATUSES, TaskStateConflictError
+from app.cancellation import JobCancelledError, run_cancellable
+from app.admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from app.cost import DEFAULT_DURATION_SECONDS, combined_cost_factor, estimate_cost
+from app.jobs import (
+    task_store,
+    prune_tasks,
+    job_options,
+    run_task_job,
+    claim_task,
+    complete_task,
+    fail_task,
+    stop_task,
+    remove_upload
 )
-from app.whisper_service import whisper_service
-from app.config import get_settings
+from app import worker
+from app.config import get_settings, parse_size
 
 settings = get_settings()
 
@@ -39,8 +82,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory task storage (use Redis in production)
-tasks_db = {}
+# Compute-based admission control and per-client audio quotas
+admission = AdmissionController(
+    capacity_seconds=settings.admission_capacity_seconds,
+    workers=settings.max_workers,
+    quota_audio_seconds=settings.client_quota_audio_seconds,
+    quota_window_seconds=settings.client_quota_window_seconds
+)
+# API keys that get a quota of their own (see client_id)
+quota_api_keys = {key.strip() for key in settings.quota_api_keys.split(",") if key.strip()}
+
+# Startup tasks; the event loop only keeps weak references to tasks
+startup_tasks: Set[asyncio.Task] = set()
+
+# Open live-captioning WebSocket sessions
+live_sessions: Dict[str, LiveSession] = {}
+
+# Multipart framing adds a little on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class RejectOversizedBodies:
+    """Refuse bodies whose declared length already exceeds the upload limit.
+    
+    A plain ASGI middleware: @app.middleware("http") would hide the client's
+    disconnect from endpoints that cancel their job on it.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            content_length = dict(scope["headers"]).get(b"content-length", b"").decode("latin-1")
+            if content_length.isdigit() and (
+                int(content_length) > parse_size(settings.max_file_size) + MULTIPART_OVERHEAD
+            ):
+                response = JSONResponse(
+                    status_code=413,
+                    content={
+                        "detail": f"File size exceeds maximum allowed size of {settings.max_file_size}"
+                    }
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(RejectOversizedBodies)
+
+
+def preload_model_names() -> List[str]:
+    """Models to load and warm up at startup."""
+    if not settings.preload_enabled:
+        return []
+    names = [name.strip() for name in settings.preload_models.split(",") if name.strip()]
+    return names or [settings.whisper_model]
+
+
+async def preload_models():
+    """Load and warm up the configured models one at a time on the inference pool."""
+    for name in preload_model_names():
+        try:
+            model_name = WhisperModel(name)
+        except ValueError:
+            whisper_service.model_status[name] = {
+                "state": "failed",
+                "error": f"Unknown model: {name}"
+            }
+            continue
+        
+        status = await whisper_service.scheduler.run(
+            whisper_service.prepare_model,
+            model_name,
+            warmup=settings.warmup_enabled,
+            enforce_limit=False
+        )
+        print(f"Model {name} preload finished: {status['state']}")
 
 
 @app.on_event("startup")
@@ -49,9 +167,234 @@ async def startup_event():
     os.makedirs(settings.upload_dir, exist_ok=True)
     os.makedirs(settings.temp_dir, exist_ok=True)
     os.makedirs(settings.cache_dir, exist_ok=True)
+    
+    # Preload in the background so /health answers while models warm up
+    for coro in (preload_models(), prune_tasks_periodically(), sweep_temp_files_periodically()):
+        task = asyncio.create_task(coro)
+        startup_tasks.add(task)
+        task.add_done_callback(startup_tasks.discard)
     print("Whisper API service started successfully!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop long-audio transcription processes."""
+    whisper_service.long_audio.shutdown()
+
+
+async def prune_tasks_periodically():
+    """Apply task retention every TASK_PRUNE_INTERVAL seconds."""
+    while True:
+        try:
+            removed = await asyncio.to_thread(prune_tasks)
+            if removed:
+                print(f"Pruned {removed} expired tasks")
+        except Exception as e:
+            print(f"Task pruning failed: {str(e)}")
+        await asyncio.sleep(settings.task_prune_interval)
+
+
+def is_active_task_file(filename: str) -> bool:
+    """Whether a temp file is the upload of an async task still waiting or running."""
+    task = task_store.get(os.path.splitext(filename)[0])
+    return task is not None and task.status in ACTIVE_STATUSES
+
+
+def sweep_temp_files() -> int:
+    """Remove temp files orphaned by crashed requests, keeping active task uploads."""
+    return sweep_stale_files(
+        settings.temp_dir, settings.temp_file_max_age, keep=is_active_task_file
+    )
+
+
+async def sweep_temp_files_periodically():
+    """Run sweep_temp_files every TEMP_SWEEP_INTERVAL seconds.
+    
+    Only with a shared task store: a per-process store cannot see the queued
+    tasks of other workers, whose uploads would look orphaned.
+    """
+    if not task_store.shared:
+        print("Temp file sweep disabled: it needs a shared TASK_STORE (sqlite or redis)")
+        return
+    while True:
+        try:
+            removed = await asyncio.to_thread(sweep_temp_files)
+            if removed:
+                print(f"Removed {removed} orphaned temp files")
+        except Exception as e:
+            print(f"Temp file sweep failed: {str(e)}")
+        await asyncio.sleep(settings.temp_sweep_interval)
+
+
+def queue_full_response(e: QueueFullError) -> HTTPException:
+    """Translate a full inference queue into a 503 with Retry-After."""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def save_upload(
+    file: UploadFile,
+    file_id: Optional[str] = None,
+    probe: bool = True,
+    in_memory: bool = False
+) -> IngestedUpload:
+    """Stream an upload into the temp directory, enforcing the size limit.
+    
+    The audio duration is probed so the scheduler can estimate the job's cost.
+    With ``in_memory`` (and IN_MEMORY_DECODE on), uploads up to
+    IN_MEMORY_MAX_SIZE are decoded straight from memory into ``upload.audio``
+    and never written to disk; anything ffmpeg cannot decode from a pipe is
+    spilled to a file instead.
+    """
+    in_memory = in_memory and settings.in_memory_decode
+    try:
+        upload = await ingest_upload(
+            file,
+            settings.temp_dir,
+            max_size=parse_size(settings.max_file_size),
+            chunk_size=parse_size(settings.upload_chunk_size),
+            file_id=file_id,
+            memory_limit=parse_size(settings.in_memory_max_size) if in_memory else 0
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds maximum allowed size of {settings.max_file_size}"
+        )
+    if upload.data is not None:
+        try:
+            upload.audio = await asyncio.to_thread(decode_audio_bytes, upload.data)
+            upload.data = None
+            upload.duration = len(upload.audio) / SAMPLE_RATE
+            return upload
+        except (OSError, RuntimeError) as e:
+            # No ffmpeg, or a container that needs a seekable input
+            print(f"In-memory decode failed, spilling to disk: {str(e)}")
+            await asyncio.to_thread(upload.spill, settings.temp_dir, file_id)
+    if probe:
+        upload.duration = await asyncio.to_thread(probe_duration, upload.path)
+    return upload
+
+
+def client_id(request: Request) -> str:
+    """Identify the caller for quotas.
+    
+    A configured API key identifies its holder; any other key is ignored, so
+    clients cannot mint fresh quotas by inventing keys. Otherwise the caller
+    is the X-Real-IP nginx sets from the connection (X-Forwarded-For is
+    appended to, not replaced, so clients control its first entry), or the
+    socket peer when proxy headers are not trusted.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in quota_api_keys:
+        # Listed in /admin/admission, so never expose the key itself
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    if settings.trust_proxy_headers and request.headers.get("x-real-ip"):
+        return request.headers["x-real-ip"].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def admit_upload(
+    request: Request, upload: IngestedUpload, model: WhisperModel, track_capacity: bool = True
+) -> Optional[AdmissionTicket]:
+    """Admit an upload by its estimated compute, or discard it and raise 503/429.
+    
+    ``track_capacity=False`` only charges the client's quota, for work that
+    runs elsewhere (celery workers).
+    """
+    try:
+        return admit_audio(
+            request, upload.duration or DEFAULT_DURATION_SECONDS, model, track_capacity
+        )
+    except HTTPException:
+        upload.cleanup()
+        raise
+
+
+def admit_audio(
+    request: Request,
+    audio_seconds: float,
+    model: WhisperModel,
+    track_capacity: bool = True,
+    cost_factor: float = 1.0
+) -> AdmissionTicket:
+    """Admit ``audio_seconds`` of work on ``model``, or raise 503/429.
+    
+    ``cost_factor`` scales the compute of jobs that do more than one pass.
+    """
+    compute_seconds = (
+        estimate_cost(audio_seconds, model.value) * cost_factor
+        * whisper_service.scheduler.seconds_per_cost
+        if track_capacity else 0.0
+    )
+    try:
+        return admission.admit(client_id(request), audio_seconds, compute_seconds)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def require_backend(backend: Optional[BackendName], *features: str):
+    """Reject a request whose backend is not installed or lacks a requested feature.
+    
+    Endpoints without a ``backend`` parameter run on openai-whisper whatever the
+    configured default, so they check ``OPENAI_WHISPER``.
+    """
+    engine = whisper_service.backend(backend)
+    if not engine.available():
+        raise HTTPException(status_code=400, detail=f"Backend {engine.name} is not installed")
+    for feature in features:
+        if feature not in engine.capabilities:
+            raise HTTPException(
+                status_code=400, detail=f"Backend {engine.name} does not support {feature}"
+            )
+
+
+def get_audio_handle(upload_id: str) -> AudioHandle:
+    """Look up a stored upload or raise 404."""
+    handle = whisper_service.audio_handles.get(upload_id)
+    if handle is None:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return handle
+
+
+async def open_audio(file: Optional[UploadFile], upload_id: Optional[str]) -> IngestedUpload:
+    """The request's audio: a new upload decoded in memory, or a stored upload."""
+    if upload_id:
+        handle = get_audio_handle(upload_id)
+        upload = IngestedUpload(None, handle.size, handle.sha256, handle.filename)
+        upload.audio = handle.audio
+        upload.duration = handle.duration
+        return upload
+    if file is None:
+        raise HTTPException(status_code=422, detail="Provide either file or upload_id")
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    return await save_upload(file, in_memory=True)
+
+
+async def decode_upload(file: UploadFile) -> AudioHandle:
+    """Decode an upload once into an AudioHandle, without storing it."""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    upload = await save_upload(file, in_memory=True)
+    try:
+        audio = upload.audio
+        if audio is None:
+            audio = await asyncio.to_thread(load_audio, upload.path)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {str(e)}")
+    finally:
+        upload.cleanup()
+    return AudioHandle(audio, upload.filename, upload.sha256, upload.size)
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -69,10 +412,31 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "service": "whisper-api"
+        "service": "whisper-api",
+        "inference": whisper_service.scheduler.stats()
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 only once every preloaded model is loaded and warm."""
+    expected = preload_model_names()
+    models = {
+        name: whisper_service.model_status.get(name, {"state": "pending"})
+        for name in expected
+    }
+    ready = all(status["state"] == "ready" for status in models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "timestamp": datetime.now().isoformat(),
+            "models": models,
+            "resident_models": list(whisper_service.models)
+        }
+    )
+
+
 @app.get("/models")
 async def list_models():
     """List available Whisper models."""
@@ -85,12 +449,185 @@ async def list_models():
             "quality": "small",
             "best_quality": "large",
             "turbo": "turbo"
+        },
+        "default_backend": whisper_service.default_backend.name,
+        "backends": {
+            name: {
+                "available": backend.available(),
+                "capabilities": sorted(backend.capabilities)
+            }
+            for name, backend in BACKENDS.items()
         }
     }
 
 
+@app.get("/admin/cache")
+async def cache_stats():
+    """Result cache hit/miss counters and sizes."""
+    if whisper_service.result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **whisper_service.result_cache.stats()}
+
+
+@app.delete("/admin/cache")
+async def clear_cache():
+    """Drop every cached transcription and language-detection result."""
+    if whisper_service.result_cache is not None:
+        whisper_service.result_cache.clear()
+    return {"message": "Result cache cleared"}
+
+
+@app.get("/admin/jobs")
+async def list_shared_jobs():
+    """In-flight inference jobs and how many requests are attached to each."""
+    return {
+        **whisper_service.coalescer.stats(),
+        "jobs": whisper_service.coalescer.jobs()
+    }
+
+
+@app.get("/admin/queue")
+async def queue_stats():
+    """Queue depth and per-worker throughput for async transcription."""
+    if settings.task_queue != "celery":
+        return {
+            "backend": "local",
+            "scheduler": whisper_service.scheduler.stats(),
+            "language_batching": whisper_service.language_batcher.stats(),
+            "admission": admission.stats()
+        }
+    try:
+        return {
+            "backend": "celery",
+            "queues": worker.queue_depths(),
+            "workers": worker.get_registry().workers(),
+            "admission": admission.stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Broker unavailable: {str(e)}")
+
+
+@app.get("/admin/models")
+async def model_pool_stats():
+    """Resident models, their memory footprint and recent load/evict events."""
+    return whisper_service.model_pool.stats()
+
+
+@app.delete("/admin/models/{model_name:path}")
+async def evict_model(model_name: str):
+    """Evict a loaded model from this worker's pool.
+    
+    Pool keys of other backends contain ``/``, e.g. ``faster-whisper/tiny``.
+    """
+    try:
+        evicted = whisper_service.model_pool.evict(model_name)
+    except ModelInUseError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not evicted:
+        raise HTTPException(status_code=404, detail="Model not loaded")
+    return {"message": f"Model {model_name} evicted"}
+
+
 @app.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    model: WhisperModel = Form(WhisperModel.TURBO),
+    task: TaskType = Form(TaskType.TRANSCRIBE),
+    language: Optional[str] = Form(None),
+    temperature: Optional[float] = Form(0.0),
+    best_of: Optional[int] = Form(5),
+    beam_size: Optional[int] = Form(5),
+    long_audio: bool = Form(False),
+    vad: bool = Form(False),
+    cascade: bool = Form(False),
+    precision: Optional[ModelPrecision] = Form(None),
+    backend: Optional[BackendName] = Form(None),
+    deadline_seconds: Optional[float] = Form(None, gt=0)
+):
+    """Synchronous audio transcription endpoint.
+    
+    Send a ``file``, or the ``upload_id`` of audio stored with POST /uploads.
+    The job is abandoned at the next 30 s window if the client disconnects or
+    ``deadline_seconds`` passes.
+    """
+    
+    require_backend(
+        backend, *[feature for feature, on in ((LONG_AUDIO, long_audio), (CASCADE, cascade)) if on]
+    )
+    
+    # Decode the upload in memory, rejecting it as soon as it crosses the size limit
+    upload = await open_audio(file, upload_id)
+    ticket = admit_upload(request, upload, model)
+    
+    try:
+        # Process transcription
+        start_time = time.time()
+        
+        result = await run_cancellable(
+            whisper_service.run_transcription(
+                # A stored upload's spectrogram is computed once and reused
+                audio_path=get_audio_handle(upload_id) if upload_id else upload.source,
+                model_name=model,
+                task=task.value,
+                language=language,
+                temperature=temperature,
+                best_of=best_of,
+                beam_size=beam_size,
+                long_audio=long_audio,
+                vad=vad,
+                cascade=cascade,
+                precision=precision,
+                backend=backend,
+                content_hash=upload.sha256,
+                duration=upload.duration
+            ),
+            deadline_at=start_time + deadline_seconds if deadline_seconds else None,
+            should_stop=request.is_disconnected
+        )
+        
+        processing_time = time.time() - start_time
+        
+        response = TranscriptionResponse(
+            text=result["text"],
+            language=result.get("language"),
+            segments=result.get("segments"),
+            processing_time=processing_time,
+            whisper_model=result["whisper_model"],
+            backend=result.get("backend"),
+            vad=result.get("vad"),
+            cascade=result.get("cascade")
+        )
+        
+        return response
+        
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    
+    except JobCancelledError as e:
+        if e.reason == "timed_out":
+            raise HTTPException(status_code=504, detail=str(e))
+        # The client is gone; nobody will read this response
+        raise HTTPException(status_code=499, detail=str(e))
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+    
+    finally:
+        # Cleanup temp file
+        admission.release(ticket)
+        upload.cleanup()
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/transcribe/stream")
+async def transcribe_audio_stream(
+    request: Request,
     file: UploadFile = File(...),
     model: WhisperModel = Form(WhisperModel.TURBO),
     task: TaskType = Form(TaskType.TRANSCRIBE),
@@ -99,39 +636,151 @@ async def transcribe_audio(
     best_of: Optional[int] = Form(5),
     beam_size: Optional[int] = Form(5)
 ):
-    """Synchronous audio transcription endpoint."""
+    """Streaming transcription: one server-sent event per decoded segment.
+    
+    Emits ``segment`` events with text, timestamps and progress, then a
+    ``done`` event carrying the full text, processing_time and whisper_model.
+    """
     
-    # Validate file
+    require_backend(OPENAI_WHISPER, STREAMING)
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    # Check file size
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
+    # The stream can't change its status code once started, so check capacity now
+    try:
+        whisper_service.scheduler.ensure_capacity()
+    except QueueFullError as e:
+        raise queue_full_response(e)
     
-    max_size = parse_size(settings.max_file_size)
-    if file_size > max_size:
-        raise HTTPException(
-            status_code=413, 
-            detail=f"File size exceeds maximum allowed size of {settings.max_file_size}"
-        )
+    upload = await save_upload(file, in_memory=True)
+    ticket = admit_upload(request, upload, model)
     
-    # Save uploaded file
-    file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    temp_file_path = os.path.join(settings.temp_dir, f"{file_id}{file_extension}")
+    async def events():
+        start_time = time.time()
+        texts = []
+        detected_language = language
+        try:
+            async for event in whisper_service.stream_transcription(
+                upload.source,
+                model,
+                task=task.value,
+                language=language,
+                content_hash=upload.sha256,
+                duration=upload.duration,
+                temperature=temperature,
+                best_of=best_of,
+                beam_size=beam_size
+            ):
+                segment = event["segment"]
+                texts.append(segment["text"])
+                detected_language = event["language"]
+                yield sse_event("segment", {
+                    "id": segment["id"],
+                    "start": segment["start"],
+                    "end": segment["end"],
+                    "text": segment["text"],
+                    "language": detected_language,
+                    "progress": event["progress"]
+                })
+            
+            yield sse_event("done", {
+                "text": "".join(texts),
+                "language": detected_language,
+                "segments": len(texts),
+                "processing_time": time.time() - start_time,
+                "whisper_model": model.value
+            })
+        
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Transcription failed: {str(e)}"})
+        
+        finally:
+            admission.release(ticket)
+            upload.cleanup()
     
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # let nginx pass events through unbuffered
+        }
+    )
+
+
+@app.post("/transcribe/batch", response_model=BatchTranscriptionResponse)
+async def transcribe_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    model: WhisperModel = Form(WhisperModel.TURBO),
+    task: TaskType = Form(TaskType.TRANSCRIBE),
+    language: Optional[str] = Form(None),
+    temperature: Optional[float] = Form(0.0),
+    best_of: Optional[int] = Form(5),
+    beam_size: Optional[int] = Form(5)
+):
+    """Transcribe many short clips in one request.
+    
+    Send several ``files`` and/or zip archives of audio files. Clips of up to
+    30 s are padded to 30 s windows and decoded BATCH_SIZE at a time in one
+    encoder and decoder pass; longer files are transcribed one by one. Results
+    come back per file in upload order, with aggregate throughput stats.
+    """
+    require_backend(OPENAI_WHISPER, BATCHED_DECODING)
+    uploads: List[IngestedUpload] = []
+    ticket = None
     try:
-        async with aiofiles.open(temp_file_path, 'wb') as f:
-            await f.write(content)
+        for file in files:
+            if not file.filename:
+                raise HTTPException(status_code=400, detail="No file provided")
+            
+            is_archive = file.filename.lower().endswith(".zip")
+            upload = await save_upload(file, probe=False, in_memory=not is_archive)
+            if not is_archive:
+                uploads.append(upload)
+            else:
+                try:
+                    uploads.extend(await asyncio.to_thread(
+                        extract_archive,
+                        upload.path,
+                        settings.temp_dir,
+                        settings.batch_max_files - len(uploads),
+                        parse_size(settings.max_file_size)
+                    ))
+                except ArchiveError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                except UploadTooLargeError:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Archive contents exceed maximum allowed size of {settings.max_file_size}"
+                    )
+                finally:
+                    upload.cleanup()
+            
+            if len(uploads) > settings.batch_max_files:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {settings.batch_max_files} files per batch"
+                )
         
-        # Process transcription
-        start_time = time.time()
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No audio files provided")
+        
+        on_disk = [upload for upload in uploads if upload.duration is None]
+        durations = await asyncio.gather(*(
+            asyncio.to_thread(probe_duration, upload.path) for upload in on_disk
+        ))
+        for upload, duration in zip(on_disk, durations):
+            upload.duration = duration
+        ticket = admit_audio(
+            request,
+            sum(upload.duration or DEFAULT_DURATION_SECONDS for upload in uploads),
+            model
+        )
         
-        result = whisper_service.transcribe_audio(
-            audio_path=temp_file_path,
-            model_name=model,
+        outcomes, stats = await whisper_service.run_transcription_batch(
+            [upload.source for upload in uploads],
+            model,
             task=task.value,
             language=language,
             temperature=temperature,
@@ -139,29 +788,247 @@ async def transcribe_audio(
             beam_size=beam_size
         )
         
+        results = []
+        for upload, outcome in zip(uploads, outcomes):
+            if isinstance(outcome, Exception):
+                results.append(BatchFileResult(filename=upload.filename, error=str(outcome)))
+                continue
+            results.append(BatchFileResult(
+                filename=upload.filename,
+                result=TranscriptionResponse(
+                    text=outcome["text"],
+                    language=outcome.get("language"),
+                    segments=outcome.get("segments"),
+                    processing_time=outcome["processing_time"],
+                    whisper_model=outcome["whisper_model"]
+                )
+            ))
+        return BatchTranscriptionResponse(results=results, stats=stats)
+    
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    
+    finally:
+        admission.release(ticket)
+        for upload in uploads:
+            upload.cleanup()
+
+
+@app.post("/uploads", response_model=UploadHandleResponse)
+async def create_upload(file: UploadFile = File(...)):
+    """Decode an audio file once and keep it for later requests.
+    
+    Pass the returned ``upload_id`` instead of a file to /transcribe,
+    /detect-language or /transcribe/combined. The decoded audio is stored
+    under TEMP_DIR/uploads for every worker for up to UPLOAD_HANDLE_TTL
+    seconds; each process caches it with its spectrograms in memory
+    (UPLOAD_CACHE_SIZE, LRU).
+    """
+    handle = await decode_upload(file)
+    return whisper_service.audio_handles.put(handle).info()
+
+
+@app.get("/uploads/{upload_id}", response_model=UploadHandleResponse)
+async def get_upload(upload_id: str):
+    """Describe a stored upload."""
+    return get_audio_handle(upload_id).info()
+
+
+@app.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    """Release a stored upload before it expires."""
+    if not whisper_service.audio_handles.delete(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return {"message": f"Upload {upload_id} deleted"}
+
+
+@app.get("/admin/uploads")
+async def upload_cache_stats():
+    """Stored upload count, memory use and hit/miss counters."""
+    return whisper_service.audio_handles.stats()
+
+
+@app.post("/transcribe/combined", response_model=CombinedTranscriptionResponse)
+async def transcribe_combined(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    model: WhisperModel = Form(WhisperModel.TURBO),
+    language: Optional[str] = Form(None),
+    translate: bool = Form(True),
+    temperature: Optional[float] = Form(0.0),
+    best_of: Optional[int] = Form(5),
+    beam_size: Optional[int] = Form(5)
+):
+    """Detect the language, transcribe, and translate to English in one call.
+    
+    Each 30 s window is encoded once for both tasks; the transcription's
+    segments and timestamps are the same as /transcribe returns.
+    """
+    require_backend(OPENAI_WHISPER, SHARED_ENCODER)
+    if upload_id:
+        handle = get_audio_handle(upload_id)
+    elif file is None:
+        raise HTTPException(status_code=422, detail="Provide either file or upload_id")
+    else:
+        handle = await decode_upload(file)
+    ticket = admit_audio(
+        request, handle.duration, model, cost_factor=combined_cost_factor(translate)
+    )
+    
+    try:
+        start_time = time.time()
+        result = await whisper_service.run_transcribe_and_translate(
+            handle,
+            model,
+            translate=translate,
+            language=language,
+            temperature=temperature,
+            best_of=best_of,
+            beam_size=beam_size
+        )
         processing_time = time.time() - start_time
         
-        response = TranscriptionResponse(
-            text=result["text"],
-            language=result.get("language"),
-            segments=result.get("segments"),
+        def as_response(output: Optional[dict]) -> Optional[TranscriptionResponse]:
+            if output is None:
+                return None
+            return TranscriptionResponse(
+                processing_time=processing_time, whisper_model=model.value, **output
+            )
+        
+        return CombinedTranscriptionResponse(
+            language=result["language"],
+            language_probabilities=result["language_probabilities"],
+            transcription=as_response(result["transcription"]),
+            translation=as_response(result["translation"]),
             processing_time=processing_time,
-            whisper_model=result["whisper_model"]
+            whisper_model=model.value
         )
-        
-        return response
-        
+    
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
     
     finally:
-        # Cleanup temp file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        admission.release(ticket)
+
+
+@app.websocket("/ws/transcribe")
+async def live_transcription(
+    websocket: WebSocket,
+    model: WhisperModel = WhisperModel.BASE,
+    language: Optional[str] = None
+):
+    """Live captioning over a WebSocket.
+    
+    The client streams binary frames of 16 kHz mono little-endian int16 PCM and
+    sends {"type": "end"} when done. The server answers with ``partial``
+    hypotheses for the audio buffered so far, ``final`` messages once segments
+    are committed, and a closing ``done`` message with session statistics.
+    """
+    try:
+        require_backend(OPENAI_WHISPER, STREAMING)
+    except HTTPException as e:
+        # 1008: policy violation, the endpoint is off on this backend
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    if len(live_sessions) >= settings.live_max_sessions:
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    
+    await websocket.accept()
+    session = LiveSession(
+        str(uuid.uuid4()),
+        language=language,
+        step_seconds=settings.live_step_seconds,
+        commit_seconds=settings.live_commit_seconds
+    )
+    live_sessions[session.session_id] = session
+    await websocket.send_json({
+        "type": "ready",
+        "session_id": session.session_id,
+        "sample_rate": SAMPLE_RATE,
+        "format": "pcm_s16le"
+    })
+    
+    async def decode(final: bool = False):
+        snapshot = session.take_snapshot()
+        if len(snapshot["audio"]) == 0:
+            return
+        try:
+            # Partial decodes are skipped when the queue is full; the final one must run
+            result = await whisper_service.scheduler.run(
+                whisper_service.transcribe_live,
+                snapshot["audio"],
+                model,
+                session.language,
+                snapshot["prompt"],
+                enforce_limit=not final,
+                cost=estimate_cost(len(snapshot["audio"]) / SAMPLE_RATE, model.value)
+            )
+        except QueueFullError:
+            return
+        except Exception as e:
+            await websocket.send_json({"type": "error", "detail": f"Transcription failed: {str(e)}"})
+            return
+        for message in session.apply_result(snapshot, result, final=final):
+            await websocket.send_json(message)
+    
+    decoding: Optional[asyncio.Task] = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes"):
+                session.append(message["bytes"])
+                # One decode in flight per session keeps latency bounded
+                if session.should_decode() and (decoding is None or decoding.done()):
+                    decoding = asyncio.create_task(decode())
+            
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if control.get("type") == "end":
+                    if decoding is not None:
+                        await decoding
+                    await decode(final=True)
+                    await websocket.send_json({
+                        "type": "done",
+                        "text": session.committed_text,
+                        "stats": session.stats()
+                    })
+                    await websocket.close()
+                    break
+    
+    except WebSocketDisconnect:
+        pass
+    
+    finally:
+        if decoding is not None and not decoding.done():
+            decoding.cancel()
+        live_sessions.pop(session.session_id, None)
+
+
+@app.get("/admin/live")
+async def live_session_stats():
+    """Open live-captioning sessions and their latency figures."""
+    return {
+        "active_sessions": len(live_sessions),
+        "max_sessions": settings.live_max_sessions,
+        "sessions": [session.stats() for session in live_sessions.values()]
+    }
 
 
 @app.post("/transcribe/async", response_model=AsyncTaskResponse)
 async def transcribe_audio_async(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     model: WhisperModel = Form(WhisperModel.TURBO),
@@ -169,44 +1036,101 @@ async def transcribe_audio_async(
     language: Optional[str] = Form(None),
     temperature: Optional[float] = Form(0.0),
     best_of: Optional[int] = Form(5),
-    beam_size: Optional[int] = Form(5)
+    beam_size: Optional[int] = Form(5),
+    long_audio: bool = Form(False),
+    vad: bool = Form(False),
+    cascade: bool = Form(False),
+    precision: Optional[ModelPrecision] = Form(None),
+    backend: Optional[BackendName] = Form(None),
+    deadline_seconds: Optional[float] = Form(None, gt=0)
 ):
-    """Asynchronous audio transcription endpoint."""
+    """Asynchronous audio transcription endpoint.
+    
+    With ``deadline_seconds`` the task ends as ``timed_out`` if it has not
+    finished that long after submission.
+    """
     
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
+    require_backend(
+        backend, *[feature for feature, on in ((LONG_AUDIO, long_audio), (CASCADE, cascade)) if on]
+    )
+    
+    # Refuse new work up front rather than queueing it behind a full backlog;
+    # with the celery queue the broker holds the backlog instead
+    if settings.task_queue != "celery":
+        try:
+            whisper_service.scheduler.ensure_capacity()
+        except QueueFullError as e:
+            raise queue_full_response(e)
     
     # Generate task ID
     task_id = str(uuid.uuid4())
     
     # Save file for background processing
-    file_extension = os.path.splitext(file.filename)[1]
-    temp_file_path = os.path.join(settings.temp_dir, f"{task_id}{file_extension}")
-    
-    content = await file.read()
-    async with aiofiles.open(temp_file_path, 'wb') as f:
-        await f.write(content)
-    
-    # Create task record
-    tasks_db[task_id] = TaskResult(
-        task_id=task_id,
-        status=TaskStatus.PENDING,
-        created_at=datetime.now().isoformat()
+    upload = await save_upload(file, file_id=task_id)
+    ticket = admit_upload(
+        request, upload, model, track_capacity=settings.task_queue != "celery"
     )
     
-    # Add background task
-    background_tasks.add_task(
-        process_transcription_task,
-        task_id,
-        temp_file_path,
+    options = job_options(
         model,
-        task,
+        task.value,
         language,
         temperature,
         best_of,
-        beam_size
+        beam_size,
+        content_hash=upload.sha256,
+        long_audio=long_audio,
+        vad=vad,
+        cascade=cascade,
+        precision=precision,
+        backend=backend,
+        deadline_seconds=deadline_seconds,
+        duration=upload.duration
     )
     
+    # Create task record; identical uploads share one job keyed on content and options
+    task_store.create(TaskResult(
+        task_id=task_id,
+        status=TaskStatus.PENDING,
+        created_at=datetime.now().isoformat(),
+        shared_job_id=whisper_service.transcription_cache_key(
+            upload.sha256,
+            model,
+            task.value,
+            language,
+            temperature=temperature,
+            best_of=best_of,
+            beam_size=beam_size,
+            long_audio=long_audio,
+            vad=vad,
+            cascade=cascade,
+            precision=precision,
+            backend=backend
+        ),
+        audio_duration=upload.duration
+    ))
+    
+    if settings.task_queue == "celery":
+        # Inference workers pick the job up from the broker; the ticket only
+        # charged the client's quota, which stays charged
+        try:
+            queue = worker.enqueue_transcription(task_id, upload.path, options)
+        except Exception as e:
+            # No worker will ever see the task, so finish it here
+            print(f"Failed to enqueue task {task_id}: {str(e)}")
+            fail_task(task_id, f"Could not enqueue task: {str(e)}")
+            upload.cleanup()
+            raise HTTPException(status_code=503, detail="Task queue unavailable")
+        finally:
+            admission.release(ticket)
+        print(f"Task {task_id} enqueued on {queue}")
+    else:
+        background_tasks.add_task(
+            process_transcription_task, task_id, upload.path, options, ticket
+        )
+    
     return AsyncTaskResponse(
         task_id=task_id,
         status=TaskStatus.PENDING,
@@ -214,115 +1138,138 @@ async def transcribe_audio_async(
     )
 
 
+@app.get("/tasks", response_model=TaskListResponse)
+async def list_tasks(
+    status: Optional[TaskStatus] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """List async tasks, newest first, without their results."""
+    tasks = task_store.list_tasks(status=status, offset=offset, limit=limit)
+    return TaskListResponse(
+        tasks=[task.model_copy(update={"result": None}) for task in tasks],
+        total=task_store.count(status),
+        offset=offset,
+        limit=limit
+    )
+
+
 @app.get("/tasks/{task_id}", response_model=TaskResult)
 async def get_task_status(task_id: str):
-    """Get status and result of an async transcription task."""
-    if task_id not in tasks_db:
+    """Get status and result of an async transcription task.
+    
+    Tasks waiting or running in this process also report their queue
+    position and estimated time to completion.
+    """
+    task_result = task_store.get(task_id)
+    if task_result is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    if task_result.status in ACTIVE_STATUSES and task_result.shared_job_id:
+        position = whisper_service.scheduler.position(task_result.shared_job_id)
+        if position is not None:
+            task_result = task_result.model_copy(update=position)
+    
+    return task_result
+
+
+@app.delete("/tasks/{task_id}")
+async def delete_task(task_id: str):
+    """Cancel a pending or running task, or delete a finished one and its result.
+    
+    A cancelled task stays visible as ``cancelled``; the job stops at its next
+    30 s window.
+    """
+    task_result = task_store.get(task_id)
+    if task_result is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return tasks_db[task_id]
+    if task_result.status in ACTIVE_STATUSES:
+        try:
+            task_store.update(
+                task_id,
+                expected_status=ACTIVE_STATUSES,
+                status=TaskStatus.CANCELLED,
+                error="Cancelled by client",
+                completed_at=datetime.now().isoformat()
+            )
+            return {"message": f"Task {task_id} cancelled"}
+        except TaskStateConflictError:
+            # Finished in the meantime; delete it like any finished task
+            pass
+    
+    task_store.delete(task_id)
+    return {"message": f"Task {task_id} deleted"}
 
 
 @app.post("/detect-language")
 async def detect_language(
-    file: UploadFile = File(...),
-    model: WhisperModel = Form(WhisperModel.BASE)
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    model: WhisperModel = Form(WhisperModel.BASE),
+    backend: Optional[BackendName] = Form(None)
 ):
-    """Detect the language of an audio file."""
+    """Detect the language of an audio file, or of a stored upload by ``upload_id``."""
     
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
+    require_backend(backend)
     
-    # Save temporary file
-    file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    temp_file_path = os.path.join(settings.temp_dir, f"{file_id}{file_extension}")
+    # Decode in memory when possible
+    upload = await open_audio(file, upload_id)
+    # A stored upload's spectrogram is computed once and reused
+    source = get_audio_handle(upload_id) if upload_id else upload.source
     
     try:
-        content = await file.read()
-        async with aiofiles.open(temp_file_path, 'wb') as f:
-            await f.write(content)
-        
         # Detect language
-        result = whisper_service.detect_language(temp_file_path, model)
+        result = await whisper_service.run_language_detection(
+            source, model, content_hash=upload.sha256, backend=backend
+        )
         
         return result
         
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Language detection failed: {str(e)}")
     
     finally:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        upload.cleanup()
 
 
 async def process_transcription_task(
     task_id: str,
     file_path: str,
-    model: WhisperModel,
-    task: TaskType,
-    language: Optional[str],
-    temperature: Optional[float],
-    best_of: Optional[int],
-    beam_size: Optional[int]
+    options: dict,
+    ticket: Optional[AdmissionTicket] = None
 ):
-    """Background task for processing transcription."""
+    """Background task for processing transcription in the API process."""
     try:
-        # Update status to processing
-        tasks_db[task_id].status = TaskStatus.PROCESSING
+        # Claim the task; another worker may already have picked it up
+        claim_task(task_id)
         
-        start_time = time.time()
-        
-        # Process transcription
-        result = whisper_service.transcribe_audio(
-            audio_path=file_path,
-            model_name=model,
-            task=task.value,
-            language=language,
-            temperature=temperature,
-            best_of=best_of,
-            beam_size=beam_size
-        )
-        
-        processing_time = time.time() - start_time
-        
-        # Create response
-        response = TranscriptionResponse(
-            text=result["text"],
-            language=result.get("language"),
-            segments=result.get("segments"),
-            processing_time=processing_time,
-            whisper_model=result["whisper_model"]
-        )
+        response = await run_task_job(task_id, file_path, options)
         
         # Update task with result
-        tasks_db[task_id].status = TaskStatus.COMPLETED
-        tasks_db[task_id].result = response
-        tasks_db[task_id].completed_at = datetime.now().isoformat()
+        complete_task(task_id, response)
         
+    except TaskStateConflictError as e:
+        print(f"Skipping task {task_id}: {e}")
+    
+    except JobCancelledError as e:
+        stop_task(task_id, e)
+    
+    except asyncio.CancelledError:
+        # The shared job was cancelled underneath this task
+        stop_task(task_id, JobCancelledError("cancelled"))
+    
     except Exception as e:
         # Update task with error
-        tasks_db[task_id].status = TaskStatus.FAILED
-        tasks_db[task_id].error = str(e)
-        tasks_db[task_id].completed_at = datetime.now().isoformat()
+        fail_task(task_id, str(e))
     
     finally:
-        # Cleanup temp file
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-
-def parse_size(size_str: str) -> int:
-    """Parse size string like '100MB' to bytes."""
-    size_str = size_str.upper()
-    if size_str.endswith('KB'):
-        return int(size_str[:-2]) * 1024
-    elif size_str.endswith('MB'):
-        return int(size_str[:-2]) * 1024 * 1024
-    elif size_str.endswith('GB'):
-        return int(size_str[:-2]) * 1024 * 1024 * 1024
-    else:
-        return int(size_str)
+        # Cleanup temp file and return the reserved compute
+        remove_upload(file_path)
+        admission.release(ticket)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+import gc
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import torch
+
+from app.weights import process_memory
+
+# Approximate parameter counts, used to make room before a model is loaded
+MODEL_PARAMETERS = {
+    "tiny": 39_000_000,
+    "tiny.en": 39_000_000,
+    "base": 74_000_000,
+    "base.en": 74_000_000,
+    "small": 244_000_000,
+    "small.en": 244_000_000,
+    "medium": 769_000_000,
+    "medium.en": 769_000_000,
+    "large": 1_550_000_000,
+    "turbo": 809_000_000,
+}
+
+
+def model_parameters(model_key: str) -> int:
+    """Approximate parameter count for a pool key such as "small:int8" or "faster-whisper/small"."""
+    name = model_key.rpartition("/")[2].partition(":")[0]
+    return MODEL_PARAMETERS.get(name, 0)
+
+
+class ModelInUseError(Exception):
+    """Raised when trying to evict a model that is pinned by running inference."""
+
+
+def model_memory_bytes(model: torch.nn.Module) -> int:
+    """Bytes held by a model's parameters and buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    # Dynamically quantized layers keep their weights in packed params instead
+    for module in model.modules():
+        packed = getattr(module, "_packed_params", None)
+        if hasattr(packed, "_weight_bias"):
+            tensors.extend(t for t in packed._weight_bias() if t is not None)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def default_model_size(key: str, model: Any) -> int:
+    """Bytes held by a torch model; other models, or None, are estimated at fp32 from their key."""
+    if isinstance(model, torch.nn.Module):
+        return model_memory_bytes(model)
+    return model_parameters(key) * 4
+
+
+class _Entry:
+    __slots__ = ("model", "size_bytes", "pins", "loaded_at", "last_used", "load_seconds")
+
+    def __init__(self, model: Any, size_bytes: int, load_seconds: float):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.pins = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.load_seconds = load_seconds
+
+
+class _Loading:
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class ModelPool:
+    """Keeps loaded models within a memory budget.
+
+    Models are evicted least-recently-used first once the resident size exceeds
+    ``memory_budget`` bytes; models pinned by ``acquire`` are never evicted.
+    Concurrent requests for a model that is not yet loaded wait for a single
+    load instead of each loading their own copy. ``sizer(key, model)`` gives
+    the bytes a loaded model counts against the budget; ``sizer(key, None)``
+    estimates a model before it is loaded.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        memory_budget: int,
+        max_events: int = 100,
+        sizer: Callable[[str, Any], int] = default_model_size
+    ):
+        self.loader = loader
+        self.sizer = sizer
+        self.memory_budget = memory_budget
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading: Dict[str, _Loading] = {}
+        self._lock = threading.Lock()
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+
+    @contextmanager
+    def acquire(self, key: str) -> Iterator[Any]:
+        """Yield the model for ``key``, pinned against eviction while in use."""
+        model = self._checkout(key)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.pins -= 1
+                self._evict_over_budget()
+
+    def get(self, key: str) -> Any:
+        """Load (if needed) and return the model without keeping it pinned."""
+        with self.acquire(key) as model:
+            return model
+
+    def _checkout(self, key: str) -> Any:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.pins += 1
+                    entry.last_used = time.time()
+                    self._entries.move_to_end(key)
+                    return entry.model
+
+                loading = self._loading.get(key)
+                leader = loading is None
+                if leader:
+                    loading = _Loading()
+                    self._loading[key] = loading
+
+            if not leader:
+                # Another thread is loading this model; share its result
+                loading.done.wait()
+                if loading.error is not None:
+                    raise loading.error
+                continue
+
+            return self._load(key, loading)
+
+    def _load(self, key: str, loading: _Loading) -> Any:
+        start_time = time.time()
+        rss_before = process_memory().get("rss", 0)
+        try:
+            with self._lock:
+                self._evict_over_budget(incoming=self.sizer(key, None))
+            model = self.loader(key)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.error = e
+            loading.done.set()
+            raise
+
+        load_seconds = time.time() - start_time
+        rss_after = process_memory().get("rss", 0)
+        size_bytes = self.sizer(key, model)
+        with self._lock:
+            entry = _Entry(model, size_bytes, load_seconds)
+            entry.pins = 1
+            self._entries[key] = entry
+            del self._loading[key]
+            # Mapped weights are only counted in RSS once pages are touched
+            self._record(
+                "load", key, size_bytes,
+                seconds=round(load_seconds, 3),
+                rss_delta_bytes=rss_after - rss_before
+            )
+            self._evict_over_budget()
+        loading.done.set()
+        return model
+
+    def _evict_over_budget(self, incoming: int = 0):
+        """Evict unpinned models, oldest use first, until the budget is met (lock held)."""
+        evicted = False
+        for key in list(self._entries):
+            if self._resident_bytes() + incoming <= self.memory_budget:
+                break
+            entry = self._entries[key]
+            if entry.pins > 0:
+                continue
+            del self._entries[key]
+            self._record("evict", key, entry.size_bytes)
+            evicted = True
+
+        if self._resident_bytes() + incoming > self.memory_budget:
+            print(
+                f"Model pool over budget: {self._resident_bytes() + incoming} bytes "
+                f"needed, budget is {self.memory_budget} bytes (all resident models in use)"
+            )
+        if evicted:
+            self._free_memory()
+
+    def evict(self, key: str) -> bool:
+        """Evict a specific model; returns False if it is not loaded."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry.pins > 0:
+                raise ModelInUseError(f"Model {key} is in use")
+            del self._entries[key]
+            self._record("evict", key, entry.size_bytes)
+        self._free_memory()
+        return True
+
+    @staticmethod
+    def _free_memory():
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def _record(self, event: str, key: str, size_bytes: int, **details):
+        self._events.append({
+            "event": event,
+            "model": key,
+            "size_bytes": size_bytes,
+            "timestamp": time.time(),
+            **details
+        })
+        print(f"Model pool {event}: {key} ({size_bytes / (1024 * 1024):.1f}MB)")
+
+    def loaded(self) -> Dict[str, Any]:
+        """Snapshot of resident models keyed by name."""
+        with self._lock:
+            return {key: entry.model for key, entry in self._entries.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Resident size, per-model details, recent load/evict events and process memory."""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "resident_bytes": self._resident_bytes(),
+                "loading": list(self._loading),
+                "models": [
+                    {
+                        "name": key,
+                        "size_bytes": entry.size_bytes,
+                        "pins": entry.pins,
+                        "loaded_at": entry.loaded_at,
+                        "last_used": entry.last_used,
+                        "load_seconds": round(entry.load_seconds, 3),
+                    }
+                    for key, entry in self._entries.items()
+                ],
+                "events": list(self._events),
+                "process_memory": process_memory(),
+            }
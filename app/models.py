@@ -16,6 +16,16 @@ class WhisperModel(str, Enum):
     MEDIUM_EN = "medium.en"
 
 
+class ModelPrecision(str, Enum):
+    FP32 = "fp32"
+    INT8 = "int8"  # dynamic int8 Linear layers, CPU only
+
+
+class BackendName(str, Enum):
+    PYTORCH = "pytorch"  # openai-whisper
+    FASTER_WHISPER = "faster-whisper"  # CTranslate2, needs the faster-whisper package
+
+
 class TaskType(str, Enum):
     TRANSCRIBE = "transcribe"
     TRANSLATE = "translate"
@@ -36,15 +46,52 @@ class TranscriptionResponse(BaseModel):
     segments: Optional[List[dict]] = None
     processing_time: float
     whisper_model: str
+    backend: Optional[str] = None  # inference backend that produced the result
+    vad: Optional[dict] = None  # speech/skipped seconds when VAD was applied
+    cascade: Optional[dict] = None  # models used and refined seconds when cascade was requested
+    
+    model_config = {"protected_namespaces": ()}
+
+
+class UploadHandleResponse(BaseModel):
+    upload_id: str  # pass as upload_id to /transcribe, /detect-language or /transcribe/combined
+    filename: str
+    size: int
+    sha256: str
+    duration: float
+    created_at: float
+    cached_mels: List[int]  # mel sizes already computed for this upload
+
+
+class CombinedTranscriptionResponse(BaseModel):
+    language: str  # detected language
+    language_probabilities: Optional[dict] = None
+    transcription: TranscriptionResponse
+    translation: Optional[TranscriptionResponse] = None  # English; None for English-only models
+    processing_time: float
+    whisper_model: str
     
     model_config = {"protected_namespaces": ()}
 
 
+class BatchFileResult(BaseModel):
+    filename: str
+    result: Optional[TranscriptionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchTranscriptionResponse(BaseModel):
+    results: List[BatchFileResult]  # in upload (and archive member) order
+    stats: dict  # files, batches, audio_seconds, processing_time, realtime_factor, ...
+
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
 
 
 class AsyncTaskResponse(BaseModel):
@@ -60,3 +107,14 @@ class TaskResult(BaseModel):
     error: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
+    shared_job_id: Optional[str] = None  # in-flight job this task is attached to
+    audio_duration: Optional[float] = None  # seconds, probed at upload
+    queue_position: Optional[int] = None  # 0 while running; only for jobs in this process
+    eta_seconds: Optional[float] = None  # estimated seconds until the result is ready
+
+
+class TaskListResponse(BaseModel):
+    tasks: List[TaskResult]  # results are omitted; fetch /tasks/{task_id} for them
+    total: int
+    offset: int
+    limit: int
@@ -0,0 +1,70 @@
+import os
+
+import torch
+import whisper
+from whisper.model import Linear as WhisperLinear
+from whisper.model import ModelDimensions
+
+from app.weights import empty_model, load_weights, weights_checkpoint
+
+# Pool keys of dynamically quantized models end with this, e.g. "small:int8"
+INT8_SUFFIX = ":int8"
+
+
+def quantize_dynamic_int8(model: whisper.Whisper) -> whisper.Whisper:
+    """Quantize the Linear layers of a CPU model to int8 with dynamic activation scales.
+
+    Attention projections and MLPs carry almost all of the weights and FLOPs;
+    convolutions, layer norms and the tied token embedding stay in fp32.
+    """
+    for module in model.modules():
+        # whisper's Linear only adds a dtype cast, which torch's converter does not recognise
+        if type(module) is WhisperLinear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def quantized_path(download_root: str, name: str) -> str:
+    """Cached state dict of the quantized model."""
+    return os.path.join(download_root, "quantized", f"{name}-int8.pt")
+
+
+def load_quantized(name: str, download_root: str, mmap: bool = True) -> whisper.Whisper:
+    """Load the int8 variant of ``name``, quantizing and caching it on first use."""
+    path = quantized_path(download_root, name)
+    if os.path.exists(path):
+        try:
+            # Only tensors are unpickled; the quantized layers are rebuilt from the dimensions
+            checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+            dims = ModelDimensions(**checkpoint["dims"])
+            model = quantize_dynamic_int8(empty_model(dims, device="cpu"))
+            model.load_state_dict(checkpoint["model_state_dict"])
+            model.register_buffer(
+                "alignment_heads", checkpoint["alignment_heads"].to_sparse(), persistent=False
+            )
+            return model
+        except Exception as e:
+            print(f"Ignoring unreadable quantized model {path}: {str(e)}")
+
+    model = quantize_dynamic_int8(load_weights(name, "cpu", download_root, mmap=mmap))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so concurrent loaders never read a partial file
+    partial = f"{path}.{os.getpid()}.tmp"
+    torch.save(weights_checkpoint(model), partial)
+    os.replace(partial, path)
+    print(f"Cached quantized model: {path}")
+    return model
+
+
+def load_model_variant(
+    model_key: str, device: str, download_root: str, mmap: bool = True
+) -> whisper.Whisper:
+    """Load a model by pool key: a plain model name, or one ending in INT8_SUFFIX (CPU only).
+
+    With ``mmap``, weights pre-converted by download_models.py are mapped instead of read.
+    """
+    if model_key.endswith(INT8_SUFFIX):
+        return load_quantized(model_key[:-len(INT8_SUFFIX)], download_root, mmap=mmap)
+    return load_weights(model_key, device, download_root, mmap=mmap)
@@ -0,0 +1,265 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.cancellation import CancelToken, cancel_scope
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot admit another job."""
+
+    def __init__(self, queue_depth: int, retry_after: int):
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        super().__init__(
+            f"Inference queue is full ({queue_depth} jobs waiting), "
+            f"retry after {retry_after}s"
+        )
+
+
+class JobPriority(IntEnum):
+    """Scheduling classes; lower values run first."""
+
+    INTERACTIVE = 0  # sync requests a client is waiting on
+    BATCH = 1  # queued async work
+
+
+class _Job:
+    __slots__ = (
+        "fn", "args", "kwargs", "future", "loop", "token", "submitted_at",
+        "priority", "cost", "job_id", "sort_key", "started_at"
+    )
+
+    def __init__(self, fn, args, kwargs, future, loop, priority, cost, job_id, sort_key):
+        # cost is None for jobs submitted without an estimate
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.loop = loop
+        self.token = CancelToken()
+        self.submitted_at = time.time()
+        self.priority = priority
+        self.cost = cost
+        self.job_id = job_id
+        self.sort_key = sort_key
+        self.started_at: Optional[float] = None
+        # Cancelling the awaiting future asks the running job to stop
+        future.add_done_callback(
+            lambda f: self.token.cancel() if f.cancelled() else None
+        )
+
+
+class InferenceScheduler:
+    """Runs blocking inference on a fixed pool of worker threads.
+
+    Waiting jobs are ordered by priority class, then by estimated cost
+    (shortest job first); jobs without an estimate are queued as an average
+    job and do not train the learned seconds per unit of cost. Each second a
+    job waits lowers its effective cost by ``aging_rate`` so large jobs are not
+    starved, and a batch job waiting ``batch_offset / aging_rate`` seconds
+    catches up with new interactive work. Every waiting job ages at the same
+    rate, so the order is fixed at submission and a heap keyed on
+    ``class offset + cost + aging_rate * submitted_at`` gives it directly.
+
+    Once ``max_queue_size`` jobs are waiting, new submissions fail fast with
+    ``QueueFullError`` so the API can shed load instead of stalling the event
+    loop behind a saturated CPU. Cancelling the awaiting coroutine drops a
+    queued job and cancels a running job's token; see app.cancellation.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue_size: int = 8,
+        aging_rate: float = 1.0,
+        batch_offset: float = 300.0
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self.aging_rate = aging_rate
+        self.batch_offset = batch_offset
+        self._queue: List[Tuple[float, int, _Job]] = []
+        self._running_jobs: List[_Job] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._completed = 0
+        self._rejected = 0
+        self._avg_job_seconds = 10.0
+        self._seconds_per_cost = 1.0
+        self._shutdown = False
+
+    def _ensure_threads(self):
+        """Start worker threads lazily so importing the service stays cheap."""
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"whisper-inference-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up (caller holds the lock)."""
+        backlog = len(self._queue) + len(self._running_jobs)
+        return max(1, math.ceil(backlog * self._avg_job_seconds / self.max_workers))
+
+    def ensure_capacity(self):
+        """Raise QueueFullError if a new job would not be admitted right now."""
+        with self._cond:
+            if len(self._queue) >= self.max_queue_size:
+                self._rejected += 1
+                raise QueueFullError(len(self._queue), self._retry_after())
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        enforce_limit: bool = True,
+        priority: JobPriority = JobPriority.INTERACTIVE,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """Run ``fn`` on an inference worker and await its result.
+
+        ``cost`` is the job's estimated cost (see app.cost); leave it None only
+        for work not proportional to audio, such as model preloading.
+        ``job_id`` lets ``position()`` find the job. ``enforce_limit=False`` admits the job even when
+        the queue is full; it is meant for work that was already accepted
+        (e.g. queued background tasks).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Inference scheduler is shut down")
+            if enforce_limit and len(self._queue) >= self.max_queue_size:
+                self._rejected += 1
+                raise QueueFullError(len(self._queue), self._retry_after())
+            offset = self.batch_offset if priority == JobPriority.BATCH else 0.0
+            sort_cost = cost if cost is not None else self._avg_job_seconds / self._seconds_per_cost
+            sort_key = offset + sort_cost + self.aging_rate * time.time()
+            job = _Job(fn, args, kwargs, future, loop, priority, cost, job_id, sort_key)
+            heapq.heappush(self._queue, (sort_key, next(self._seq), job))
+            self._ensure_threads()
+            self._cond.notify()
+        return await future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown and not self._queue:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                if job.future.cancelled():
+                    continue
+                job.started_at = time.time()
+                self._running_jobs.append(job)
+
+            try:
+                with cancel_scope(job.token):
+                    result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                _deliver(job, _set_exception, e)
+            else:
+                _deliver(job, _set_result, result)
+            finally:
+                elapsed = time.time() - job.started_at
+                with self._cond:
+                    self._running_jobs.remove(job)
+                    self._completed += 1
+                    # Exponential moving averages feed Retry-After and ETA estimates
+                    self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+                    if job.cost is not None and job.cost > 0 and not job.token.cancelled:
+                        self._seconds_per_cost = (
+                            0.8 * self._seconds_per_cost + 0.2 * elapsed / job.cost
+                        )
+
+    @property
+    def seconds_per_cost(self) -> float:
+        """Learned wall-clock seconds per unit of estimated cost."""
+        with self._cond:
+            return self._seconds_per_cost
+
+    def position(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position (0 = running) and estimated seconds until ``job_id`` finishes.
+
+        Returns None if no waiting or running job has that id.
+        """
+        now = time.time()
+        with self._cond:
+            # Work still to do on running jobs frees the workers over time
+            busy = [
+                max(0.0, self._job_seconds(job) - (now - job.started_at))
+                for job in self._running_jobs
+            ]
+            for job, remaining in zip(self._running_jobs, busy):
+                if job.job_id == job_id:
+                    return {"queue_position": 0, "eta_seconds": round(remaining, 1)}
+
+            ahead = sorted(entry for entry in self._queue if not entry[2].future.cancelled())
+            workers = busy + [0.0] * (self.max_workers - len(busy))
+            heapq.heapify(workers)
+            for position, (_, _, job) in enumerate(ahead, start=1):
+                # Each queued job starts on whichever worker frees up first
+                start = heapq.heappop(workers)
+                finish = start + self._job_seconds(job)
+                if job.job_id == job_id:
+                    return {"queue_position": position, "eta_seconds": round(finish, 1)}
+                heapq.heappush(workers, finish)
+        return None
+
+    def _job_seconds(self, job: _Job) -> float:
+        """Expected run time of ``job`` (caller holds the lock)."""
+        if job.cost is None:
+            return self._avg_job_seconds
+        return job.cost * self._seconds_per_cost
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and worker utilisation."""
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "running": len(self._running_jobs),
+                "queued": len(self._queue),
+                "queued_cost": round(sum(entry[2].cost or 0.0 for entry in self._queue), 1),
+                "max_queue_size": self.max_queue_size,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_job_seconds": round(self._avg_job_seconds, 3),
+                "seconds_per_cost": round(self._seconds_per_cost, 4),
+            }
+
+    def shutdown(self):
+        """Stop accepting jobs and let workers exit once the queue drains."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+
+def _deliver(job: _Job, setter: Callable, value: Any):
+    try:
+        job.loop.call_soon_threadsafe(setter, job.future, value)
+    except RuntimeError:
+        # The event loop that submitted the job has been closed
+        pass
+
+
+def _set_result(future: asyncio.Future, result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException):
+    if not future.done():
+        future.set_exception(exc)
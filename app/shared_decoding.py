@@ -0,0 +1,204 @@
+"""Decode several tasks from one encoder pass per 30 s window.
+
+The windows advance as openai-whisper's transcribe advances them for the
+first task, so its segments and timestamps match a regular transcription.
+Every other task is decoded from the same audio features instead of encoding
+the audio again.
+"""
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, SAMPLE_RATE
+from whisper.decoding import DecodingOptions, DecodingResult
+from whisper.tokenizer import Tokenizer, get_tokenizer
+
+
+def decode_with_fallback(
+    model: whisper.Whisper,
+    features: torch.Tensor,
+    temperatures: Sequence[float],
+    compression_ratio_threshold: float,
+    logprob_threshold: float,
+    no_speech_threshold: float,
+    options: Dict[str, Any]
+) -> DecodingResult:
+    """Decode one window, retrying at higher temperatures as whisper's transcribe does."""
+    result = None
+    for temperature in temperatures:
+        kwargs = dict(options)
+        if temperature > 0:
+            kwargs.pop("beam_size", None)
+            kwargs.pop("patience", None)
+        else:
+            kwargs.pop("best_of", None)
+        # Encoded features skip the encoder inside decode
+        result = model.decode(features, DecodingOptions(**kwargs, temperature=temperature))
+
+        needs_fallback = (
+            compression_ratio_threshold is not None
+            and result.compression_ratio > compression_ratio_threshold
+        ) or (
+            logprob_threshold is not None and result.avg_logprob < logprob_threshold
+        )
+        if (
+            no_speech_threshold is not None
+            and result.no_speech_prob > no_speech_threshold
+            and logprob_threshold is not None
+            and result.avg_logprob < logprob_threshold
+        ):
+            needs_fallback = False  # silence
+        if not needs_fallback:
+            break
+    return result
+
+
+def split_segments(
+    result: DecodingResult,
+    tokenizer: Tokenizer,
+    seek: int,
+    segment_size: int,
+    input_stride: int
+) -> Tuple[List[dict], int]:
+    """Segments of one window's tokens, and the mel frames to advance past it.
+
+    As whisper's transcribe: consecutive timestamp tokens end a segment, and
+    text after the last complete segment is left for the next window.
+    """
+    tokens = torch.tensor(result.tokens)
+    time_offset = seek * HOP_LENGTH / SAMPLE_RATE
+    time_precision = input_stride * HOP_LENGTH / SAMPLE_RATE
+
+    def new_segment(start: float, end: float, tokens: torch.Tensor) -> dict:
+        tokens = tokens.tolist()
+        return {
+            "seek": seek,
+            "start": start,
+            "end": end,
+            "text": tokenizer.decode([token for token in tokens if token < tokenizer.eot]),
+            "tokens": tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob
+        }
+
+    timestamp_tokens = tokens.ge(tokenizer.timestamp_begin)
+    single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+    consecutive = (torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0] + 1).tolist()
+
+    if not consecutive:
+        duration = segment_size * HOP_LENGTH / SAMPLE_RATE
+        timestamps = tokens[timestamp_tokens.nonzero().flatten()]
+        if len(timestamps) > 0 and timestamps[-1].item() != tokenizer.timestamp_begin:
+            duration = (timestamps[-1].item() - tokenizer.timestamp_begin) * time_precision
+        return [new_segment(time_offset, time_offset + duration, tokens)], segment_size
+
+    if single_timestamp_ending:
+        consecutive.append(len(tokens))
+    segments = []
+    last_slice = 0
+    for current_slice in consecutive:
+        sliced = tokens[last_slice:current_slice]
+        segments.append(new_segment(
+            time_offset + (sliced[0].item() - tokenizer.timestamp_begin) * time_precision,
+            time_offset + (sliced[-1].item() - tokenizer.timestamp_begin) * time_precision,
+            sliced
+        ))
+        last_slice = current_slice
+    if single_timestamp_ending:
+        # No speech after the last timestamp
+        return segments, segment_size
+    return segments, (tokens[last_slice - 1].item() - tokenizer.timestamp_begin) * input_stride
+
+
+def decode_tasks(
+    model: whisper.Whisper,
+    mel: torch.Tensor,
+    language: str,
+    tasks: Sequence[str] = ("transcribe", "translate"),
+    temperature: Union[float, Sequence[float]] = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    compression_ratio_threshold: float = 2.4,
+    logprob_threshold: float = -1.0,
+    no_speech_threshold: float = 0.6,
+    condition_on_previous_text: bool = True,
+    **decode_options
+) -> Dict[str, dict]:
+    """``text``, ``language`` and ``segments`` of each task, over one encoder pass per window.
+
+    ``mel`` is the log-mel of the whole recording with 30 s of trailing
+    padding, as ``AudioHandle.mel`` keeps it. Windows where the first task
+    hears no speech are skipped for every task. Other tasks keep the segments
+    that start before the first task's window ends; the rest of their window
+    is decoded again from there.
+    """
+    temperatures = [temperature] if isinstance(temperature, (int, float)) else list(temperature)
+    if model.device == torch.device("cpu"):
+        decode_options["fp16"] = False
+    dtype = torch.float16 if decode_options.get("fp16", True) else torch.float32
+    input_stride = N_FRAMES // model.dims.n_audio_ctx
+    content_frames = mel.shape[-1] - N_FRAMES
+
+    tokenizers = {
+        task: get_tokenizer(
+            model.is_multilingual, num_languages=model.num_languages, language=language, task=task
+        )
+        for task in tasks
+    }
+    history: Dict[str, List[int]] = {task: [] for task in tasks}
+    prompt_start = {task: 0 for task in tasks}
+    segments: Dict[str, List[dict]] = {task: [] for task in tasks}
+
+    seek = 0
+    while seek < content_frames:
+        segment_size = min(N_FRAMES, content_frames - seek)
+        window = whisper.pad_or_trim(mel[:, seek:seek + segment_size], N_FRAMES)
+        features = model.embed_audio(window.to(model.device).to(dtype).unsqueeze(0))[0]
+
+        advance = segment_size
+        for index, task in enumerate(tasks):
+            result = decode_with_fallback(
+                model, features, temperatures,
+                compression_ratio_threshold, logprob_threshold, no_speech_threshold,
+                {
+                    **decode_options,
+                    "task": task,
+                    "language": language,
+                    "prompt": history[task][prompt_start[task]:]
+                }
+            )
+            if index == 0 and (
+                no_speech_threshold is not None
+                and result.no_speech_prob > no_speech_threshold
+                and not (logprob_threshold is not None and result.avg_logprob > logprob_threshold)
+            ):
+                break
+            window_segments, task_advance = split_segments(
+                result, tokenizers[task], seek, segment_size, input_stride
+            )
+            if index == 0:
+                advance = task_advance
+            else:
+                window_end = (seek + advance) * HOP_LENGTH / SAMPLE_RATE
+                window_segments = [s for s in window_segments if s["start"] < window_end]
+
+            for segment in window_segments:
+                # Instantaneous or empty segments are cleared, as in whisper's transcribe
+                if segment["start"] == segment["end"] or not segment["text"].strip():
+                    segment["text"] = ""
+                    segment["tokens"] = []
+                segment = {"id": len(segments[task]), **segment}
+                segments[task].append(segment)
+                history[task].extend(segment["tokens"])
+            if not condition_on_previous_text or result.temperature > 0.5:
+                prompt_start[task] = len(history[task])
+        seek += advance
+
+    return {
+        task: {
+            "text": tokenizers[task].decode(history[task]),
+            "language": language,
+            "segments": segments[task]
+        }
+        for task in tasks
+    }
@@ -0,0 +1,517 @@
+import gzip
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models import TaskResult, TaskStatus, TranscriptionResponse
+
+ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+FINISHED_STATUSES = (
+    TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.TIMED_OUT
+)
+
+
+class TaskStateConflictError(Exception):
+    """Raised when a status transition finds the task in an unexpected state."""
+
+    def __init__(self, task_id: str, status: TaskStatus):
+        self.task_id = task_id
+        self.status = status
+        super().__init__(f"Task {task_id} is {status.value}")
+
+
+def _created_ts(task: TaskResult) -> float:
+    return datetime.fromisoformat(task.created_at).timestamp()
+
+
+def _apply(
+    task: TaskResult,
+    expected_status: Optional[Iterable[TaskStatus]],
+    fields: dict
+) -> TaskResult:
+    """Validate the current status and return the task with ``fields`` applied."""
+    if expected_status is not None and task.status not in set(expected_status):
+        raise TaskStateConflictError(task.task_id, task.status)
+    return task.model_copy(update=fields)
+
+
+class TaskStore(ABC):
+    """Persistence for async task records.
+
+    ``update`` is atomic: when ``expected_status`` is given the change is only
+    applied if the task is currently in one of those states, otherwise
+    TaskStateConflictError is raised. Listings are newest first.
+    """
+
+    # Whether every worker process sees the same records
+    shared = True
+
+    @abstractmethod
+    def create(self, task: TaskResult) -> None:
+        """Store a new task record."""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        """Fetch a task, or None if it does not exist."""
+
+    @abstractmethod
+    def update(
+        self,
+        task_id: str,
+        expected_status: Optional[Iterable[TaskStatus]] = None,
+        **fields
+    ) -> Optional[TaskResult]:
+        """Atomically update fields of a task; None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, task_id: str) -> bool:
+        """Remove a task; False if it did not exist."""
+
+    @abstractmethod
+    def list_tasks(
+        self,
+        status: Optional[TaskStatus] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> List[TaskResult]:
+        """Tasks ordered newest first, optionally filtered by status."""
+
+    @abstractmethod
+    def count(self, status: Optional[TaskStatus] = None) -> int:
+        """Number of stored tasks, optionally filtered by status."""
+
+    @abstractmethod
+    def oldest_task_ids(
+        self,
+        status: TaskStatus,
+        created_before: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """``(task_id, created timestamp)`` pairs in ``status``, oldest first."""
+
+    def prune(
+        self,
+        ttl_seconds: Dict[TaskStatus, int],
+        max_tasks: int = 0,
+        now: Optional[float] = None
+    ) -> int:
+        """Apply retention and return the number of tasks removed.
+
+        Tasks older than the TTL for their status are removed (a TTL of 0 keeps
+        them). Then, while more than ``max_tasks`` records remain, the oldest
+        finished tasks are evicted; pending and running tasks are never evicted
+        for space.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        for status, ttl in ttl_seconds.items():
+            if ttl > 0:
+                for task_id, _ in self.oldest_task_ids(status, created_before=now - ttl):
+                    removed += self.delete(task_id)
+
+        overflow = self.count() - max_tasks if max_tasks > 0 else 0
+        if overflow > 0:
+            candidates = sorted(
+                (pair for status in FINISHED_STATUSES
+                 for pair in self.oldest_task_ids(status, limit=overflow)),
+                key=lambda pair: pair[1]
+            )
+            for task_id, _ in candidates[:overflow]:
+                removed += self.delete(task_id)
+        return removed
+
+
+class MemoryTaskStore(TaskStore):
+    """In-process store; only suitable for a single worker."""
+
+    shared = False
+
+    def __init__(self):
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def create(self, task: TaskResult) -> None:
+        with self._lock:
+            self._tasks[task.task_id] = task
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def update(self, task_id, expected_status=None, **fields):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            task = _apply(task, expected_status, fields)
+            self._tasks[task_id] = task
+            return task
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            return self._tasks.pop(task_id, None) is not None
+
+    def list_tasks(self, status=None, offset=0, limit=50):
+        with self._lock:
+            tasks = [
+                task for task in self._tasks.values()
+                if status is None or task.status == status
+            ]
+        tasks.sort(key=_created_ts, reverse=True)
+        return tasks[offset:offset + limit]
+
+    def count(self, status=None) -> int:
+        with self._lock:
+            if status is None:
+                return len(self._tasks)
+            return sum(1 for task in self._tasks.values() if task.status == status)
+
+    def oldest_task_ids(self, status, created_before=None, limit=None):
+        with self._lock:
+            pairs = [
+                (task.task_id, _created_ts(task)) for task in self._tasks.values()
+                if task.status == status
+            ]
+        pairs.sort(key=lambda pair: pair[1])
+        if created_before is not None:
+            pairs = [pair for pair in pairs if pair[1] < created_before]
+        return pairs[:limit] if limit is not None else pairs
+
+
+class SQLiteTaskStore(TaskStore):
+    """Store backed by a SQLite file; shared by every worker on the same host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " task_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " created_ts REAL NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_status_created "
+                "ON tasks (status, created_ts)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_created ON tasks (created_ts)")
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit mode; update() manages its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, task: TaskResult) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO tasks (task_id, status, created_ts, data) VALUES (?, ?, ?, ?)",
+                (task.task_id, task.status.value, _created_ts(task), task.model_dump_json())
+            )
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return TaskResult.model_validate_json(row[0]) if row else None
+
+    def update(self, task_id, expected_status=None, **fields):
+        with self._connect() as conn:
+            try:
+                # IMMEDIATE takes the write lock up front so the read-check-write is atomic
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                task = _apply(
+                    TaskResult.model_validate_json(row[0]), expected_status, fields
+                )
+                conn.execute(
+                    "UPDATE tasks SET status = ?, data = ? WHERE task_id = ?",
+                    (task.status.value, task.model_dump_json(), task_id)
+                )
+                conn.execute("COMMIT")
+                return task
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, task_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+            return cursor.rowcount > 0
+
+    def list_tasks(self, status=None, offset=0, limit=50):
+        query = "SELECT data FROM tasks"
+        params: list = []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status.value)
+        query += " ORDER BY created_ts DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [TaskResult.model_validate_json(row[0]) for row in rows]
+
+    def count(self, status=None) -> int:
+        with self._connect() as conn:
+            if status is None:
+                row = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE status = ?", (status.value,)
+                ).fetchone()
+        return row[0]
+
+    def oldest_task_ids(self, status, created_before=None, limit=None):
+        query = "SELECT task_id, created_ts FROM tasks WHERE status = ?"
+        params: list = [status.value]
+        if created_before is not None:
+            query += " AND created_ts < ?"
+            params.append(created_before)
+        query += " ORDER BY created_ts ASC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with self._connect() as conn:
+            return [tuple(row) for row in conn.execute(query, params).fetchall()]
+
+
+class RedisTaskStore(TaskStore):
+    """Store backed by Redis; shared by every worker and host using the same server.
+
+    Each task is a JSON string under ``{prefix}:task:{id}``. Sorted sets scored
+    by creation time index all tasks and the tasks in each status.
+    """
+
+    def __init__(self, client, prefix: str = "whisper"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "whisper") -> "RedisTaskStore":
+        import redis
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{self.prefix}:task:{task_id}"
+
+    def _index_key(self, status: Optional[TaskStatus] = None) -> str:
+        if status is None:
+            return f"{self.prefix}:tasks"
+        return f"{self.prefix}:tasks:{status.value}"
+
+    def create(self, task: TaskResult) -> None:
+        score = _created_ts(task)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(self._task_key(task.task_id), task.model_dump_json())
+        pipe.zadd(self._index_key(), {task.task_id: score})
+        pipe.zadd(self._index_key(task.status), {task.task_id: score})
+        pipe.execute()
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        data = self.client.get(self._task_key(task_id))
+        return TaskResult.model_validate_json(data) if data else None
+
+    def update(self, task_id, expected_status=None, **fields):
+        import redis
+        key = self._task_key(task_id)
+        while True:
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    # WATCH makes the transaction fail if another writer got there first
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    if data is None:
+                        return None
+                    current = TaskResult.model_validate_json(data)
+                    task = _apply(current, expected_status, fields)
+                    score = _created_ts(task)
+                    pipe.multi()
+                    pipe.set(key, task.model_dump_json())
+                    if task.status != current.status:
+                        pipe.zrem(self._index_key(current.status), task_id)
+                        pipe.zadd(self._index_key(task.status), {task_id: score})
+                    pipe.execute()
+                    return task
+                except redis.WatchError:
+                    continue
+
+    def delete(self, task_id: str) -> bool:
+        import redis
+        key = self._task_key(task_id)
+        while True:
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    # Watched as in update, so a concurrent status change cannot
+                    # leave the task behind in its new status index
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    if data is None:
+                        return False
+                    status = TaskResult.model_validate_json(data).status
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.zrem(self._index_key(), task_id)
+                    pipe.zrem(self._index_key(status), task_id)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def list_tasks(self, status=None, offset=0, limit=50):
+        task_ids = self.client.zrevrange(self._index_key(status), offset, offset + limit - 1)
+        if not task_ids:
+            return []
+        keys = [
+            self._task_key(task_id.decode() if isinstance(task_id, bytes) else task_id)
+            for task_id in task_ids
+        ]
+        return [
+            TaskResult.model_validate_json(data)
+            for data in self.client.mget(keys) if data
+        ]
+
+    def count(self, status=None) -> int:
+        return self.client.zcard(self._index_key(status))
+
+    def oldest_task_ids(self, status, created_before=None, limit=None):
+        pairs = self.client.zrangebyscore(
+            self._index_key(status),
+            "-inf",
+            f"({created_before}" if created_before is not None else "+inf",
+            start=0 if limit is not None else None,
+            num=limit,
+            withscores=True
+        )
+        return [
+            (task_id.decode() if isinstance(task_id, bytes) else task_id, score)
+            for task_id, score in pairs
+        ]
+
+
+class OffloadingTaskStore(TaskStore):
+    """Keeps large results out of the backing store.
+
+    Results whose JSON is bigger than ``threshold`` bytes are written gzipped
+    to ``result_dir`` and loaded again by ``get``; listings leave them out.
+    The directory must be shared by every process that uses the store.
+    """
+
+    def __init__(self, inner: TaskStore, result_dir: str, threshold: int):
+        self.inner = inner
+        self.result_dir = result_dir
+        self.threshold = threshold
+        self.shared = inner.shared
+
+    def _path(self, task_id: str) -> str:
+        return os.path.join(self.result_dir, f"{task_id}.json.gz")
+
+    def _offload(self, task_id: str, fields: dict) -> Optional[str]:
+        """Write a large result to disk and drop it from ``fields``."""
+        result = fields.get("result")
+        if result is None:
+            return None
+        data = result.model_dump_json().encode("utf-8")
+        if len(data) <= self.threshold:
+            return None
+        os.makedirs(self.result_dir, exist_ok=True)
+        path = self._path(task_id)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wb", compresslevel=6) as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        fields["result"] = None
+        return path
+
+    def _load(self, task: Optional[TaskResult]) -> Optional[TaskResult]:
+        if task is None or task.result is not None or task.status != TaskStatus.COMPLETED:
+            return task
+        try:
+            with gzip.open(self._path(task.task_id), "rb") as f:
+                result = TranscriptionResponse.model_validate_json(f.read())
+        except FileNotFoundError:
+            return task
+        return task.model_copy(update={"result": result})
+
+    def create(self, task: TaskResult) -> None:
+        fields = {"result": task.result}
+        self._offload(task.task_id, fields)
+        self.inner.create(task.model_copy(update=fields))
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        return self._load(self.inner.get(task_id))
+
+    def update(self, task_id, expected_status=None, **fields):
+        path = self._offload(task_id, fields)
+        try:
+            task = self.inner.update(task_id, expected_status, **fields)
+        except TaskStateConflictError:
+            self._discard(path)
+            raise
+        if task is None:
+            # Deleted before the result arrived
+            self._discard(path)
+        return self._load(task)
+
+    @staticmethod
+    def _discard(path: Optional[str]):
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def delete(self, task_id: str) -> bool:
+        try:
+            os.remove(self._path(task_id))
+        except FileNotFoundError:
+            pass
+        return self.inner.delete(task_id)
+
+    def list_tasks(self, status=None, offset=0, limit=50):
+        return self.inner.list_tasks(status, offset, limit)
+
+    def count(self, status=None) -> int:
+        return self.inner.count(status)
+
+    def oldest_task_ids(self, status, created_before=None, limit=None):
+        return self.inner.oldest_task_ids(status, created_before, limit)
+
+
+def create_task_store(
+    backend: str,
+    sqlite_path: str,
+    redis_url: str,
+    result_dir: Optional[str] = None,
+    offload_threshold: int = 0
+) -> TaskStore:
+    """Build the task store selected by configuration."""
+    if backend == "memory":
+        store = MemoryTaskStore()
+    elif backend == "sqlite":
+        store = SQLiteTaskStore(sqlite_path)
+    elif backend == "redis":
+        store = RedisTaskStore.from_url(redis_url)
+    else:
+        raise ValueError(f"Unknown task store backend: {backend}")
+    if result_dir and offload_threshold > 0:
+        store = OffloadingTaskStore(store, result_dir, offload_threshold)
+    return store
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import time
+import uuid
+import zipfile
+from typing import Callable, List, Optional, Union
+
+import aiofiles
+import numpy as np
+from fastapi import UploadFile
+
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as an upload crosses the configured size limit."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"Upload exceeds maximum allowed size of {max_size} bytes")
+
+
+class IngestedUpload:
+    """An upload with its size and content hash, spooled to disk or held in memory.
+
+    In-memory uploads have no ``path``; their bytes sit in ``data`` until they
+    are decoded into ``audio``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        size: int,
+        sha256: str,
+        filename: str,
+        data: Optional[bytes] = None
+    ):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.data = data
+        self.audio: Optional[np.ndarray] = None  # 16 kHz PCM, when decoded in memory
+        self.duration: Optional[float] = None  # seconds, set once probed
+
+    @property
+    def source(self) -> Union[str, np.ndarray]:
+        """The decoded PCM if the upload was decoded in memory, else its file path."""
+        return self.audio if self.audio is not None else self.path
+
+    def spill(self, dest_dir: str, file_id: Optional[str] = None) -> str:
+        """Write in-memory bytes to ``dest_dir``, for decoders that need a seekable file."""
+        if self.path is None:
+            os.makedirs(dest_dir, exist_ok=True)
+            file_extension = os.path.splitext(self.filename)[1]
+            path = os.path.join(dest_dir, f"{file_id or uuid.uuid4()}{file_extension}")
+            with open(path, "wb") as f:
+                f.write(self.data or b"")
+            self.path = path
+            self.data = None
+        return self.path
+
+    def cleanup(self):
+        """Drop in-memory audio and remove the spooled file if it still exists."""
+        self.data = None
+        self.audio = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ArchiveError(Exception):
+    """Raised for an unreadable archive or one over the file-count limit."""
+
+
+def extract_archive(
+    path: str,
+    dest_dir: str,
+    max_files: int,
+    max_size: int
+) -> List[IngestedUpload]:
+    """Extract the files of a zip archive into ``dest_dir`` under random names.
+    
+    Member paths are never used on disk, directories and hidden files are
+    skipped, and the total uncompressed size is capped at ``max_size``.
+    Everything extracted so far is removed if a limit is crossed.
+    """
+    extracted: List[IngestedUpload] = []
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = [
+                info for info in archive.infolist()
+                # Skip directories and macOS resource forks / dotfiles
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith(".")
+                and not info.filename.startswith("__MACOSX/")
+            ]
+            if len(members) > max_files:
+                raise ArchiveError(f"Archive holds more than {max_files} files")
+            
+            total = 0
+            for info in members:
+                extension = os.path.splitext(info.filename)[1]
+                member_path = os.path.join(dest_dir, f"{uuid.uuid4()}{extension}")
+                digest = hashlib.sha256()
+                size = 0
+                with archive.open(info) as source, open(member_path, "wb") as target:
+                    extracted.append(IngestedUpload(member_path, 0, "", info.filename))
+                    while True:
+                        # Sizes in the zip directory can lie; count what is actually read
+                        chunk = source.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        total += len(chunk)
+                        if total > max_size:
+                            raise UploadTooLargeError(max_size)
+                        digest.update(chunk)
+                        target.write(chunk)
+                extracted[-1].size = size
+                extracted[-1].sha256 = digest.hexdigest()
+    except zipfile.BadZipFile as e:
+        for upload in extracted:
+            upload.cleanup()
+        raise ArchiveError(f"Invalid zip archive: {str(e)}")
+    except BaseException:
+        for upload in extracted:
+            upload.cleanup()
+        raise
+    return extracted
+
+
+async def ingest_upload(
+    file: UploadFile,
+    dest_dir: str,
+    max_size: int,
+    chunk_size: int = 1024 * 1024,
+    file_id: Optional[str] = None,
+    memory_limit: int = 0
+) -> IngestedUpload:
+    """Stream an upload to ``dest_dir`` chunk by chunk.
+
+    Only one chunk is held in memory at a time. The SHA-256 of the content is
+    computed on the way through, and the partial file is removed as soon as the
+    size limit is crossed. With ``memory_limit`` set, uploads up to that size
+    stay in memory (``IngestedUpload.data``) and never touch the disk; larger
+    ones spill to the file once they cross it.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    file_id = file_id or str(uuid.uuid4())
+    file_extension = os.path.splitext(file.filename or "")[1]
+    path = os.path.join(dest_dir, f"{file_id}{file_extension}")
+
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    f = None
+    try:
+        if memory_limit <= 0:
+            f = await aiofiles.open(path, 'wb')
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(max_size)
+            digest.update(chunk)
+            if f is None and size <= memory_limit:
+                buffer += chunk
+                continue
+            if f is None:
+                f = await aiofiles.open(path, 'wb')
+                await f.write(bytes(buffer))
+                buffer = bytearray()
+            await f.write(chunk)
+    except BaseException:
+        if f is not None:
+            await f.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    if f is None:
+        return IngestedUpload(
+            None, size, digest.hexdigest(), file.filename or "", data=bytes(buffer)
+        )
+    await f.close()
+    return IngestedUpload(path, size, digest.hexdigest(), file.filename or "")
+
+
+def sweep_stale_files(
+    directory: str,
+    max_age_seconds: float,
+    keep: Optional[Callable[[str], bool]] = None,
+    now: Optional[float] = None
+) -> int:
+    """Remove files in ``directory`` last modified over ``max_age_seconds`` ago.
+
+    Catches uploads orphaned by a request or worker that died before its
+    cleanup ran. Files for which ``keep(filename)`` is true are left alone.
+    Returns the number of files removed.
+    """
+    now = now or time.time()
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if not entry.is_file() or now - entry.stat().st_mtime < max_age_seconds:
+                continue
+            if keep is not None and keep(entry.name):
+                continue
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            # Cleaned up by its own request in the meantime
+            continue
+    return removed
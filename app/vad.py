@@ -0,0 +1,121 @@
+import bisect
+from typing import List, Tuple
+
+import numpy as np
+
+from app.audio import SAMPLE_RATE, frame_energy
+
+
+def detect_speech(
+    audio: np.ndarray,
+    threshold_db: float = -45.0,
+    frame_seconds: float = 0.03,
+    min_speech_seconds: float = 0.25,
+    min_silence_seconds: float = 0.5,
+    padding_seconds: float = 0.2
+) -> List[Tuple[int, int]]:
+    """Find speech regions with a frame-energy detector.
+
+    A frame counts as speech when its level is above ``threshold_db`` (dBFS)
+    and, on noisy recordings, 10 dB over the noise floor (capped at 20 dB below
+    the loud frames, so mostly-speech audio is not rejected). Pauses shorter than
+    ``min_silence_seconds`` are bridged, blips shorter than
+    ``min_speech_seconds`` are dropped, and every region is padded so word
+    onsets survive. Returns ``(start, end)`` sample offsets.
+    """
+    energy = frame_energy(audio, frame_seconds)
+    if len(energy) == 0:
+        return []
+    level_db = 20 * np.log10(energy + 1e-10)
+    noise_floor = np.percentile(level_db, 10)
+    loud_level = np.percentile(level_db, 95)
+    adaptive_db = min(noise_floor + 10.0, loud_level - 20.0)
+    is_speech = level_db > max(threshold_db, adaptive_db)
+
+    # Rising and falling edges of the speech mask, in frames
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_silence = int(min_silence_seconds / frame_seconds)
+    merged: List[List[int]] = []
+    for start, end in zip(starts, ends):
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    min_speech = int(min_speech_seconds / frame_seconds)
+    padding = int(padding_seconds * SAMPLE_RATE)
+    regions: List[Tuple[int, int]] = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        region_start = max(0, start * frame_length - padding)
+        region_end = min(len(audio), end * frame_length + padding)
+        if regions and region_start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], region_end)
+        else:
+            regions.append((region_start, region_end))
+    return regions
+
+
+class Timeline:
+    """Maps times in speech-only audio back to the original recording."""
+
+    def __init__(self, regions: List[Tuple[int, int]]):
+        self.compact_starts: List[float] = []
+        self.compact_ends: List[float] = []
+        self.original_starts: List[float] = []
+        position = 0
+        for start, end in regions:
+            self.compact_starts.append(position / SAMPLE_RATE)
+            self.original_starts.append(start / SAMPLE_RATE)
+            position += end - start
+            self.compact_ends.append(position / SAMPLE_RATE)
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """Original-timeline time of compact time ``t``.
+
+        An end time that falls exactly on a region boundary stays with the
+        earlier region instead of jumping across the removed silence.
+        """
+        if not self.compact_starts:
+            return t
+        if is_end:
+            index = bisect.bisect_left(self.compact_ends, t)
+        else:
+            index = bisect.bisect_right(self.compact_starts, t) - 1
+        index = min(max(index, 0), len(self.compact_starts) - 1)
+        return round(self.original_starts[index] + t - self.compact_starts[index], 3)
+
+
+def remove_silence(
+    audio: np.ndarray, regions: List[Tuple[int, int]]
+) -> Tuple[np.ndarray, Timeline]:
+    """Concatenate the speech regions and return the matching timeline map."""
+    if not regions:
+        return np.zeros(0, dtype=audio.dtype), Timeline([])
+    speech = np.concatenate([audio[start:end] for start, end in regions])
+    return speech, Timeline(regions)
+
+
+def remap_segments(segments: List[dict], timeline: Timeline) -> List[dict]:
+    """Move segment and word timestamps back onto the original timeline."""
+    remapped = []
+    for segment in segments:
+        segment = dict(segment)
+        segment["start"] = timeline.to_original(segment["start"])
+        segment["end"] = timeline.to_original(segment["end"], is_end=True)
+        if segment.get("words"):
+            segment["words"] = [
+                {
+                    **word,
+                    "start": timeline.to_original(word["start"]),
+                    "end": timeline.to_original(word["end"], is_end=True)
+                }
+                for word in segment["words"]
+            ]
+        remapped.append(segment)
+    return remapped
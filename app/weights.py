@@ -0,0 +1,127 @@
+import dataclasses
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+import whisper
+from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+
+def mmap_path(download_root: str, name: str) -> str:
+    """Pre-converted fp32 weights of ``name``, laid out for ``torch.load(mmap=True)``."""
+    return os.path.join(download_root, "mmap", f"{name}-fp32.pt")
+
+
+def weights_checkpoint(model: Whisper) -> dict:
+    """Dimensions, state dict and alignment heads of ``model``, loadable with ``weights_only=True``."""
+    return {
+        "dims": dataclasses.asdict(model.dims),
+        "model_state_dict": model.state_dict(),
+        "alignment_heads": model.alignment_heads.to_dense()
+    }
+
+
+def convert_checkpoint(name: str, download_root: str, model: Optional[Whisper] = None) -> str:
+    """Write the fp32 weights of ``name`` (downloading the checkpoint if needed) for mapping.
+
+    Official checkpoints are fp16 and every process converts them to a private
+    fp32 copy on load; the converted file is already in the dtype used for
+    inference, so its pages can be mapped and shared as they are. Pass
+    ``model`` if it is already loaded on CPU.
+    """
+    path = mmap_path(download_root, name)
+    if model is None:
+        model = whisper.load_model(name, device="cpu", download_root=download_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so concurrent loaders never map a partial file
+    partial = f"{path}.{os.getpid()}.tmp"
+    torch.save(weights_checkpoint(model), partial)
+    os.replace(partial, path)
+    return path
+
+
+def empty_model(dims: ModelDimensions, device: Optional[str] = None) -> Whisper:
+    """A Whisper model whose weights are still to be loaded from a checkpoint.
+
+    The encoder and decoder are built on the meta device, so their weights are
+    neither allocated nor randomly initialised; load them with
+    ``load_state_dict(assign=True)``. With ``device`` they are allocated there
+    uninitialised instead, for layers that must exist before loading. The
+    decoder's causal mask and the default alignment heads, which checkpoints
+    do not hold, are built as Whisper.__init__ builds them.
+    """
+    # Whisper.__init__ itself cannot run on meta: the alignment heads are sparse
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(
+            dims.n_mels, dims.n_audio_ctx, dims.n_audio_state,
+            dims.n_audio_head, dims.n_audio_layer
+        )
+        model.decoder = TextDecoder(
+            dims.n_vocab, dims.n_text_ctx, dims.n_text_state,
+            dims.n_text_head, dims.n_text_layer
+        )
+    if device is not None:
+        model.to_empty(device=device)
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2:] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    return model
+
+
+def load_mmap(name: str, device: str, download_root: str) -> Optional[Whisper]:
+    """Map the converted weights of ``name``; None if they have not been converted.
+
+    Parameters are views of the mapped file, so pages load on first use and
+    processes mapping the same file share them through the page cache. On GPU
+    they are copied to the device as usual.
+    """
+    path = mmap_path(download_root, name)
+    if not os.path.exists(path):
+        return None
+    checkpoint = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    model = empty_model(ModelDimensions(**checkpoint["dims"]))
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+    model.register_buffer(
+        "alignment_heads", checkpoint["alignment_heads"].to_sparse(), persistent=False
+    )
+    return model.to(device)
+
+
+def load_weights(name: str, device: str, download_root: str, mmap: bool = True) -> Whisper:
+    """Load ``name`` from its converted weights when present, else from the checkpoint."""
+    if mmap:
+        try:
+            model = load_mmap(name, device, download_root)
+            if model is not None:
+                return model
+        except Exception as e:
+            print(f"Ignoring unreadable converted weights for {name}: {str(e)}")
+    return whisper.load_model(name, device=device, download_root=download_root)
+
+
+def process_memory() -> Dict[str, int]:
+    """Resident memory of this process in bytes, split into shared and private (Linux only).
+
+    ``pss`` charges shared pages proportionally to each process mapping them.
+    """
+    fields = {
+        "Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+        "Private_Clean": "private", "Private_Dirty": "private"
+    }
+    memory: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(":") in fields:
+                    key = fields[parts[0].rstrip(":")]
+                    memory[key] = memory.get(key, 0) + int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return memory
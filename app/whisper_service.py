@@ -1,52 +1,314 @@
 import whisper
 import torch
+import numpy as np
+import asyncio
 import os
-from typing import Dict, Optional
-from app.models import WhisperModel
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from app.models import BackendName, ModelPrecision, WhisperModel
+from app.config import get_settings, parse_size
+from app.scheduler import InferenceScheduler, JobPriority, QueueFullError
+from app.cost import MODEL_COST_FACTORS, combined_cost_factor, estimate_cost
+from app.cache import ResultCache
+from app.coalescing import RequestCoalescer
+from app.batching import MicroBatcher
+from app.model_pool import ModelPool
+from app.audio import SAMPLE_RATE, load_audio, split_on_silence
+from whisper.audio import N_FRAMES, N_SAMPLES
+from app.handles import AudioHandle, AudioHandleCache
+from app.shared_decoding import decode_tasks
+from app.long_audio import LongAudioTranscriber, offset_segment, stitch_results
+from app.vad import detect_speech, remap_segments, remove_silence
+from app.cancellation import JobCancelledError, check_cancelled
+from app.quantization import INT8_SUFFIX
+from app.backends import InferenceBackend, get_backend
+from app.backends.base import BATCHED_DECODING, INT8_GPU
+
+# Long audio, cascades, streaming, live captions, clip batches and the combined
+# endpoint call openai-whisper's model APIs directly, so they always load its
+# models whatever the configured default backend
+OPENAI_WHISPER = BackendName.PYTORCH
 
 
 class WhisperService:
     def __init__(self):
-        self.models: Dict[str, whisper.Whisper] = {}
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"Using device: {self.device}")
+        
+        # Blocking inference runs here so the event loop stays responsive
+        settings = get_settings()
+        
+        # Loaded models are kept under a memory budget with LRU eviction
+        self.model_pool = ModelPool(
+            self._load_from_disk,
+            memory_budget=parse_size(settings.model_memory_budget),
+            sizer=self._model_size
+        )
+        self.scheduler = InferenceScheduler(
+            max_workers=settings.max_workers,
+            max_queue_size=settings.max_queue_size,
+            aging_rate=settings.scheduler_aging_rate,
+            batch_offset=settings.scheduler_batch_offset
+        )
+        
+        # Results are keyed on the audio content hash plus decoding options
+        self.result_cache: Optional[ResultCache] = None
+        if settings.result_cache_enabled:
+            self.result_cache = ResultCache(
+                max_entries=settings.result_cache_max_entries,
+                ttl_seconds=settings.result_cache_ttl,
+                disk_dir=(
+                    os.path.join(settings.cache_dir, "results")
+                    if settings.result_cache_disk else None
+                ),
+                max_disk_entries=settings.result_cache_disk_max_entries
+            )
+        
+        # Identical concurrent requests share one running job
+        self.coalescer = RequestCoalescer()
+        
+        # Uploads decoded once and referenced by ID, with their spectrograms
+        self.audio_handles = AudioHandleCache(
+            max_bytes=parse_size(settings.upload_cache_size),
+            ttl_seconds=settings.upload_handle_ttl,
+            directory=os.path.join(settings.temp_dir, "uploads")
+        )
+        
+        # Concurrent language detections on one model share an encoder pass
+        self.language_batcher = MicroBatcher(
+            self._run_language_batch,
+            max_batch_size=settings.language_batch_max_size,
+            max_wait_seconds=settings.language_batch_wait_ms / 1000
+        )
+        
+        # Per-model preload/warmup state reported by /ready
+        self.model_status: Dict[str, dict] = {}
+        
+        # Energy-based voice activity detection options
+        self.vad_options = {
+            "threshold_db": settings.vad_threshold_db,
+            "min_speech_seconds": settings.vad_min_speech_seconds,
+            "min_silence_seconds": settings.vad_min_silence_seconds,
+            "padding_seconds": settings.vad_padding_seconds
+        }
+        
+        # Inference engine unless a request picks another one
+        self.default_backend = get_backend(settings.inference_backend)
+        
+        # Weight precision per model unless a request asks for one; int8 is CPU-only
+        self.default_precision = ModelPrecision(settings.model_precision)
+        self.quantized_models = {
+            name.strip() for name in settings.quantized_models.split(",") if name.strip()
+        }
+        
+        # Cascade: cheap models for language ID and a first pass, thresholds
+        # deciding which segments are re-decoded with the requested model
+        self.cascade_options = {
+            "language_model": settings.cascade_language_model,
+            "draft_model": settings.cascade_draft_model,
+            "logprob_threshold": settings.cascade_logprob_threshold,
+            "compression_threshold": settings.cascade_compression_threshold,
+            "no_speech_threshold": settings.cascade_no_speech_threshold
+        }
+        
+        # Short clips in a batch request share encoder/decoder passes this wide
+        self.batch_size = settings.batch_size
+        
+        # Streaming transcription decodes this many seconds at a time
+        self.stream_window_seconds = settings.stream_window_seconds
+        
+        # Long recordings are split at silences and transcribed on a process pool
+        self.long_audio_window_seconds = settings.long_audio_window_seconds
+        self.long_audio = LongAudioTranscriber(
+            processes=settings.long_audio_processes,
+            download_root=os.getenv("CACHE_DIR", "./models")
+        )
 
-    def load_model(self, model_name: WhisperModel) -> whisper.Whisper:
-        """Load a Whisper model, caching it for reuse."""
-        model_key = model_name.value
+    @property
+    def models(self) -> Dict[str, whisper.Whisper]:
+        """Models currently resident in the pool."""
+        return self.model_pool.loaded()
+
+    def _load_from_disk(self, model_key: str) -> whisper.Whisper:
+        """Load model weights from the cache directory (downloading if needed)."""
+        print(f"Loading Whisper model: {model_key}")
+        try:
+            # Set model cache directory
+            cache_dir = os.getenv("CACHE_DIR", "./models")
+            os.makedirs(cache_dir, exist_ok=True)
+            
+            # Keys of non-default backends are prefixed, e.g. "faster-whisper/small"
+            backend_name, _, key = model_key.rpartition("/")
+            backend = get_backend(backend_name or "pytorch")
+            model = backend.load(key, device=self.device, download_root=cache_dir)
+            print(f"Successfully loaded model: {model_key}")
+            return model
+        except Exception as e:
+            print(f"Error loading model {model_key}: {str(e)}")
+            raise
+
+    def _model_size(self, model_key: str, model: Optional[whisper.Whisper]) -> int:
+        """Bytes a pooled model counts against the memory budget, as its backend reckons.
         
-        if model_key not in self.models:
-            print(f"Loading Whisper model: {model_key}")
-            try:
-                # Set model cache directory
-                cache_dir = os.getenv("CACHE_DIR", "./models")
-                os.makedirs(cache_dir, exist_ok=True)
-                
-                model = whisper.load_model(
-                    model_key, 
-                    device=self.device,
-                    download_root=cache_dir
-                )
-                self.models[model_key] = model
-                print(f"Successfully loaded model: {model_key}")
-            except Exception as e:
-                print(f"Error loading model {model_key}: {str(e)}")
-                raise
+        ``model`` is None for the estimate made before loading it.
+        """
+        backend_name, _, key = model_key.rpartition("/")
+        return get_backend(backend_name or "pytorch").model_size(model, key, self.device)
+
+    def backend(self, name: Optional[BackendName] = None) -> InferenceBackend:
+        """The named inference backend, or the configured default."""
+        if name is None:
+            return self.default_backend
+        return get_backend(BackendName(name).value)
+
+    def model_key(
+        self,
+        model_name: WhisperModel,
+        precision: Optional[ModelPrecision] = None,
+        backend: Optional[BackendName] = None
+    ) -> str:
+        """Pool key for ``model_name`` at ``precision``, or at its configured default.
+        
+        int8 falls back to the regular weights on GPU unless the backend
+        supports int8 there; PyTorch runs whisper in fp16 on GPU instead.
+        """
+        engine = self.backend(backend)
+        if precision is None:
+            precision = (
+                ModelPrecision.INT8 if model_name.value in self.quantized_models
+                else self.default_precision
+            )
+        key = model_name.value
+        if ModelPrecision(precision) == ModelPrecision.INT8 and (
+            self.device == "cpu" or INT8_GPU in engine.capabilities
+        ):
+            key += INT8_SUFFIX
+        if engine.name != "pytorch":
+            key = f"{engine.name}/{key}"
+        return key
+
+    def load_model(
+        self,
+        model_name: WhisperModel,
+        precision: Optional[ModelPrecision] = None,
+        backend: Optional[BackendName] = None
+    ) -> whisper.Whisper:
+        """Load a Whisper model, caching it for reuse."""
+        return self.model_pool.get(self.model_key(model_name, precision, backend))
+
+    @contextmanager
+    def use_model(
+        self,
+        model_name: WhisperModel,
+        precision: Optional[ModelPrecision] = None,
+        backend: Optional[BackendName] = None
+    ) -> Iterator[whisper.Whisper]:
+        """Load a model and pin it in the pool for the duration of the block."""
+        with self.model_pool.acquire(self.model_key(model_name, precision, backend)) as model:
+            yield model
+
+    def warmup(self, model_name: WhisperModel) -> float:
+        """Run one synthetic transcription so the first real request starts warm."""
+        # One second of silence still exercises the encoder and decoder
+        audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        start_time = time.time()
+        with self.use_model(model_name) as model:
+            self.default_backend.transcribe(model, audio, language="en", fp16=self.device == "cuda")
+        return time.time() - start_time
+
+    def prepare_model(self, model_name: WhisperModel, warmup: bool = True) -> dict:
+        """Load and optionally warm up a model, recording progress in model_status."""
+        status = {
+            "state": "loading",
+            "load_seconds": None,
+            "warmup_seconds": None,
+            "error": None
+        }
+        self.model_status[model_name.value] = status
+        try:
+            start_time = time.time()
+            self.load_model(model_name)
+            status["load_seconds"] = round(time.time() - start_time, 3)
+            
+            if warmup:
+                status["state"] = "warming_up"
+                status["warmup_seconds"] = round(self.warmup(model_name), 3)
+            
+            status["state"] = "ready"
+        except Exception as e:
+            print(f"Error preparing model {model_name.value}: {str(e)}")
+            status["state"] = "failed"
+            status["error"] = str(e)
+        return status
+
+    def transcription_cache_key(
+        self,
+        content_hash: str,
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Cache key for a transcription of the given audio content and options."""
+        # Results differ between engines; PyTorch keys keep their original form
+        backend = self.backend(kwargs.pop("backend", None))
+        if backend.name != "pytorch":
+            kwargs["backend"] = backend.name
         
-        return self.models[model_key]
+        # Flags that are off are left out so existing keys stay stable
+        options = {
+            k: v for k, v in kwargs.items() if v is not None and v is not False
+        }
+        return ResultCache.make_key(
+            content_hash,
+            model=model_name.value,
+            task=task,
+            language=language,
+            **options
+        )
+
+    def get_cached_result(self, cache_key: Optional[str]) -> Optional[dict]:
+        """Look up a cached result; None when caching is off or on a miss."""
+        if self.result_cache is None or cache_key is None:
+            return None
+        return self.result_cache.get(cache_key)
 
     def transcribe_audio(
         self,
-        audio_path: str,
+        audio_path: Union[str, np.ndarray, AudioHandle],
         model_name: WhisperModel,
         task: str = "transcribe",
         language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        long_audio: bool = False,
+        vad: bool = False,
+        cascade: bool = False,
+        precision: Optional[ModelPrecision] = None,
+        backend: Optional[BackendName] = None,
         **kwargs
     ) -> dict:
-        """Transcribe audio file using specified Whisper model."""
+        """Transcribe an audio file, decoded 16 kHz PCM or a stored upload, using specified Whisper model.
+        
+        ``precision`` overrides the model's configured weight precision and
+        ``backend`` the configured inference backend.
+        """
+        engine = self.backend(backend)
+        if isinstance(audio_path, AudioHandle):
+            audio_path = audio_path.audio
+        cache_key = None
+        if content_hash:
+            cache_key = self.transcription_cache_key(
+                content_hash, model_name, task, language,
+                long_audio=long_audio, vad=vad, cascade=cascade, precision=precision,
+                backend=backend, **kwargs
+            )
+            cached = self.get_cached_result(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            model = self.load_model(model_name)
-            
             # Prepare transcription options
             options = {
                 "task": task,
@@ -57,44 +319,832 @@ class WhisperService:
             # Remove None values
             options = {k: v for k, v in options.items() if v is not None}
             
-            print(f"Transcribing {audio_path} with model {model_name.value}")
-            result = model.transcribe(audio_path, **options)
+            source = audio_path if isinstance(audio_path, str) else "in-memory audio"
+            print(f"Transcribing {source} with model {model_name.value}")
+            # Decoded here so WAV files skip ffmpeg whichever engine runs them
+            audio = load_audio(audio_path)
+            timeline = None
+            vad_stats = None
+            if vad:
+                audio, timeline, vad_stats = self.remove_non_speech(audio)
+            check_cancelled()
             
-            return {
+            if vad and len(audio) == 0:
+                # Nothing but silence: skip the model entirely
+                result = {"text": "", "language": language, "segments": []}
+            elif long_audio:
+                result = self.transcribe_long_audio(audio, model_name, options, precision, cascade)
+            elif cascade:
+                result = self.transcribe_cascade(audio, model_name, options, precision)
+            else:
+                with self.use_model(model_name, precision, backend) as model:
+                    result = engine.transcribe(model, audio, **options)
+            
+            segments = result.get("segments", [])
+            if timeline is not None:
+                segments = remap_segments(segments, timeline)
+            
+            response = {
                 "text": result["text"],
                 "language": result.get("language"),
-                "segments": result.get("segments", []),
-                "whisper_model": model_name.value
+                "segments": segments,
+                "whisper_model": model_name.value,
+                "backend": engine.name
             }
-            
+            if vad_stats is not None:
+                response["vad"] = vad_stats
+            if result.get("cascade") is not None:
+                response["cascade"] = result["cascade"]
+        
         except Exception as e:
             print(f"Error during transcription: {str(e)}")
             raise
+        
+        if cache_key and self.result_cache is not None:
+            self.result_cache.put(cache_key, response)
+        return response
 
-    def detect_language(self, audio_path: str, model_name: WhisperModel) -> dict:
-        """Detect the language of the audio file."""
-        try:
-            model = self.load_model(model_name)
-            
-            # Load and process audio
-            audio = whisper.load_audio(audio_path)
-            audio = whisper.pad_or_trim(audio)
-            
-            # Make log-Mel spectrogram
-            mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+    def remove_non_speech(self, audio: np.ndarray) -> tuple:
+        """Cut non-speech regions out of ``audio`` before inference.
+        
+        Returns the speech-only audio, a Timeline mapping its timestamps back
+        to the original recording, and statistics about what was skipped.
+        """
+        regions = detect_speech(audio, **self.vad_options)
+        speech, timeline = remove_silence(audio, regions)
+        original_seconds = len(audio) / SAMPLE_RATE
+        speech_seconds = len(speech) / SAMPLE_RATE
+        stats = {
+            "original_seconds": round(original_seconds, 3),
+            "speech_seconds": round(speech_seconds, 3),
+            "skipped_seconds": round(original_seconds - speech_seconds, 3),
+            "speech_regions": len(regions)
+        }
+        print(f"VAD skipped {stats['skipped_seconds']}s of {stats['original_seconds']}s")
+        return speech, timeline, stats
+
+    def transcribe_long_audio(
+        self,
+        audio: Union[str, np.ndarray],
+        model_name: WhisperModel,
+        options: dict,
+        precision: Optional[ModelPrecision] = None,
+        cascade: bool = False
+    ) -> dict:
+        """Split long audio at silences and transcribe the windows in parallel.
+        
+        On CPU the windows run on a process pool; on GPU they run one after
+        another on the pooled model, which already saturates the device.
+        With ``cascade`` each window runs the cascade in turn instead, on the
+        language identified for the first window.
+        """
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        windows = split_on_silence(audio, self.long_audio_window_seconds)
+        print(f"Long-audio mode: {len(windows)} windows")
+        
+        if cascade:
+            results = []
+            for start, end in windows:
+                check_cancelled()
+                result = self.transcribe_cascade(audio[start:end], model_name, options, precision)
+                options = {**options, "language": options.get("language") or result.get("language")}
+                results.append(result)
+            stitched = stitch_results(results, [start / SAMPLE_RATE for start, _ in windows])
+            stitched["cascade"] = self.merge_cascade_stats(
+                [result.get("cascade") for result in results], stitched["segments"]
+            )
+            return stitched
+        
+        if len(windows) == 1:
+            with self.use_model(model_name, precision, OPENAI_WHISPER) as model:
+                return model.transcribe(audio, **options)
+        
+        if self.device == "cuda":
+            with self.use_model(model_name, precision, OPENAI_WHISPER) as model:
+                results = [model.transcribe(audio[start:end], **options) for start, end in windows]
+            return stitch_results(
+                results, [start / SAMPLE_RATE for start, _ in windows]
+            )
+        
+        return self.long_audio.transcribe(
+            audio, windows, self.model_key(model_name, precision, OPENAI_WHISPER),
+            {**options, "fp16": False}
+        )
+
+    def cascade_models(self, model_name: WhisperModel) -> Optional[Tuple[WhisperModel, WhisperModel]]:
+        """(language-ID model, draft model) for a cascade ending at ``model_name``.
+        
+        None when the draft model would not be cheaper than ``model_name``.
+        """
+        language_model = WhisperModel(self.cascade_options["language_model"])
+        draft_model = WhisperModel(self.cascade_options["draft_model"])
+        if MODEL_COST_FACTORS.get(draft_model.value, 1.0) >= MODEL_COST_FACTORS.get(model_name.value, 1.0):
+            return None
+        return language_model, draft_model
+
+    def needs_refinement(self, segment: dict) -> bool:
+        """Whether a draft segment crosses any of the cascade's confidence thresholds."""
+        thresholds = self.cascade_options
+        return (
+            segment.get("avg_logprob", 0.0) < thresholds["logprob_threshold"]
+            or segment.get("compression_ratio", 0.0) > thresholds["compression_threshold"]
+            or segment.get("no_speech_prob", 0.0) > thresholds["no_speech_threshold"]
+        )
+
+    def transcribe_cascade(
+        self,
+        audio: Union[str, np.ndarray],
+        model_name: WhisperModel,
+        options: dict,
+        precision: Optional[ModelPrecision] = None
+    ) -> dict:
+        """Transcribe on a cheap draft model, re-decoding only doubtful segments on ``model_name``.
+        
+        The language is identified on the cascade's language model unless given.
+        Consecutive flagged segments are re-decoded together, with the text
+        before them as prompt. Each segment records the model that produced it.
+        """
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        models = self.cascade_models(model_name)
+        if models is None:
+            with self.use_model(model_name, precision, OPENAI_WHISPER) as model:
+                return model.transcribe(audio, **options)
+        language_model, draft_model = models
+        
+        options = dict(options)
+        language_seconds = 0.0
+        if options.get("language") is None and not model_name.value.endswith(".en"):
+            detection = self.detect_language_batch(language_model, [whisper.pad_or_trim(audio)])[0]
+            options["language"] = detection["detected_language"]
+            language_seconds = min(len(audio) / SAMPLE_RATE, 30.0)
+            print(f"Cascade: {language_model.value} detected {options['language']}")
+        check_cancelled()
+        
+        with self.use_model(draft_model, backend=OPENAI_WHISPER) as model:
+            draft = model.transcribe(audio, **options)
+        segments = [dict(segment, model=draft_model.value) for segment in draft.get("segments", [])]
+        
+        # Runs of consecutive flagged segments, as (first, last) indices
+        runs = []
+        for index, segment in enumerate(segments):
+            if not self.needs_refinement(segment):
+                continue
+            if runs and runs[-1][1] == index - 1:
+                runs[-1] = (runs[-1][0], index)
+            else:
+                runs.append((index, index))
+        
+        output = []
+        refined_seconds = 0.0
+        cursor = 0
+        if runs:
+            with self.use_model(model_name, precision, OPENAI_WHISPER) as model:
+                for first, last in runs:
+                    check_cancelled()
+                    output.extend(segments[cursor:first])
+                    start, end = segments[first]["start"], segments[last]["end"]
+                    refined_seconds += end - start
+                    prompt = "".join(segment["text"] for segment in output)[-200:]
+                    result = model.transcribe(
+                        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)],
+                        **{**options, "initial_prompt": prompt or options.get("initial_prompt")}
+                    )
+                    output.extend(
+                        dict(offset_segment(segment, start), model=model_name.value)
+                        for segment in result.get("segments", [])
+                    )
+                    cursor = last + 1
+        output.extend(segments[cursor:])
+        for index, segment in enumerate(output):
+            segment["id"] = index
+        
+        def cost(seconds: float, model: WhisperModel) -> float:
+            return seconds * MODEL_COST_FACTORS.get(model.value, 1.0)
+        
+        audio_seconds = len(audio) / SAMPLE_RATE
+        full_cost = cost(audio_seconds, model_name)
+        cascade_cost = (
+            cost(language_seconds, language_model)
+            + cost(audio_seconds, draft_model)
+            + cost(refined_seconds, model_name)
+        )
+        stats = {
+            "language_model": language_model.value if language_seconds else None,
+            "draft_model": draft_model.value,
+            "refine_model": model_name.value,
+            "segments": len(output),
+            "draft_segments_flagged": sum(last - first + 1 for first, last in runs),
+            "refined_segments": sum(1 for segment in output if segment["model"] == model_name.value),
+            "audio_seconds": round(audio_seconds, 3),
+            "refined_seconds": round(refined_seconds, 3),
+            "estimated_savings": round(1 - cascade_cost / full_cost, 3) if full_cost else 0.0
+        }
+        print(
+            f"Cascade: refined {stats['refined_seconds']}s of {stats['audio_seconds']}s "
+            f"on {model_name.value}, est. savings {stats['estimated_savings']:.0%}"
+        )
+        return {
+            "text": "".join(segment["text"] for segment in output),
+            "language": options.get("language") or draft.get("language"),
+            "segments": output,
+            "cascade": stats
+        }
+
+    @staticmethod
+    def merge_cascade_stats(stats: List[Optional[dict]], segments: List[dict]) -> Optional[dict]:
+        """Cascade statistics for windows cascaded one by one, over the stitched ``segments``."""
+        stats = [window for window in stats if window is not None]
+        if not stats:
+            return None
+        audio_seconds = sum(window["audio_seconds"] for window in stats)
+        refine_model = stats[0]["refine_model"]
+        return {
+            "language_model": next(
+                (window["language_model"] for window in stats if window["language_model"]), None
+            ),
+            "draft_model": stats[0]["draft_model"],
+            "refine_model": refine_model,
+            "segments": len(segments),
+            "draft_segments_flagged": sum(window["draft_segments_flagged"] for window in stats),
+            "refined_segments": sum(1 for segment in segments if segment.get("model") == refine_model),
+            "audio_seconds": round(audio_seconds, 3),
+            "refined_seconds": round(sum(window["refined_seconds"] for window in stats), 3),
+            # Savings are relative to the full cost, which is proportional to each window's length
+            "estimated_savings": round(
+                sum(window["estimated_savings"] * window["audio_seconds"] for window in stats) / audio_seconds, 3
+            ) if audio_seconds else 0.0
+        }
+
+    async def run_transcription(
+        self,
+        audio_path: Union[str, np.ndarray, AudioHandle],
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        enforce_limit: bool = True,
+        priority: JobPriority = JobPriority.INTERACTIVE,
+        duration: Optional[float] = None,
+        **kwargs
+    ) -> dict:
+        """Transcribe on the inference scheduler.
+        
+        Cache hits are served without queueing, and requests with the same
+        content hash and options attach to a single in-flight job. ``duration``
+        (audio seconds) sets the job's estimated cost for scheduling.
+        """
+        job_key = None
+        if content_hash:
+            job_key = self.transcription_cache_key(
+                content_hash, model_name, task, language, **kwargs
+            )
+        
+        # A cascade mostly runs on its draft model
+        cost_model = model_name
+        if kwargs.get("cascade") and self.cascade_models(model_name):
+            cost_model = self.cascade_models(model_name)[1]
+        
+        def start():
+            return self.scheduler.run(
+                self.transcribe_audio,
+                enforce_limit=enforce_limit,
+                priority=priority,
+                cost=estimate_cost(duration, cost_model.value),
+                job_id=job_key,
+                audio_path=audio_path,
+                model_name=model_name,
+                task=task,
+                language=language,
+                content_hash=content_hash,
+                **kwargs
+            )
+        
+        if not job_key:
+            return await start()
+        
+        cached = self.get_cached_result(job_key)
+        if cached is not None:
+            return cached
+        return await self.coalescer.run(job_key, start)
+
+    def transcribe_clips(
+        self,
+        clips: List[np.ndarray],
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        temperature: float = 0.0,
+        best_of: Optional[int] = None,
+        beam_size: Optional[int] = None
+    ) -> List[dict]:
+        """Transcribe clips of at most 30 s in one batched encoder and decoder pass.
+        
+        Each clip is padded to its own 30 s window. Clips whose decode looks
+        unreliable (repetitive or low-confidence, by the thresholds
+        ``model.transcribe`` uses) are redone one at a time with its
+        temperature fallback.
+        """
+        options = {
+            "task": task,
+            "language": language,
+            "temperature": temperature,
+            # Mirrors model.transcribe: beam search when greedy, best_of when sampling
+            "beam_size": beam_size if not temperature else None,
+            "best_of": best_of if temperature else None,
+        }
+        
+        with self.use_model(model_name, backend=OPENAI_WHISPER) as model:
+            if not model.is_multilingual:
+                options["language"] = "en"
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels=model.dims.n_mels)
+                for clip in clips
+            ]).to(model.device)
+            decoded = whisper.decode(
+                model,
+                mel,
+                whisper.DecodingOptions(
+                    without_timestamps=True, fp16=self.device == "cuda", **options
+                )
+            )
             
-            # Detect language
-            _, probs = model.detect_language(mel)
-            detected_language = max(probs, key=probs.get)
+            responses = []
+            for clip, result in zip(clips, decoded):
+                check_cancelled()
+                duration = round(len(clip) / SAMPLE_RATE, 3)
+                silent = result.no_speech_prob > 0.6 and result.avg_logprob < -1.0
+                if not silent and (result.compression_ratio > 2.4 or result.avg_logprob < -1.0):
+                    transcribed = model.transcribe(
+                        clip, **{k: v for k, v in options.items() if v is not None}
+                    )
+                    responses.append({
+                        "text": transcribed["text"],
+                        "language": transcribed.get("language"),
+                        "segments": transcribed.get("segments", []),
+                        "whisper_model": model_name.value,
+                        "batched": False
+                    })
+                    continue
+                
+                text = "" if silent else result.text
+                responses.append({
+                    "text": text,
+                    "language": result.language,
+                    "segments": [{
+                        "id": 0,
+                        "seek": 0,
+                        "start": 0.0,
+                        "end": duration,
+                        "text": text,
+                        "tokens": [] if silent else result.tokens,
+                        "temperature": result.temperature,
+                        "avg_logprob": result.avg_logprob,
+                        "compression_ratio": result.compression_ratio,
+                        "no_speech_prob": result.no_speech_prob
+                    }] if text else [],
+                    "whisper_model": model_name.value,
+                    "batched": True
+                })
+        return responses
+
+    async def run_transcription_batch(
+        self,
+        audio_paths: List[Union[str, np.ndarray]],
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        temperature: float = 0.0,
+        best_of: Optional[int] = None,
+        beam_size: Optional[int] = None
+    ) -> Tuple[List[Union[dict, Exception]], dict]:
+        """Transcribe many files, batching those of at most 30 s.
+        
+        Returns one outcome per path (a response dict with its share of the
+        processing time, or the exception that file raised) plus throughput
+        statistics. Short clips are grouped ``batch_size`` to a scheduler job;
+        longer files run through the regular transcription path. Only the
+        first job may be refused with QueueFullError.
+        """
+        start_time = time.time()
+        outcomes: List[Union[dict, Exception, None]] = [None] * len(audio_paths)
+        
+        async def load(path: str) -> Union[np.ndarray, Exception]:
+            try:
+                return await asyncio.to_thread(load_audio, path)
+            except Exception as e:
+                return e
+        
+        clips = await asyncio.gather(*(load(path) for path in audio_paths))
+        short, long_files, audio_seconds = [], [], 0.0
+        for index, clip in enumerate(clips):
+            if isinstance(clip, Exception):
+                outcomes[index] = clip
+                continue
+            audio_seconds += len(clip) / SAMPLE_RATE
+            (short if len(clip) <= N_SAMPLES else long_files).append(index)
+        
+        jobs = 0
+        decode_options = {
+            "task": task,
+            "language": language,
+            "temperature": temperature,
+            "best_of": best_of,
+            "beam_size": beam_size
+        }
+        for offset in range(0, len(short), self.batch_size):
+            group = short[offset:offset + self.batch_size]
+            group_start = time.time()
+            try:
+                results = await self.scheduler.run(
+                    self.transcribe_clips,
+                    [clips[index] for index in group],
+                    model_name,
+                    enforce_limit=jobs == 0,
+                    cost=estimate_cost(
+                        sum(len(clips[index]) for index in group) / SAMPLE_RATE,
+                        model_name.value
+                    ),
+                    **decode_options
+                )
+            except (QueueFullError, JobCancelledError):
+                raise
+            except Exception as e:
+                print(f"Error during batch transcription: {str(e)}")
+                for index in group:
+                    outcomes[index] = e
+                continue
+            finally:
+                jobs += 1
+            share = (time.time() - group_start) / len(group)
+            for index, result in zip(group, results):
+                outcomes[index] = {**result, "processing_time": share}
+        
+        for index in long_files:
+            file_start = time.time()
+            try:
+                result = await self.scheduler.run(
+                    self.transcribe_audio,
+                    enforce_limit=jobs == 0,
+                    cost=estimate_cost(len(clips[index]) / SAMPLE_RATE, model_name.value),
+                    audio_path=clips[index],
+                    model_name=model_name,
+                    **decode_options
+                )
+                outcomes[index] = {
+                    **result, "batched": False, "processing_time": time.time() - file_start
+                }
+            except (QueueFullError, JobCancelledError):
+                raise
+            except Exception as e:
+                outcomes[index] = e
+            jobs += 1
+        
+        processing_time = time.time() - start_time
+        batched = sum(
+            1 for outcome in outcomes if isinstance(outcome, dict) and outcome["batched"]
+        )
+        failed = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+        stats = {
+            "files": len(audio_paths),
+            "succeeded": len(audio_paths) - failed,
+            "failed": failed,
+            "batched_files": batched,
+            "individual_files": len(audio_paths) - failed - batched,
+            "batches": -(-len(short) // self.batch_size),
+            "batch_size": self.batch_size,
+            "audio_seconds": round(audio_seconds, 3),
+            "processing_time": round(processing_time, 3),
+            "files_per_second": round(len(audio_paths) / processing_time, 3) if processing_time else 0.0,
+            "realtime_factor": round(audio_seconds / processing_time, 2) if processing_time else 0.0
+        }
+        return outcomes, stats
+
+    def iter_transcription(
+        self,
+        audio: Union[str, np.ndarray],
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        **kwargs
+    ) -> Iterator[dict]:
+        """Transcribe window by window, yielding each segment as soon as it is decoded.
+        
+        Windows of about ``stream_window_seconds`` are cut at silences; the tail
+        of the text so far is passed as the prompt for the next window, and the
+        language detected in the first window is kept for the rest.
+        ``should_stop`` is checked between windows.
+        """
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        total_samples = max(1, len(audio))
+        windows = split_on_silence(audio, self.stream_window_seconds, search_seconds=5.0)
+        options = {k: v for k, v in kwargs.items() if v is not None}
+        
+        segment_id = 0
+        text_so_far = ""
+        with self.use_model(model_name, backend=OPENAI_WHISPER) as model:
+            for start, end in windows:
+                if should_stop is not None and should_stop():
+                    return
+                result = model.transcribe(
+                    audio[start:end],
+                    task=task,
+                    language=language,
+                    initial_prompt=text_so_far[-200:] or None,
+                    **options
+                )
+                language = language or result.get("language")
+                for segment in result.get("segments", []):
+                    segment = offset_segment(segment, start / SAMPLE_RATE)
+                    segment["id"] = segment_id
+                    segment_id += 1
+                    text_so_far += segment["text"]
+                    yield {
+                        "segment": segment,
+                        "language": language,
+                        "progress": round(end / total_samples, 4)
+                    }
+
+    async def stream_transcription(
+        self,
+        audio_path: Union[str, np.ndarray],
+        model_name: WhisperModel,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        duration: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[dict]:
+        """Async iterator over segments decoded on the inference scheduler.
+        
+        Cached results are replayed directly. If the consumer stops early the
+        decode loop stops at the next window boundary. ``duration`` (audio
+        seconds) sets the job's estimated cost for scheduling.
+        """
+        if content_hash:
+            cached = self.get_cached_result(
+                self.transcription_cache_key(content_hash, model_name, task, language, **kwargs)
+            )
+            if cached is not None:
+                segments = cached["segments"]
+                for index, segment in enumerate(segments):
+                    yield {
+                        "segment": segment,
+                        "language": cached["language"],
+                        "progress": round((index + 1) / len(segments), 4)
+                    }
+                return
+        
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def produce():
+            for event in self.iter_transcription(
+                audio_path, model_name, task, language, should_stop=stop.is_set, **kwargs
+            ):
+                if stop.is_set():
+                    return
+                loop.call_soon_threadsafe(events.put_nowait, event)
+        
+        def finished(future: asyncio.Future):
+            # Runs after every event queued by produce(), so the sentinel comes last
+            events.put_nowait(None)
+            if not future.cancelled():
+                future.exception()
+        
+        if duration is None and isinstance(audio_path, np.ndarray):
+            duration = len(audio_path) / SAMPLE_RATE
+        job = asyncio.ensure_future(self.scheduler.run(
+            produce, enforce_limit=False, cost=estimate_cost(duration, model_name.value)
+        ))
+        job.add_done_callback(finished)
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            # Surface errors raised by the decode loop
+            await job
+        finally:
+            stop.set()
+
+    def transcribe_and_translate(
+        self,
+        handle: AudioHandle,
+        model_name: WhisperModel,
+        language: Optional[str] = None,
+        translate: bool = True,
+        temperature: float = 0.0,
+        best_of: Optional[int] = None,
+        beam_size: Optional[int] = None
+    ) -> dict:
+        """Detect the language, transcribe and translate a stored upload.
+        
+        Each 30 s window of the handle's spectrogram is encoded once and both
+        tasks are decoded from it. The windows advance as /transcribe advances
+        them, so the transcription's segments and timestamps match it; the
+        language is detected once on the first 30 s.
+        """
+        with self.use_model(model_name, backend=OPENAI_WHISPER) as model:
+            mel = handle.mel(model.dims.n_mels)
+            probs = None
+            detected = "en"
+            if model.is_multilingual:
+                _, probs = model.detect_language(
+                    whisper.pad_or_trim(mel, N_FRAMES).to(model.device)
+                )
+                detected = max(probs, key=probs.get)
             
-            return {
-                "detected_language": detected_language,
-                "probabilities": probs
+            tasks = ["transcribe"]
+            if translate and model.is_multilingual:
+                tasks.append("translate")
+            options = {
+                "temperature": temperature,
+                "best_of": best_of,
+                "beam_size": beam_size,
+                "fp16": self.device == "cuda"
             }
-            
+            options = {k: v for k, v in options.items() if v is not None}
+            results = decode_tasks(model, mel, language or detected, tasks, **options)
+        return {
+            "language": detected,
+            "language_probabilities": probs,
+            "transcription": results["transcribe"],
+            "translation": results.get("translate"),
+            "whisper_model": model_name.value
+        }
+
+    async def run_transcribe_and_translate(
+        self,
+        handle: AudioHandle,
+        model_name: WhisperModel,
+        translate: bool = True,
+        **kwargs
+    ) -> dict:
+        """Run transcribe_and_translate on the inference scheduler."""
+        cost = estimate_cost(handle.duration, model_name.value) * combined_cost_factor(translate)
+        return await self.scheduler.run(
+            self.transcribe_and_translate,
+            handle,
+            model_name,
+            translate=translate,
+            cost=cost,
+            **kwargs
+        )
+
+    def transcribe_live(
+        self,
+        audio: np.ndarray,
+        model_name: WhisperModel,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> dict:
+        """Decode one live-captioning buffer, conditioned on the committed text."""
+        with self.use_model(model_name, backend=OPENAI_WHISPER) as model:
+            return model.transcribe(
+                audio,
+                language=language,
+                initial_prompt=prompt,
+                condition_on_previous_text=False,
+                temperature=0.0,
+                fp16=self.device == "cuda"
+            )
+
+    def detect_language(
+        self,
+        audio_path: Union[str, np.ndarray],
+        model_name: WhisperModel,
+        content_hash: Optional[str] = None
+    ) -> dict:
+        """Detect the language of the audio file."""
+        cache_key = None
+        if content_hash:
+            cache_key = ResultCache.make_key(
+                content_hash, model=model_name.value, task="detect-language"
+            )
+            cached = self.get_cached_result(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = self.detect_language_batch(model_name, [self.load_language_window(audio_path)])[0]
+        
+        if cache_key and self.result_cache is not None:
+            self.result_cache.put(cache_key, response)
+        return response
+
+    def load_language_window(
+        self, audio_path: Union[str, np.ndarray, AudioHandle]
+    ) -> Union[np.ndarray, AudioHandle]:
+        """The first 30 s of an audio file (or decoded PCM), padded to a full window.
+        
+        Upload handles are returned as they are; their cached spectrogram is used.
+        """
+        if isinstance(audio_path, AudioHandle):
+            return audio_path
+        return whisper.pad_or_trim(load_audio(audio_path))
+
+    def detect_language_batch(
+        self,
+        model_name: WhisperModel,
+        windows: List[Union[np.ndarray, AudioHandle]]
+    ) -> List[dict]:
+        """Detect the language of several 30 s windows in one encoder pass."""
+        try:
+            with self.use_model(model_name, backend=OPENAI_WHISPER) as model:
+                # Make log-Mel spectrograms and stack them into one batch
+                n_mels = model.dims.n_mels
+                mel = torch.stack([
+                    whisper.pad_or_trim(window.mel(n_mels), N_FRAMES)
+                    if isinstance(window, AudioHandle)
+                    else whisper.log_mel_spectrogram(window, n_mels=n_mels)
+                    for window in windows
+                ]).to(model.device)
+                
+                # Detect language; a batched mel yields one probability dict per window
+                _, probs = model.detect_language(mel)
+        
         except Exception as e:
             print(f"Error during language detection: {str(e)}")
             raise
+        
+        return [
+            {
+                "detected_language": max(window_probs, key=window_probs.get),
+                "probabilities": window_probs
+            }
+            for window_probs in probs
+        ]
+
+    def detect_language_single(
+        self,
+        model_name: WhisperModel,
+        window: Union[np.ndarray, AudioHandle],
+        backend: Optional[BackendName] = None
+    ) -> dict:
+        """Detect the language of one window on the backend's own detector."""
+        audio = window.audio if isinstance(window, AudioHandle) else window
+        with self.use_model(model_name, backend=backend) as model:
+            return self.backend(backend).detect_language(model, audio)
+
+    def _run_language_batch(self, model_key: str, windows: List[np.ndarray]):
+        """Schedule one batched language detection job for the micro-batcher."""
+        return self.scheduler.run(
+            self.detect_language_batch,
+            WhisperModel(model_key),
+            windows,
+            cost=estimate_cost(30.0 * len(windows), model_key)
+        )
+
+    async def run_language_detection(
+        self,
+        audio_path: Union[str, np.ndarray, AudioHandle],
+        model_name: WhisperModel,
+        content_hash: Optional[str] = None,
+        backend: Optional[BackendName] = None
+    ) -> dict:
+        """Detect language on the inference scheduler, sharing identical in-flight jobs.
+        
+        Concurrent requests for the same model are micro-batched into one
+        scheduler job with a single batched encoder pass, on backends that
+        support it.
+        """
+        engine = self.backend(backend)
+        job_key = None
+        if content_hash:
+            job_key = ResultCache.make_key(
+                content_hash, model=model_name.value, task="detect-language",
+                **({"backend": engine.name} if engine.name != "pytorch" else {})
+            )
+        
+        async def start():
+            # Only the first 30 s window is decoded
+            window = await asyncio.to_thread(self.load_language_window, audio_path)
+            if BATCHED_DECODING in engine.capabilities:
+                response = await self.language_batcher.submit(model_name.value, window)
+            else:
+                response = await self.scheduler.run(
+                    self.detect_language_single,
+                    model_name,
+                    window,
+                    backend,
+                    cost=estimate_cost(30.0, model_name.value)
+                )
+            if job_key and self.result_cache is not None:
+                self.result_cache.put(job_key, response)
+            return response
+        
+        if not job_key:
+            return await start()
+        
+        cached = self.get_cached_result(job_key)
+        if cached is not None:
+            return cached
+        return await self.coalescer.run(job_key, start)
 
 
 # Global instance
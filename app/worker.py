@@ -0,0 +1,268 @@
+"""Celery inference workers for ``/transcribe/async``.
+
+Run one or more workers next to (or away from) the API tier::
+
+    WORKER_MODELS=turbo celery -A app.worker worker --loglevel=info
+
+Each worker preloads the models in ``WORKER_MODELS``, consumes their
+``whisper.<model>`` queues plus the shared ``whisper.any`` queue, and
+advertises itself in Redis. The API routes a job to the model's queue when a
+live worker holds that model, otherwise to ``whisper.any``.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from celery import Celery
+from celery.signals import worker_ready, worker_shutdown
+from kombu import Queue
+
+from app.models import TaskStatus, WhisperModel
+from app.task_store import TaskStateConflictError
+from app.cancellation import JobCancelledError
+from app.config import get_settings
+
+
+settings = get_settings()
+
+ANY_MODEL_QUEUE = "whisper.any"
+
+
+def model_queue(model_name: str) -> str:
+    """Queue consumed by workers that hold ``model_name``."""
+    return f"whisper.{model_name}"
+
+
+def worker_model_names() -> List[str]:
+    """Models this worker declares, from WORKER_MODELS."""
+    names = [name.strip() for name in settings.worker_models.split(",") if name.strip()]
+    return [WhisperModel(name).value for name in names]
+
+
+celery_app = Celery("whisper_api", broker=settings.redis_url)
+celery_app.conf.update(
+    # Ack only after the job finishes so a crashed worker's job is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # One inference job per process; scale out with more worker processes
+    worker_pool="solo",
+    task_ignore_result=True,
+    task_default_queue=ANY_MODEL_QUEUE,
+    task_queues=[
+        Queue(name) for name in
+        [ANY_MODEL_QUEUE] + [model_queue(name) for name in worker_model_names()]
+    ],
+    # Must exceed the longest job or Redis redelivers it while it is still running
+    broker_transport_options={"visibility_timeout": settings.worker_visibility_timeout},
+    broker_connection_retry_on_startup=True,
+)
+
+
+class WorkerRegistry:
+    """Worker heartbeats and per-worker job counters kept in Redis.
+
+    A worker that stops sending heartbeats drops out after ``ttl`` seconds, so
+    jobs stop being routed to the queues only it was consuming.
+    """
+
+    COUNTERS = ("completed", "failed", "retried")
+
+    def __init__(self, client, prefix: str = "whisper", ttl: int = 60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, worker_id: str) -> str:
+        return f"{self.prefix}:worker:{worker_id}"
+
+    def heartbeat(self, worker_id: str, models: List[str]):
+        key = self._key(worker_id)
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hsetnx(key, "started_at", now)
+        pipe.hset(key, mapping={"models": ",".join(models), "last_seen": now})
+        pipe.expire(key, self.ttl)
+        pipe.sadd(f"{self.prefix}:workers", worker_id)
+        pipe.execute()
+
+    def record(self, worker_id: str, outcome: str, seconds: float):
+        """Count a finished attempt and the time spent on it."""
+        key = self._key(worker_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hincrby(key, outcome, 1)
+        pipe.hincrbyfloat(key, "busy_seconds", seconds)
+        pipe.execute()
+
+    def remove(self, worker_id: str):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key(worker_id))
+        pipe.srem(f"{self.prefix}:workers", worker_id)
+        pipe.execute()
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """Live workers with their models and throughput."""
+        now = time.time()
+        workers = []
+        for raw_id in sorted(self.client.smembers(f"{self.prefix}:workers")):
+            worker_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            data = {
+                (k.decode() if isinstance(k, bytes) else k):
+                (v.decode() if isinstance(v, bytes) else v)
+                for k, v in self.client.hgetall(self._key(worker_id)).items()
+            }
+            if "last_seen" not in data:
+                # Heartbeat expired; forget the worker
+                self.client.srem(f"{self.prefix}:workers", worker_id)
+                continue
+            uptime = max(now - float(data.get("started_at", now)), 1e-6)
+            counts = {name: int(data.get(name, 0)) for name in self.COUNTERS}
+            busy_seconds = float(data.get("busy_seconds", 0))
+            workers.append({
+                "worker_id": worker_id,
+                "models": [name for name in data.get("models", "").split(",") if name],
+                "last_seen_seconds_ago": round(now - float(data["last_seen"]), 1),
+                **counts,
+                "jobs_per_minute": round(counts["completed"] * 60 / uptime, 3),
+                "busy_ratio": round(min(1.0, busy_seconds / uptime), 3)
+            })
+        return workers
+
+    def holders(self, model_name: str) -> List[str]:
+        """Live workers that declared ``model_name``."""
+        return [
+            worker["worker_id"] for worker in self.workers()
+            if model_name in worker["models"]
+        ]
+
+
+_registry: Optional[WorkerRegistry] = None
+
+
+def get_registry() -> WorkerRegistry:
+    global _registry
+    if _registry is None:
+        import redis
+        _registry = WorkerRegistry(
+            redis.Redis.from_url(settings.redis_url),
+            ttl=settings.worker_heartbeat_seconds * 4
+        )
+    return _registry
+
+
+def queue_depths(client=None) -> Dict[str, int]:
+    """Jobs waiting in each broker queue."""
+    client = client or get_registry().client
+    names = [ANY_MODEL_QUEUE] + [model_queue(model.value) for model in WhisperModel]
+    return {name: client.llen(name) for name in names}
+
+
+def route_transcription(model_name: str, registry: Optional[WorkerRegistry] = None) -> str:
+    """Queue for a job on ``model_name``: a holder's queue if one is alive."""
+    registry = registry or get_registry()
+    if registry.holders(model_name):
+        return model_queue(model_name)
+    return ANY_MODEL_QUEUE
+
+
+def enqueue_transcription(task_id: str, file_path: str, options: Dict[str, Any]) -> str:
+    """Publish a transcription job and return the queue it went to."""
+    queue = route_transcription(options["model"])
+    transcribe.apply_async(args=(task_id, file_path, options), queue=queue)
+    return queue
+
+
+# Reused across jobs so the service's coalescer and scheduler see one loop
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(bind=True, name="whisper.transcribe", max_retries=settings.worker_max_retries)
+def transcribe(self, task_id: str, file_path: str, options: Dict[str, Any]):
+    """Run one async transcription task and store its outcome."""
+    from app.jobs import (
+        claim_task, complete_task, fail_task, remove_upload, run_task_job, stop_task
+    )
+
+    worker_id = self.request.hostname or "local"
+    try:
+        # A PROCESSING task here is a retry or a redelivery after a worker died
+        claim_task(task_id, claimable=(TaskStatus.PENDING, TaskStatus.PROCESSING))
+    except TaskStateConflictError as e:
+        print(f"Skipping task {task_id}: {e}")
+        return
+
+    if not os.path.exists(file_path):
+        # Retrying cannot help; the upload directory is not shared with this worker
+        fail_task(task_id, "Uploaded audio is not available to the worker")
+        return
+
+    start_time = time.time()
+    try:
+        response = _run(run_task_job(task_id, file_path, options))
+    except JobCancelledError as e:
+        # Cancelled through the API or past its deadline; not worth retrying
+        stop_task(task_id, e)
+        remove_upload(file_path)
+        return
+    except Exception as e:
+        elapsed = time.time() - start_time
+        if self.request.retries < self.max_retries:
+            print(f"Task {task_id} attempt {self.request.retries + 1} failed: {e}; retrying")
+            get_registry().record(worker_id, "retried", elapsed)
+            raise self.retry(
+                exc=e, countdown=settings.worker_retry_delay * 2 ** self.request.retries
+            )
+        get_registry().record(worker_id, "failed", elapsed)
+        fail_task(task_id, str(e))
+        remove_upload(file_path)
+        return
+
+    get_registry().record(worker_id, "completed", time.time() - start_time)
+    complete_task(task_id, response)
+    remove_upload(file_path)
+
+
+_heartbeat_stop = threading.Event()
+
+
+@worker_ready.connect
+def on_worker_ready(sender=None, **kwargs):
+    """Preload the declared models, then start advertising them."""
+    from app.whisper_service import whisper_service
+
+    worker_id = sender.hostname
+    models = worker_model_names()
+    for name in models:
+        status = whisper_service.prepare_model(
+            WhisperModel(name), warmup=settings.warmup_enabled
+        )
+        print(f"Worker {worker_id} preloaded {name}: {status['state']}")
+
+    def beat():
+        while not _heartbeat_stop.is_set():
+            try:
+                get_registry().heartbeat(worker_id, models)
+            except Exception as e:
+                print(f"Worker heartbeat failed: {str(e)}")
+            _heartbeat_stop.wait(settings.worker_heartbeat_seconds)
+
+    threading.Thread(target=beat, name="whisper-worker-heartbeat", daemon=True).start()
+
+
+@worker_shutdown.connect
+def on_worker_shutdown(sender=None, **kwargs):
+    _heartbeat_stop.set()
+    if sender is not None:
+        try:
+            get_registry().remove(sender.hostname)
+        except Exception as e:
+            print(f"Worker deregistration failed: {str(e)}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+音訊解碼基準測試
+比較 WAV 原生解析 (app.audio.load_audio) 與 ffmpeg 子行程 (whisper.load_audio)
+在短音檔上的每次請求解碼延遲
+
+用法: python benchmarks/bench_audio_decode.py [--runs 20] [--file test_audio.wav]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+import whisper
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.audio import load_audio  # noqa: E402
+
+
+def write_clip(path: str, seconds: float, rate: int, channels: int):
+    """寫入一段帶雜訊的正弦波 PCM WAV"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    frames = np.repeat(tone[:, None], channels, axis=1)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((frames * 32767).astype("<i2").tobytes())
+
+
+def median_ms(fn, path: str, runs: int) -> float:
+    fn(path)  # 預熱
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(path)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WAV 原生解碼 vs ffmpeg 基準測試")
+    parser.add_argument("--runs", type=int, default=20, help="每個音檔的重複次數")
+    parser.add_argument("--file", action="append", default=[], help="額外測試的音檔")
+    args = parser.parse_args()
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("⚠️  找不到 ffmpeg，只量測原生解析")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = []
+        for seconds, rate, channels in [
+            (1, 16000, 1), (5, 16000, 1), (15, 16000, 1), (30, 16000, 1),
+            (5, 44100, 2), (5, 48000, 1), (5, 8000, 1),
+        ]:
+            path = os.path.join(tmp, f"{seconds}s_{rate}hz_{channels}ch.wav")
+            write_clip(path, seconds, rate, channels)
+            cases.append((os.path.basename(path), path))
+        cases += [(os.path.basename(path), path) for path in args.file]
+
+        print(f"{'音檔':<24}{'原生 (ms)':>12}{'ffmpeg (ms)':>14}{'加速':>10}")
+        for name, path in cases:
+            native = median_ms(load_audio, path, args.runs)
+            if has_ffmpeg:
+                ffmpeg = median_ms(whisper.load_audio, path, args.runs)
+                print(f"{name:<24}{native:>12.2f}{ffmpeg:>14.2f}{ffmpeg / native:>9.1f}x")
+            else:
+                print(f"{name:<24}{native:>12.2f}{'-':>14}{'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
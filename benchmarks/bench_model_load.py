@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+模型冷啟動基準測試
+比較從官方檢查點 (fp16，載入時轉為 fp32 私有副本) 與記憶體映射的預轉換 fp32 權重
+載入模型的時間，以及多個 worker 行程同時常駐同一模型時每個行程的記憶體。
+
+每種方式同時啟動 --processes 個行程，各自載入模型並轉錄 1 秒靜音 (讓權重頁面實際載入)，
+再讀取 /proc/self/smaps_rollup：shared 為與其他行程共用的頁面，PSS 將共用頁面按行程數分攤。
+預轉換權重不存在時會先以 download_models.py 相同的方式轉換。
+
+用法: python benchmarks/bench_model_load.py [--model base] [--processes 2]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.weights import convert_checkpoint, mmap_path, process_memory  # noqa: E402
+
+METHODS = ["checkpoint", "mmap"]
+
+
+def load_and_measure(method, model, cache_dir, ready, results):
+    import numpy as np
+    import whisper
+
+    from app.audio import SAMPLE_RATE
+    from app.weights import load_mmap
+
+    start = time.perf_counter()
+    if method == "mmap":
+        loaded = load_mmap(model, "cpu", cache_dir)
+    else:
+        loaded = whisper.load_model(model, device="cpu", download_root=cache_dir)
+    load_seconds = time.perf_counter() - start
+    loaded.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), fp16=False, temperature=0.0)
+
+    # 等所有行程載入完成後再量測，共用頁面才會計入
+    ready.wait()
+    results.put({"load_seconds": load_seconds, **process_memory()})
+    ready.wait()
+
+
+def run(method, args):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(args.processes)
+    results = context.Queue()
+    workers = [
+        context.Process(target=load_and_measure, args=(method, args.model, args.cache_dir, ready, results))
+        for _ in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    rows = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="檢查點 vs 記憶體映射權重的冷啟動基準測試")
+    parser.add_argument("--model", default="base", help="Whisper 模型名稱")
+    parser.add_argument("--processes", type=int, default=2, help="同時載入模型的行程數")
+    parser.add_argument("--cache-dir", default=os.getenv("CACHE_DIR", "./models"))
+    args = parser.parse_args()
+
+    if not os.path.exists(mmap_path(args.cache_dir, args.model)):
+        print(f"🔄 轉換 {args.model} 為記憶體映射格式...")
+        convert_checkpoint(args.model, args.cache_dir)
+
+    # 先讀一次兩種檔案，讓兩種方式都從頁面快取讀取，比較的是載入而非磁碟
+    for path in [os.path.join(args.cache_dir, f"{args.model}.pt"), mmap_path(args.cache_dir, args.model)]:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                while f.read(1 << 24):
+                    pass
+
+    print(f"模型 {args.model}，每種方式 {args.processes} 個行程\n")
+    print(f"{'方式':<12}{'載入 (s)':>10}{'RSS (MB)':>12}{'PSS (MB)':>12}{'共用 (MB)':>12}{'私有 (MB)':>12}")
+    summary = {}
+    for method in METHODS:
+        rows = run(method, args)
+
+        def median(key):
+            values = [row[key] for row in rows if key in row]
+            return statistics.median(values) if values else float("nan")
+
+        summary[method] = {key: median(key) for key in ["load_seconds", "rss", "pss", "shared", "private"]}
+        mb = {key: value / (1024 * 1024) for key, value in summary[method].items() if key != "load_seconds"}
+        print(f"{method:<12}{summary[method]['load_seconds']:>10.2f}{mb['rss']:>12.1f}"
+              f"{mb['pss']:>12.1f}{mb['shared']:>12.1f}{mb['private']:>12.1f}")
+
+    checkpoint, mapped = summary["checkpoint"], summary["mmap"]
+    print(f"\n載入加速: {checkpoint['load_seconds'] / mapped['load_seconds']:.1f}x，"
+          f"每行程 PSS 減少: {(checkpoint['pss'] - mapped['pss']) / (1024 * 1024):.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
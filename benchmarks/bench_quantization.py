@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+int8 動態量化基準測試
+比較 fp32 與 int8 (Linear 層動態量化) 模型在 CPU 上的即時率 (RTF)、記憶體與詞錯誤率差異
+
+RTF = 處理秒數 / 音檔秒數 (越小越快)。WER 以 fp32 的轉錄為參考；
+若提供 --reference 參考文字，另外列出兩者相對參考文字的 WER。
+中文、日文等不以空白分詞的語言以字元計算。
+
+用法: python benchmarks/bench_quantization.py [--model base] [--runs 3] [--file test_audio.wav]
+"""
+
+import argparse
+import gc
+import os
+import re
+import statistics
+import sys
+import time
+
+import torch
+import whisper
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.audio import SAMPLE_RATE, load_audio  # noqa: E402
+from app.model_pool import model_memory_bytes  # noqa: E402
+from app.quantization import load_quantized, quantized_path  # noqa: E402
+
+# 不以空白分詞的語言 (同 whisper 的 tokenizer)
+UNSPACED_LANGUAGES = {"zh", "ja", "th", "lo", "my", "yue"}
+
+
+def rss_bytes():
+    """目前行程的常駐記憶體 (僅 Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def tokens(text: str, language: str):
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    if language in UNSPACED_LANGUAGES:
+        return [char for char in text if not char.isspace()]
+    return text.split()
+
+
+def word_error_rate(reference, hypothesis) -> float:
+    """以編輯距離計算的錯誤率 (替換 + 刪除 + 插入) / 參考長度"""
+    if not reference:
+        return float(bool(hypothesis))
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i]
+        for j, hyp in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def measure(model, audio, runs: int):
+    """回傳 (最後一次結果, RTF 中位數)"""
+    options = {"fp16": False, "temperature": 0.0, "beam_size": 5}
+    model.transcribe(audio[:SAMPLE_RATE], **options)  # 預熱
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = model.transcribe(audio, **options)
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings) / (len(audio) / SAMPLE_RATE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 量化模型基準測試")
+    parser.add_argument("--model", default="base", help="Whisper 模型名稱")
+    parser.add_argument("--runs", type=int, default=3, help="每種精度的轉錄次數")
+    parser.add_argument("--file", default="test_audio.wav", help="測試音檔")
+    parser.add_argument("--reference", help="參考文字檔 (選用)")
+    parser.add_argument("--cache-dir", default=os.getenv("CACHE_DIR", "./models"))
+    args = parser.parse_args()
+
+    audio = load_audio(args.file)
+    print(f"🎧 {args.file}: {len(audio) / SAMPLE_RATE:.1f}s，模型 {args.model}，"
+          f"{torch.get_num_threads()} 執行緒")
+
+    rows = []
+    results = {}
+    for precision in ["fp32", "int8"]:
+        gc.collect()
+        before = rss_bytes()
+        start = time.perf_counter()
+        if precision == "fp32":
+            model = whisper.load_model(args.model, device="cpu", download_root=args.cache_dir)
+        else:
+            cached = os.path.exists(quantized_path(args.cache_dir, args.model))
+            model = load_quantized(args.model, args.cache_dir)
+        load_seconds = time.perf_counter() - start
+        after = rss_bytes()
+
+        result, rtf = measure(model, audio, args.runs)
+        results[precision] = result
+        rows.append((
+            precision + (" (快取)" if precision == "int8" and cached else ""),
+            load_seconds,
+            model_memory_bytes(model) / (1024 * 1024),
+            (after - before) / (1024 * 1024) if before and after else float("nan"),
+            rtf
+        ))
+        del model
+
+    print(f"\n{'精度':<14}{'載入 (s)':>10}{'權重 (MB)':>12}{'RSS 增加 (MB)':>16}{'RTF':>10}")
+    for name, load_seconds, weights, rss, rtf in rows:
+        print(f"{name:<14}{load_seconds:>10.2f}{weights:>12.1f}{rss:>16.1f}{rtf:>10.3f}")
+    print(f"速度提升: {rows[0][4] / rows[1][4]:.2f}x，權重縮小: {rows[0][2] / rows[1][2]:.2f}x")
+
+    language = results["fp32"].get("language") or ""
+    fp32_tokens = tokens(results["fp32"]["text"], language)
+    int8_tokens = tokens(results["int8"]["text"], language)
+    print(f"\nint8 相對 fp32 的 WER: {word_error_rate(fp32_tokens, int8_tokens):.2%}")
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = tokens(f.read(), language)
+        fp32_wer = word_error_rate(reference, fp32_tokens)
+        int8_wer = word_error_rate(reference, int8_tokens)
+        print(f"參考文字 WER: fp32 {fp32_wer:.2%}，int8 {int8_wer:.2%}，"
+              f"差異 {int8_wer - fp32_wer:+.2%}")
+
+    print(f"\nfp32: {results['fp32']['text'].strip()[:200]}")
+    print(f"int8: {results['int8']['text'].strip()[:200]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import os
 import sys
 from pathlib import Path
 
+from app.weights import convert_checkpoint, mmap_path
+
 # 設置模型緩存目錄
 MODELS_DIR = Path("./models")
 MODELS_DIR.mkdir(exist_ok=True)
@@ -53,7 +55,7 @@ def download_model(model_name):
     
     try:
         # 使用 whisper.load_model 下載並緩存模型
-        model = whisper.load_model(model_name, download_root=str(MODELS_DIR))
+        model = whisper.load_model(model_name, device="cpu", download_root=str(MODELS_DIR))
         print(f"✅ 模型 '{model_name}' 下載完成")
         
         # 檢查下載的文件大小
@@ -62,11 +64,31 @@ def download_model(model_name):
             size_mb = model_file.stat().st_size / (1024 * 1024)
             print(f"   文件大小: {size_mb:.1f}MB")
         
+        convert_model(model_name, model)
         return True
     except Exception as e:
         print(f"❌ 下載模型 '{model_name}' 失敗: {str(e)}")
         return False
 
+def convert_model(model_name, model=None):
+    """轉換為可記憶體映射的 fp32 權重 (models/mmap/)，多個 worker 行程可共用同一份實體記憶體"""
+    try:
+        path = convert_checkpoint(model_name, str(MODELS_DIR), model)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"🗺️  已轉換為記憶體映射格式: {path} ({size_mb:.1f}MB)")
+        return True
+    except Exception as e:
+        print(f"❌ 轉換模型 '{model_name}' 失敗: {str(e)}")
+        return False
+
+def convert_existing_models(existing_models):
+    """為已下載但尚未轉換的模型產生記憶體映射權重"""
+    for model_name in existing_models:
+        if os.path.exists(mmap_path(str(MODELS_DIR), model_name)):
+            print(f"ℹ️  模型 '{model_name}' 已轉換")
+        else:
+            convert_model(model_name)
+
 def download_recommended_models():
     """下載推薦的模型組合"""
     recommended = ["tiny", "base", "small", "turbo", "large"]
@@ -105,6 +127,8 @@ def main():
                     print()
         elif sys.argv[1] == "recommended":
             download_recommended_models()
+        elif sys.argv[1] == "convert":
+            convert_existing_models(existing_models)
         elif sys.argv[1] in AVAILABLE_MODELS:
             model_name = sys.argv[1]
             if model_name in existing_models:
@@ -113,7 +137,7 @@ def main():
                 download_model(model_name)
         else:
             print(f"❌ 未知參數: {sys.argv[1]}")
-            print("用法: python download_models.py [模型名稱|all|recommended]")
+            print("用法: python download_models.py [模型名稱|all|recommended|convert]")
     else:
         # 互動模式
         print("請選擇操作:")
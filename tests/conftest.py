@@ -0,0 +1,63 @@
+import io
+import time
+import wave
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from app.audio import SAMPLE_RATE
+from app import main
+from app.whisper_service import whisper_service
+
+
+def wav_bytes(seconds: float = 1.0, seed: int = 0, level: Optional[float] = None) -> bytes:
+    """16 kHz mono int16 WAV of seeded noise, or of a constant ``level`` if given."""
+    count = int(seconds * SAMPLE_RATE)
+    if level is None:
+        samples = np.random.default_rng(seed).uniform(-0.3, 0.3, count)
+    else:
+        samples = np.full(count, level)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def wait_for_idle_scheduler(timeout: float = 5.0):
+    """Wait until no inference job is running, e.g. an abandoned decode loop."""
+    deadline = time.time() + timeout
+    while whisper_service.scheduler.stats()["running"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def service_models(monkeypatch, tmp_path):
+    """Install a fake model loader on the shared service: ``service_models(factory)``.
+
+    ``factory(key)`` builds the model for each pool key once. Uploads and
+    upload handles are spooled to ``tmp_path``. Afterwards running jobs are
+    allowed to stop and every model loaded is evicted, so later tests load
+    their own.
+    """
+    loaded = {}
+
+    def install(factory):
+        def loader(key):
+            if key not in loaded:
+                loaded[key] = factory(key)
+            return loaded[key]
+
+        monkeypatch.setattr(whisper_service.model_pool, "loader", loader)
+        return loaded
+
+    # get_settings() builds a new Settings each call; patch the one main reads
+    monkeypatch.setattr(main.settings, "temp_dir", str(tmp_path))
+    monkeypatch.setattr(whisper_service.audio_handles, "directory", str(tmp_path / "uploads"))
+    yield install
+    wait_for_idle_scheduler()
+    for key in list(loaded):
+        whisper_service.model_pool.evict(key)
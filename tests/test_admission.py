@@ -0,0 +1,144 @@
+import os
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdmissionController, AdmissionRejected
+from app.models import TaskStatus
+from tests.conftest import wav_bytes
+
+
+def test_capacity_rejects_with_drain_time():
+    """Work beyond capacity is refused until outstanding compute is released."""
+    controller = AdmissionController(capacity_seconds=100, workers=2)
+    first = controller.admit("a", audio_seconds=600, compute_seconds=80)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.admit("b", audio_seconds=300, compute_seconds=40)
+    assert exc_info.value.status_code == 503
+    # 20 s over capacity drains in 10 s on two workers
+    assert exc_info.value.retry_after == 10
+
+    controller.release(first)
+    controller.release(first)
+    controller.admit("b", audio_seconds=300, compute_seconds=40)
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["outstanding_seconds"]) == (1, 40)
+    assert stats["rejected_capacity"] == 1
+
+
+def test_oversized_request_runs_alone():
+    """A request larger than the whole capacity is admitted on an idle server."""
+    controller = AdmissionController(capacity_seconds=100)
+    big = controller.admit("a", audio_seconds=10800, compute_seconds=1000)
+    with pytest.raises(AdmissionRejected):
+        controller.admit("b", audio_seconds=10, compute_seconds=1)
+    controller.release(big)
+    controller.admit("b", audio_seconds=10, compute_seconds=1)
+
+
+def test_quota_counts_audio_seconds_per_client(monkeypatch):
+    """Clients are limited by audio seconds in a sliding window, not request count."""
+    now = [1000.0]
+    monkeypatch.setattr("app.admission.time.time", lambda: now[0])
+    controller = AdmissionController(
+        capacity_seconds=0, quota_audio_seconds=600, quota_window_seconds=3600
+    )
+    controller.admit("a", audio_seconds=400, compute_seconds=1)
+    now[0] += 100
+    controller.admit("a", audio_seconds=150, compute_seconds=1)
+    controller.admit("b", audio_seconds=600, compute_seconds=1)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.admit("a", audio_seconds=100, compute_seconds=1)
+    assert exc_info.value.status_code == 429
+    # The first 400 s ages out 3600 s after it was admitted
+    assert exc_info.value.retry_after == 3500
+
+    now[0] += 3500
+    controller.admit("a", audio_seconds=100, compute_seconds=1)
+    assert controller.stats()["clients"]["a"] == 250
+
+
+def test_endpoint_returns_429_and_discards_upload(monkeypatch, tmp_path):
+    """A request over its client's quota is refused before any inference."""
+    monkeypatch.setattr(main.settings, "temp_dir", str(tmp_path))
+    monkeypatch.setattr(
+        main, "admission", AdmissionController(capacity_seconds=0, quota_audio_seconds=10)
+    )
+    client = TestClient(main.app)
+    response = client.post(
+        "/transcribe",
+        files={"file": ("clip.wav", b"RIFF-quota", "audio/wav")},
+        headers={"X-API-Key": "team-a"},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert os.listdir(tmp_path) == []
+    assert main.admission.stats()["rejected_quota"] == 1
+
+
+def request_from(headers, peer="198.51.100.1"):
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": (peer, 40000),
+    })
+
+
+def test_client_id_ignores_spoofable_headers(monkeypatch):
+    """Quotas key on nginx's X-Real-IP or a configured API key, never on client-chosen values."""
+    monkeypatch.setattr(main, "quota_api_keys", {"team-a"})
+    real_ip = {"X-Real-IP": "203.0.113.7"}
+    assert main.client_id(request_from({**real_ip, "X-Forwarded-For": "1.1.1.1, 203.0.113.7"})) == \
+        main.client_id(request_from({**real_ip, "X-Forwarded-For": "2.2.2.2, 203.0.113.7"})) == \
+        main.client_id(request_from({**real_ip, "X-API-Key": "invented"})) == "203.0.113.7"
+
+    key_id = main.client_id(request_from({**real_ip, "X-API-Key": "team-a"}))
+    assert key_id.startswith("key:") and "team-a" not in key_id
+
+    monkeypatch.setattr(main.settings, "trust_proxy_headers", False)
+    assert main.client_id(request_from(real_ip)) == "198.51.100.1"
+
+
+def test_celery_handoff_releases_the_ticket(monkeypatch, tmp_path):
+    """Work handed to celery workers no longer counts as in flight on the API process."""
+    monkeypatch.setattr(main.settings, "temp_dir", str(tmp_path))
+    monkeypatch.setattr(main.settings, "task_queue", "celery")
+    monkeypatch.setattr(main.worker, "enqueue_transcription", lambda task_id, path, options: "celery")
+    monkeypatch.setattr(main, "admission", AdmissionController(capacity_seconds=100))
+    client = TestClient(main.app)
+    response = client.post(
+        "/transcribe/async", files={"file": ("clip.wav", wav_bytes(), "audio/wav")}
+    )
+    assert response.status_code == 200
+    stats = main.admission.stats()
+    assert (stats["admitted"], stats["in_flight"]) == (1, 0)
+    main.task_store.delete(response.json()["task_id"])
+
+
+def test_failed_celery_handoff_fails_the_task(monkeypatch, tmp_path):
+    """An unreachable broker answers 503, fails the task and deletes its upload."""
+    enqueued = []
+
+    def enqueue(task_id, path, options):
+        enqueued.append(task_id)
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(main.settings, "temp_dir", str(tmp_path))
+    monkeypatch.setattr(main.settings, "task_queue", "celery")
+    monkeypatch.setattr(main.worker, "enqueue_transcription", enqueue)
+    monkeypatch.setattr(main, "admission", AdmissionController(capacity_seconds=100))
+    client = TestClient(main.app)
+    response = client.post(
+        "/transcribe/async", files={"file": ("clip.wav", wav_bytes(), "audio/wav")}
+    )
+    assert response.status_code == 503
+    task = main.task_store.get(enqueued[0])
+    assert task.status == TaskStatus.FAILED
+    assert "broker down" in task.error
+    assert list(tmp_path.iterdir()) == []
+    assert main.admission.stats()["in_flight"] == 0
+    main.task_store.delete(enqueued[0])
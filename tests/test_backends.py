@@ -0,0 +1,276 @@
+"""Contract tests: every backend turns the same engine output into the same result.
+
+Each backend gets a fake of its engine that renders one shared fixture (an
+utterance and language probabilities) in that engine's native format.
+"""
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.audio import SAMPLE_RATE
+from app.backends import BACKENDS, FasterWhisperBackend, PyTorchBackend, get_backend
+from app.backends.base import CASCADE, LONG_AUDIO
+from app.models import BackendName, WhisperModel
+from app.whisper_service import whisper_service
+from tests.conftest import wav_bytes
+
+client = TestClient(main.app)
+
+UTTERANCE = [
+    {"start": 0.0, "end": 1.5, "text": " Hello there.", "avg_logprob": -0.2,
+     "compression_ratio": 1.1, "no_speech_prob": 0.01,
+     "words": [("Hello", 0.0, 0.6, 0.9), ("there.", 0.7, 1.5, 0.8)]},
+    {"start": 1.5, "end": 3.0, "text": " General Kenobi.", "avg_logprob": -0.4,
+     "compression_ratio": 1.3, "no_speech_prob": 0.02,
+     "words": [("General", 1.5, 2.1, 0.7), ("Kenobi.", 2.2, 3.0, 0.6)]},
+]
+LANGUAGE_PROBS = {"en": 0.7, "de": 0.2, "fr": 0.1}
+
+
+class FakeWhisperModel:
+    """openai-whisper's model API."""
+
+    dims = SimpleNamespace(n_mels=80)
+    device = "cpu"
+
+    def __init__(self):
+        self.options = None
+
+    def transcribe(self, audio, **options):
+        self.options = options
+        words = options.get("word_timestamps", False)
+        segments = []
+        for i, source in enumerate(UTTERANCE):
+            segment = {
+                "id": i, "seek": 0, "tokens": [1, 2], "temperature": 0.0,
+                **{k: v for k, v in source.items() if k != "words"}
+            }
+            if words:
+                segment["words"] = [
+                    {"word": w, "start": s, "end": e, "probability": p}
+                    for w, s, e, p in source["words"]
+                ]
+            segments.append(segment)
+        return {
+            "text": "".join(s["text"] for s in UTTERANCE),
+            "language": options.get("language") or "en",
+            "segments": segments
+        }
+
+    def detect_language(self, mel):
+        assert tuple(mel.shape[-2:]) == (80, 3000)
+        if mel.ndim == 3:
+            return None, [dict(LANGUAGE_PROBS) for _ in range(mel.shape[0])]
+        return None, dict(LANGUAGE_PROBS)
+
+
+class FakeFasterWhisperModel:
+    """faster-whisper's WhisperModel API: lazy segments and an info object."""
+
+    def __init__(self):
+        self.options = None
+
+    def transcribe(
+        self, audio, language=None, task="transcribe", beam_size=5, best_of=5,
+        temperature=0.0, log_prob_threshold=-1.0, no_speech_threshold=0.6,
+        compression_ratio_threshold=2.4, condition_on_previous_text=True,
+        initial_prompt=None, word_timestamps=False
+    ):
+        self.options = dict(
+            language=language, task=task, beam_size=beam_size, temperature=temperature,
+            log_prob_threshold=log_prob_threshold, initial_prompt=initial_prompt
+        )
+
+        def segments():
+            for i, source in enumerate(UTTERANCE):
+                yield SimpleNamespace(
+                    id=i + 1, seek=0, tokens=[1, 2], temperature=0.0,
+                    words=[
+                        SimpleNamespace(word=w, start=s, end=e, probability=p)
+                        for w, s, e, p in source["words"]
+                    ] if word_timestamps else None,
+                    **{k: v for k, v in source.items() if k != "words"}
+                )
+
+        info = SimpleNamespace(language=language or "en", language_probability=0.7)
+        return segments(), info
+
+    def detect_language(self, audio):
+        ranked = sorted(LANGUAGE_PROBS.items(), key=lambda item: -item[1])
+        return ranked[0][0], ranked[0][1], ranked
+
+
+ENGINES = {"pytorch": FakeWhisperModel, "faster-whisper": FakeFasterWhisperModel}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return BACKENDS[request.param], ENGINES[request.param]()
+
+
+def test_every_backend_has_a_contract_fake():
+    assert set(ENGINES) == set(BACKENDS) == {name.value for name in BackendName}
+
+
+def test_transcribe_contract(backend):
+    engine, model = backend
+    audio = np.zeros(3 * SAMPLE_RATE, dtype=np.float32)
+    result = engine.transcribe(
+        model, audio, task="transcribe", language="en", temperature=0.0, beam_size=5,
+        fp16=False, logprob_threshold=-1.0, initial_prompt="Star Wars"
+    )
+
+    assert result["text"] == " Hello there. General Kenobi."
+    assert result["language"] == "en"
+    assert [(s["id"], s["start"], s["end"], s["text"]) for s in result["segments"]] == [
+        (0, 0.0, 1.5, " Hello there."), (1, 1.5, 3.0, " General Kenobi.")
+    ]
+    for segment in result["segments"]:
+        for key in ("seek", "tokens", "temperature", "avg_logprob",
+                    "compression_ratio", "no_speech_prob"):
+            assert key in segment
+        assert "words" not in segment
+    assert model.options["initial_prompt"] == "Star Wars"
+
+
+def test_word_timestamps_contract(backend):
+    engine, model = backend
+    result = engine.transcribe(model, np.zeros(SAMPLE_RATE, dtype=np.float32), word_timestamps=True)
+    assert result["segments"][1]["words"] == [
+        {"word": "General", "start": 1.5, "end": 2.1, "probability": 0.7},
+        {"word": "Kenobi.", "start": 2.2, "end": 3.0, "probability": 0.6},
+    ]
+
+
+def test_detect_language_contract(backend):
+    engine, model = backend
+    result = engine.detect_language(model, np.zeros(5 * SAMPLE_RATE, dtype=np.float32))
+    assert result == {"detected_language": "en", "probabilities": LANGUAGE_PROBS}
+
+
+def test_only_pytorch_supports_service_features():
+    assert {LONG_AUDIO, CASCADE} <= PyTorchBackend.capabilities
+    assert not {LONG_AUDIO, CASCADE} & FasterWhisperBackend.capabilities
+    with pytest.raises(ValueError):
+        get_backend("onnx")
+
+
+def test_faster_whisper_compute_types(monkeypatch, tmp_path):
+    """int8 keys map to CTranslate2's int8 compute types on CPU and GPU."""
+    created = []
+    module = SimpleNamespace(WhisperModel=lambda name, **kwargs: created.append((name, kwargs)))
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    engine = FasterWhisperBackend()
+    engine.load("small:int8", "cpu", str(tmp_path))
+    engine.load("small", "cuda", str(tmp_path))
+    engine.load("small:int8", "cuda", str(tmp_path))
+    assert [(name, kwargs["compute_type"]) for name, kwargs in created] == [
+        ("small", "int8"), ("small", "float16"), ("small", "int8_float16")
+    ]
+    assert created[0][1]["download_root"] == str(tmp_path / "faster-whisper")
+
+
+@pytest.fixture
+def both_backends(monkeypatch, service_models):
+    monkeypatch.setattr(FasterWhisperBackend, "available", lambda self: True)
+    return service_models(
+        lambda key: FakeFasterWhisperModel() if key.startswith("faster-whisper/") else FakeWhisperModel()
+    )
+
+
+def test_service_routes_requests_by_backend(both_backends):
+    """Both backends answer the same request; results are cached per backend."""
+    bodies = {}
+    for name in ("pytorch", "faster-whisper"):
+        response = client.post(
+            "/transcribe",
+            files={"file": ("clip.wav", wav_bytes(seed=11), "audio/wav")},
+            data={"model": "tiny", "backend": name},
+        )
+        assert response.status_code == 200
+        bodies[name] = response.json()
+    assert sorted(both_backends) == ["faster-whisper/tiny", "tiny"]
+    assert bodies["pytorch"]["backend"] == "pytorch"
+    assert bodies["faster-whisper"]["backend"] == "faster-whisper"
+    assert bodies["pytorch"]["segments"] == bodies["faster-whisper"]["segments"]
+
+    key = whisper_service.transcription_cache_key
+    assert key("abc", WhisperModel.TINY) == key("abc", WhisperModel.TINY, backend=BackendName.PYTORCH)
+    assert key("abc", WhisperModel.TINY) != key(
+        "abc", WhisperModel.TINY, backend=BackendName.FASTER_WHISPER
+    )
+
+    detected = client.post(
+        "/detect-language",
+        files={"file": ("clip.wav", wav_bytes(seed=11), "audio/wav")},
+        data={"model": "tiny", "backend": "faster-whisper"},
+    )
+    assert detected.json() == {"detected_language": "en", "probabilities": LANGUAGE_PROBS}
+
+    rejected = client.post(
+        "/transcribe",
+        files={"file": ("clip.wav", wav_bytes(seed=11), "audio/wav")},
+        data={"model": "tiny", "backend": "faster-whisper", "long_audio": "true"},
+    )
+    assert rejected.status_code == 400
+
+    listing = client.get("/models").json()
+    assert listing["default_backend"] == "pytorch"
+    assert "cascade" in listing["backends"]["pytorch"]["capabilities"]
+
+
+@pytest.fixture
+def faster_whisper_default(monkeypatch, both_backends):
+    monkeypatch.setattr(whisper_service, "default_backend", BACKENDS["faster-whisper"])
+    return both_backends
+
+
+def test_openai_whisper_endpoints_ignore_the_default_backend(faster_whisper_default):
+    """Endpoints without a backend parameter run on pytorch, so its features gate them."""
+    response = client.post(
+        "/transcribe/stream",
+        files={"file": ("clip.wav", wav_bytes(seed=12), "audio/wav")},
+        data={"model": "tiny"},
+    )
+    assert response.status_code == 200
+    assert "event: done" in response.text
+
+    with client.websocket_connect("/ws/transcribe?model=tiny") as websocket:
+        assert websocket.receive_json()["type"] == "ready"
+        websocket.send_json({"type": "end"})
+        while websocket.receive_json()["type"] != "done":
+            pass
+    assert sorted(faster_whisper_default) == ["tiny"]
+
+
+def test_other_backends_models_can_be_evicted(both_backends):
+    """Pool keys with a backend prefix reach the eviction route."""
+    response = client.post(
+        "/transcribe",
+        files={"file": ("clip.wav", wav_bytes(seed=13), "audio/wav")},
+        data={"model": "tiny", "backend": "faster-whisper"},
+    )
+    assert response.status_code == 200
+    assert client.delete("/admin/models/faster-whisper/tiny").status_code == 200
+    assert client.delete("/admin/models/faster-whisper/tiny").status_code == 404
+
+
+def test_openai_whisper_paths_stay_on_pytorch(monkeypatch, faster_whisper_default):
+    """Warm-up runs on the default backend; batched detection keeps openai-whisper models."""
+    monkeypatch.setattr(whisper_service, "model_status", {})
+    status = whisper_service.prepare_model(WhisperModel.TINY)
+    assert status["state"] == "ready", status["error"]
+    assert sorted(faster_whisper_default) == ["faster-whisper/tiny"]
+
+    # An explicit pytorch request is micro-batched through openai-whisper's detector
+    detected = client.post(
+        "/detect-language",
+        files={"file": ("clip.wav", wav_bytes(seed=11), "audio/wav")},
+        data={"model": "tiny", "backend": "pytorch"},
+    )
+    assert detected.json()["detected_language"] == "en"
+    assert sorted(faster_whisper_default) == ["faster-whisper/tiny", "tiny"]
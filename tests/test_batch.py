@@ -0,0 +1,137 @@
+import io
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app import whisper_service as whisper_service_module
+from app.audio import SAMPLE_RATE, load_audio
+from app.uploads import ArchiveError, extract_archive
+from app.whisper_service import whisper_service
+from tests.conftest import wav_bytes
+
+client = TestClient(main.app)
+
+
+def tone_wav(seconds: float) -> bytes:
+    return wav_bytes(seconds, level=0.1)
+
+
+class BatchModel:
+    """Stands in for a Whisper model; records the length of each whole-file transcribe."""
+
+    is_multilingual = True
+    dims = SimpleNamespace(n_mels=80)
+    device = "cpu"
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.transcribed = []
+
+    def transcribe(self, audio, **options):
+        audio = load_audio(audio)
+        self.transcribed.append(len(audio) / SAMPLE_RATE)
+        return {"text": " whole file", "language": "en", "segments": []}
+
+
+@pytest.fixture
+def batch_model(monkeypatch, service_models):
+    model = BatchModel()
+
+    def decode(decoded_model, mel, options):
+        assert options.without_timestamps
+        model.batch_sizes.append(mel.shape[0])
+        return [
+            SimpleNamespace(
+                text=f"clip {i}",
+                tokens=[1, 2],
+                language="en",
+                temperature=options.temperature,
+                # The second window of a batch decodes badly and needs the fallback
+                avg_logprob=-2.0 if i == 1 else -0.2,
+                compression_ratio=1.1,
+                no_speech_prob=0.01
+            )
+            for i in range(mel.shape[0])
+        ]
+
+    monkeypatch.setattr(whisper_service_module.whisper, "decode", decode)
+    monkeypatch.setattr(whisper_service, "batch_size", 2)
+    service_models(lambda key: model)
+    return model
+
+
+def test_batch_endpoint_packs_short_clips(batch_model, tmp_path):
+    """Short clips share batched passes, long files run alone, order is kept."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("calls/c.wav", tone_wav(3))
+        zf.writestr("calls/long.wav", tone_wav(45))
+        zf.writestr("__MACOSX/calls/._c.wav", b"resource fork")
+
+    response = client.post(
+        "/transcribe/batch",
+        files=[
+            ("files", ("a.wav", tone_wav(5), "audio/wav")),
+            ("files", ("calls.zip", archive.getvalue(), "application/zip")),
+            ("files", ("b.wav", tone_wav(10), "audio/wav")),
+        ],
+        data={"model": "tiny"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+
+    assert [item["filename"] for item in body["results"]] == [
+        "a.wav", "calls/c.wav", "calls/long.wav", "b.wav"
+    ]
+    texts = [item["result"]["text"] for item in body["results"]]
+    # a and c share the first batch (c falls back), b is alone in the second
+    assert texts == ["clip 0", " whole file", " whole file", "clip 0"]
+    assert batch_model.batch_sizes == [2, 1]
+    assert batch_model.transcribed == [3.0, 45.0]
+    assert body["results"][0]["result"]["segments"][0]["end"] == 5.0
+
+    stats = body["stats"]
+    assert (stats["files"], stats["batches"], stats["batched_files"]) == (4, 2, 2)
+    assert stats["audio_seconds"] == 63.0
+    assert stats["realtime_factor"] > 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_batch_endpoint_reports_per_file_errors(batch_model):
+    """A file that cannot be decoded fails alone."""
+    response = client.post(
+        "/transcribe/batch",
+        files=[
+            ("files", ("a.wav", tone_wav(2), "audio/wav")),
+            ("files", ("broken.wav", b"not audio", "audio/wav")),
+        ],
+        data={"model": "tiny"},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["result"]["text"] == "clip 0"
+    assert results[1]["result"] is None and results[1]["error"]
+    assert response.json()["stats"]["failed"] == 1
+
+
+def test_extract_archive_limits(tmp_path):
+    """Member paths never reach the filesystem and the file count is capped."""
+    path = tmp_path / "clips.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("../../escape.wav", b"a")
+        zf.writestr("nested/", b"")
+        zf.writestr("b.wav", b"b")
+    dest = tmp_path / "out"
+    dest.mkdir()
+
+    uploads = extract_archive(str(path), str(dest), max_files=5, max_size=1024)
+    assert [upload.filename for upload in uploads] == ["../../escape.wav", "b.wav"]
+    assert all(os.path.dirname(upload.path) == str(dest) for upload in uploads)
+
+    with pytest.raises(ArchiveError):
+        extract_archive(str(path), str(dest), max_files=1, max_size=1024)
+    assert len(os.listdir(dest)) == 2
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import whisper_service as whisper_service_module
+from app.batching import MicroBatcher
+from app.models import WhisperModel
+from app.whisper_service import whisper_service
+
+
+async def test_concurrent_requests_share_a_batch():
+    """Requests for one key inside the window are processed together, in order."""
+    batches = []
+
+    async def process(key, items):
+        batches.append((key, list(items)))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_seconds=0.05)
+    results = await asyncio.gather(
+        *(batcher.submit("tiny", i) for i in range(3)),
+        batcher.submit("base", 7)
+    )
+    assert results == [0, 10, 20, 70]
+    assert sorted(batches) == [("base", [7]), ("tiny", [0, 1, 2])]
+    assert batcher.stats()["largest_batch"] == 3
+
+
+async def test_full_batch_flushes_without_waiting():
+    """Reaching max_batch_size flushes before the wait window ends."""
+    async def process(key, items):
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait_seconds=5)
+    start = time.time()
+    assert await asyncio.gather(batcher.submit("tiny", 1), batcher.submit("tiny", 2)) == [1, 2]
+    assert time.time() - start < 1
+
+
+async def test_batch_errors_reach_every_caller():
+    """A failing batch fails each request in it."""
+    async def process(key, items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_seconds=0.01)
+    results = await asyncio.gather(
+        batcher.submit("tiny", 1), batcher.submit("tiny", 2), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+class LanguageModel:
+    """Detects English for loud windows and Chinese for silent ones."""
+
+    dims = SimpleNamespace(n_mels=80)
+    device = "cpu"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect_language(self, mel):
+        self.batch_sizes.append(mel.shape[0])
+        probs = []
+        for window in mel:
+            loud = float(window.mean()) > -1.0
+            probs.append({"en": 0.9, "zh": 0.1} if loud else {"en": 0.2, "zh": 0.8})
+        return None, probs
+
+
+@pytest.fixture
+def language_model(monkeypatch, service_models):
+    model = LanguageModel()
+    monkeypatch.setattr(
+        whisper_service_module,
+        "load_audio",
+        lambda path: (
+            np.random.default_rng(0).uniform(-0.5, 0.5, 16000).astype(np.float32)
+            if "loud" in path else np.zeros(16000, dtype=np.float32)
+        )
+    )
+    monkeypatch.setattr(
+        whisper_service,
+        "language_batcher",
+        MicroBatcher(whisper_service._run_language_batch, max_batch_size=4, max_wait_seconds=0.05)
+    )
+    service_models(lambda key: model)
+    return model
+
+
+async def test_language_detection_batches_one_encoder_pass(language_model):
+    """Concurrent detections run as one batched forward pass and keep their own results."""
+    paths = ["loud-1.wav", "quiet-1.wav", "loud-2.wav"]
+    results = await asyncio.gather(*(
+        whisper_service.run_language_detection(path, WhisperModel.TINY) for path in paths
+    ))
+    assert language_model.batch_sizes == [3]
+    assert [result["detected_language"] for result in results] == ["en", "zh", "en"]
+    assert results[1]["probabilities"] == {"en": 0.2, "zh": 0.8}
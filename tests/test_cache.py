@@ -0,0 +1,110 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.cache import ResultCache
+from app.models import WhisperModel
+from app.whisper_service import WhisperService
+
+
+class FakeModel:
+    """Stands in for a Whisper model and counts transcribe calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return {"text": "hello", "language": "en", "segments": []}
+
+
+def test_key_depends_on_every_option():
+    """Changing any decoding option produces a different key."""
+    base = ResultCache.make_key("abc", model="base", task="transcribe", beam_size=5)
+    assert base == ResultCache.make_key("abc", beam_size=5, task="transcribe", model="base")
+    assert base != ResultCache.make_key("abc", model="base", task="translate", beam_size=5)
+    assert base != ResultCache.make_key("abd", model="base", task="transcribe", beam_size=5)
+
+
+def test_lru_eviction_and_counters():
+    """The least recently used entry is evicted first."""
+    cache = ResultCache(max_entries=2, ttl_seconds=0)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    """Entries older than the TTL are treated as misses."""
+    cache = ResultCache(max_entries=4, ttl_seconds=10)
+    cache.put("a", {"v": 1})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """Results persisted on disk are served by a fresh cache instance."""
+    ResultCache(disk_dir=str(tmp_path)).put("a", {"text": "hi"})
+    cache = ResultCache(disk_dir=str(tmp_path))
+    assert cache.get("a") == {"text": "hi"}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_size_eviction(tmp_path):
+    """The disk tier keeps at most max_disk_entries files."""
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"k": key})
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_disk_hit_keeps_original_expiry(tmp_path, monkeypatch):
+    """Promoting a disk hit into memory does not restart its TTL."""
+    ResultCache(disk_dir=str(tmp_path), ttl_seconds=10).put("a", {"v": 1})
+    cache = ResultCache(disk_dir=str(tmp_path), ttl_seconds=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 8)
+    assert cache.get("a") == {"v": 1}
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_disk_eviction_follows_reads_without_rescanning(tmp_path, monkeypatch):
+    """Reads refresh recency in the index; evicting on put does not scan the directory."""
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_entries=2)
+    cache.put("a", {"k": "a"})
+    cache.put("b", {"k": "b"})
+    cache._memory.clear()
+    assert cache.get("a") == {"k": "a"}
+    monkeypatch.setattr("os.scandir", lambda path: pytest.fail("scanned on put"))
+    cache.put("c", {"k": "c"})
+    monkeypatch.undo()
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["a", "c"]
+
+
+def test_transcribe_audio_skips_model_on_cache_hit(monkeypatch):
+    """A repeated request with the same content hash never reaches the model."""
+    service = WhisperService()
+    model = FakeModel()
+    monkeypatch.setattr(service.model_pool, "loader", lambda key: model)
+    audio = np.zeros(16000, dtype=np.float32)
+
+    for _ in range(2):
+        result = service.transcribe_audio(
+            audio, WhisperModel.BASE, content_hash="abc", beam_size=5
+        )
+        assert result["text"] == "hello"
+
+    assert model.calls == 1
+    service.transcribe_audio(audio, WhisperModel.BASE, content_hash="abc", beam_size=1)
+    assert model.calls == 2
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+from app import jobs, main
+from app import whisper_service as whisper_service_module
+from app.cancellation import (
+    CancelToken,
+    JobCancelledError,
+    cancel_scope,
+    check_cancelled,
+    install_cancel_hook,
+    run_cancellable,
+)
+from app.models import TaskResult, TaskStatus, TranscriptionResponse
+from app.scheduler import InferenceScheduler
+from app.task_store import MemoryTaskStore
+
+
+async def test_cancelling_the_caller_stops_the_running_job():
+    """A worker-thread job sees its token cancelled once the awaiting task is."""
+    scheduler = InferenceScheduler(max_workers=1)
+    started = threading.Event()
+    outcome = {}
+
+    def windows():
+        started.set()
+        try:
+            for _ in range(200):
+                check_cancelled()
+                time.sleep(0.01)
+            outcome["finished"] = True
+        except JobCancelledError as e:
+            outcome["cancelled"] = e.reason
+
+    job = asyncio.ensure_future(scheduler.run(windows))
+    await asyncio.to_thread(started.wait)
+    job.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await job
+
+    for _ in range(100):
+        if outcome:
+            break
+        await asyncio.sleep(0.01)
+    assert outcome == {"cancelled": "cancelled"}
+    scheduler.shutdown()
+
+
+def test_encoder_hook_raises_for_cancelled_jobs():
+    """The model checks the current token before each encoder pass."""
+    model = torch.nn.Module()
+    model.encoder = torch.nn.Linear(2, 2)
+    install_cancel_hook(install_cancel_hook(model))
+    model.encoder(torch.zeros(1, 2))
+
+    token = CancelToken()
+    with cancel_scope(token):
+        model.encoder(torch.zeros(1, 2))
+        token.cancel("timed_out")
+        with pytest.raises(JobCancelledError) as exc_info:
+            model.encoder(torch.zeros(1, 2))
+    assert exc_info.value.reason == "timed_out"
+    # Outside the scope the hook is inert again
+    model.encoder(torch.zeros(1, 2))
+
+
+async def test_run_cancellable_deadline_and_stop():
+    """The deadline raises timed_out; a true should_stop raises cancelled."""
+    with pytest.raises(JobCancelledError) as exc_info:
+        await run_cancellable(asyncio.sleep(5), deadline_at=time.time() + 0.05)
+    assert exc_info.value.reason == "timed_out"
+
+    async def stop():
+        return True
+
+    with pytest.raises(JobCancelledError) as exc_info:
+        await run_cancellable(asyncio.sleep(5), should_stop=stop, poll_seconds=0.01)
+    assert exc_info.value.reason == "cancelled"
+    assert await run_cancellable(asyncio.sleep(0, result="done")) == "done"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryTaskStore()
+    monkeypatch.setattr(jobs, "task_store", store)
+    monkeypatch.setattr(main, "task_store", store)
+    store.create(TaskResult(
+        task_id="job", status=TaskStatus.PENDING, created_at=datetime.now().isoformat()
+    ))
+    return store
+
+
+async def test_delete_cancels_a_running_async_task(store, monkeypatch, tmp_path):
+    """DELETE marks the task cancelled and the job stops and frees its upload."""
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"audio")
+    stopped = asyncio.Event()
+
+    async def slow_job(file_path, options):
+        try:
+            await asyncio.sleep(30)
+        finally:
+            stopped.set()
+        return TranscriptionResponse(text="late", processing_time=30, whisper_model="tiny")
+
+    monkeypatch.setattr(jobs, "run_transcription_job", slow_job)
+    task = asyncio.ensure_future(
+        main.process_transcription_task("job", str(audio_path), {"model": "tiny"})
+    )
+    await asyncio.sleep(0.05)
+    assert store.get("job").status == TaskStatus.PROCESSING
+
+    assert (await main.delete_task("job"))["message"] == "Task job cancelled"
+    await asyncio.wait_for(task, timeout=5)
+    assert stopped.is_set()
+    assert store.get("job").status == TaskStatus.CANCELLED
+    assert not audio_path.exists()
+
+
+async def test_async_task_deadline_marks_timed_out(store, monkeypatch, tmp_path):
+    """A job still running at its deadline ends as timed_out."""
+    async def slow_job(file_path, options):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(jobs, "run_transcription_job", slow_job)
+    options = {"model": "tiny", "deadline_at": time.time() + 0.1}
+    await asyncio.wait_for(
+        main.process_transcription_task("job", str(tmp_path / "audio.wav"), options),
+        timeout=5
+    )
+    task = store.get("job")
+    assert task.status == TaskStatus.TIMED_OUT
+    assert task.error == "Transcription deadline exceeded"
+
+
+class SlowModel:
+    """Spends ``seconds`` per call in 10 ms steps, checking for cancellation."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.cancelled = threading.Event()
+
+    def transcribe(self, audio, **options):
+        try:
+            for _ in range(int(self.seconds / 0.01)):
+                check_cancelled()
+                time.sleep(0.01)
+        except JobCancelledError:
+            self.cancelled.set()
+            raise
+        return {"text": " done", "language": "en", "segments": []}
+
+
+@pytest.fixture
+def slow_model(monkeypatch, service_models):
+    model = SlowModel(seconds=1.5)
+    audio = np.zeros(16000, dtype=np.float32)
+    monkeypatch.setattr(whisper_service_module, "load_audio", lambda path: audio)
+    service_models(lambda key: model)
+    return model
+
+
+def test_sync_transcribe_deadline(slow_model):
+    """A connected client waits past the poll interval; a short deadline gives 504."""
+    client = TestClient(main.app)
+    data = {"model": "tiny"}
+
+    response = client.post(
+        "/transcribe", files={"file": ("a.wav", b"RIFF-slow-1", "audio/wav")}, data=data
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/transcribe",
+        files={"file": ("b.wav", b"RIFF-slow-2", "audio/wav")},
+        data={**data, "deadline_seconds": "0.2"}
+    )
+    assert response.status_code == 504
+    assert slow_model.cancelled.wait(timeout=2)
+
+
+async def test_client_disconnect_cancels_the_sync_job(slow_model):
+    """A client that drops mid-job stops the model instead of waiting for the result."""
+    request = httpx.Request(
+        "POST", "http://testserver/transcribe",
+        files={"file": ("c.wav", b"RIFF-slow-3", "audio/wav")}, data={"model": "tiny"}
+    )
+    body = [{"type": "http.request", "body": request.read(), "more_body": False}]
+    dropped_at = time.time() + 0.3
+
+    async def receive():
+        if body:
+            return body.pop()
+        # Answer at once: starlette polls for a disconnect in a cancelled scope
+        if time.time() >= dropped_at:
+            return {"type": "http.disconnect"}
+        await asyncio.sleep(0.01)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/transcribe", "raw_path": b"/transcribe",
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+        "headers": [(key.encode(), value.encode()) for key, value in request.headers.items()],
+    }
+    start = time.time()
+    await asyncio.wait_for(main.app(scope, receive, send), timeout=5)
+    assert time.time() - start < 1.5
+    assert sent[0]["status"] == 499
+    assert slow_model.cancelled.wait(timeout=2)
@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app import whisper_service as whisper_service_module
+from app.audio import SAMPLE_RATE
+from tests.conftest import wav_bytes
+
+client = TestClient(main.app)
+
+
+def segment(start, end, text, avg_logprob=-0.2, compression_ratio=1.2, no_speech_prob=0.01):
+    return {
+        "id": 0, "seek": 0, "start": start, "end": end, "text": text,
+        "avg_logprob": avg_logprob, "compression_ratio": compression_ratio,
+        "no_speech_prob": no_speech_prob
+    }
+
+
+class CascadeModel:
+    """One fake model per size; records what each was asked to do."""
+
+    is_multilingual = True
+    dims = SimpleNamespace(n_mels=80)
+    device = "cpu"
+
+    def __init__(self, key):
+        self.key = key
+        self.calls = []
+        self.detections = 0
+
+    def detect_language(self, mel):
+        self.detections += 1
+        return None, [{"en": 0.1, "fr": 0.9} for _ in range(mel.shape[0])]
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio) / SAMPLE_RATE, options))
+        if self.key == "base":
+            return {"text": "", "language": options.get("language"), "segments": [
+                segment(0.0, 2.0, " one"),
+                segment(2.0, 4.0, " tw", avg_logprob=-1.4),
+                segment(4.0, 6.0, " threethree", compression_ratio=2.9),
+                segment(6.0, 8.0, " four"),
+                segment(8.0, 9.0, " fiv", no_speech_prob=0.8),
+            ]}
+        return {"text": "", "language": options.get("language"), "segments": [
+            segment(0.0, len(audio) / SAMPLE_RATE, " refined")
+        ]}
+
+
+@pytest.fixture
+def models(service_models):
+    return service_models(CascadeModel)
+
+
+def test_only_doubtful_segments_reach_the_large_model(models):
+    """Flagged runs are re-decoded on the requested model with the draft text as prompt."""
+    response = client.post(
+        "/transcribe",
+        files={"file": ("talk.wav", wav_bytes(9, seed=1), "audio/wav")},
+        data={"model": "large", "cascade": "true"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+
+    assert models["base"].detections == 1
+    assert body["language"] == "fr"
+    assert models["base"].calls[0][1]["language"] == "fr"
+
+    # Segments 2-3 are one run, segment 5 another
+    assert [seconds for seconds, _ in models["large"].calls] == [4.0, 1.0]
+    assert models["large"].calls[0][1]["initial_prompt"] == " one"
+    assert models["large"].calls[1][1]["initial_prompt"] == " one refined four"
+
+    segments = body["segments"]
+    assert [(s["id"], s["start"], s["end"], s["model"]) for s in segments] == [
+        (0, 0.0, 2.0, "base"), (1, 2.0, 6.0, "large"), (2, 6.0, 8.0, "base"), (3, 8.0, 9.0, "large")
+    ]
+    assert body["text"] == " one refined four refined"
+
+    stats = body["cascade"]
+    assert stats["draft_segments_flagged"] == 3 and stats["refined_segments"] == 2
+    assert stats["refined_seconds"] == 5.0
+    # base for the whole file and the language window, large for 5 of 9 seconds
+    assert stats["estimated_savings"] == round(1 - (9 * 0.14 + 9 * 0.14 + 5 * 1.0) / 9, 3)
+
+
+def test_cascade_is_skipped_when_it_cannot_save(models):
+    """A given language skips detection; a target no dearer than the draft runs directly."""
+    response = client.post(
+        "/transcribe",
+        files={"file": ("talk.wav", wav_bytes(9, seed=2), "audio/wav")},
+        data={"model": "medium", "cascade": "true", "language": "en"},
+    )
+    assert response.json()["cascade"]["language_model"] is None
+    assert models["base"].detections == 0
+
+    response = client.post(
+        "/transcribe",
+        files={"file": ("talk.wav", wav_bytes(9, seed=3), "audio/wav")},
+        data={"model": "tiny", "cascade": "true"},
+    )
+    body = response.json()
+    assert body["cascade"] is None
+    assert len(models["tiny"].calls) == 1
+    assert len(models["base"].calls) == 1
+
+
+def test_long_audio_cascades_each_window(models, monkeypatch):
+    """With long-audio mode on, every window runs the cascade on the first window's language."""
+    monkeypatch.setattr(
+        whisper_service_module, "split_on_silence",
+        lambda audio, seconds: [(0, 9 * SAMPLE_RATE), (9 * SAMPLE_RATE, 18 * SAMPLE_RATE)]
+    )
+    response = client.post(
+        "/transcribe",
+        files={"file": ("talk.wav", wav_bytes(18, seed=4), "audio/wav")},
+        data={"model": "large", "cascade": "true", "long_audio": "true"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+
+    assert models["base"].detections == 1
+    assert [options["language"] for _, options in models["base"].calls] == ["fr", "fr"]
+    assert [seconds for seconds, _ in models["large"].calls] == [4.0, 1.0, 4.0, 1.0]
+    assert [(s["id"], s["start"], s["model"]) for s in body["segments"][3:6]] == [
+        (3, 8.0, "large"), (4, 9.0, "base"), (5, 11.0, "large")
+    ]
+
+    stats = body["cascade"]
+    assert stats["language_model"] == "base" and stats["segments"] == 8
+    assert stats["draft_segments_flagged"] == 6 and stats["refined_segments"] == 4
+    assert stats["audio_seconds"] == 18.0 and stats["refined_seconds"] == 10.0
+    # Only the first window paid for language identification
+    assert stats["estimated_savings"] == pytest.approx(
+        1 - (9 * 0.14 + 18 * 0.14 + 10 * 1.0) / 18, abs=1e-3
+    )
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.coalescing import RequestCoalescer
+
+
+async def test_identical_requests_share_one_computation():
+    """Concurrent callers with the same key get one result from one run."""
+    coalescer = RequestCoalescer()
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"text": "shared"}
+
+    waiters = [asyncio.ensure_future(coalescer.run("key", compute)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert coalescer.jobs()[0]["waiters"] == 3
+    release.set()
+
+    results = await asyncio.gather(*waiters)
+    assert calls == 1
+    assert all(result == {"text": "shared"} for result in results)
+    assert coalescer.stats() == {"in_flight": 0, "started": 1, "coalesced": 2}
+
+
+async def test_failure_propagates_to_every_waiter():
+    """An exception in the shared job is raised in each waiter."""
+    coalescer = RequestCoalescer()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("decode failed")
+
+    waiters = [asyncio.ensure_future(coalescer.run("key", compute)) for _ in range(2)]
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_others():
+    """One caller leaving keeps the job alive for the rest."""
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(coalescer.run("key", compute))
+    second = asyncio.ensure_future(coalescer.run("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_last_waiter_leaving_cancels_job():
+    """The job is cancelled once nobody is waiting for it."""
+    coalescer = RequestCoalescer()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def compute():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.ensure_future(coalescer.run("key", compute))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert not coalescer.is_running("key")
+
+
+async def test_cancelling_job_cancels_every_waiter():
+    """Cancelling the shared job propagates to all attached callers."""
+    coalescer = RequestCoalescer()
+
+    async def compute():
+        await asyncio.sleep(10)
+
+    waiters = [asyncio.ensure_future(coalescer.run("key", compute)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert coalescer.cancel("key")
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,210 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+import whisper.audio
+from fastapi.testclient import TestClient
+from whisper.tokenizer import get_tokenizer
+
+from app import main
+from app import whisper_service as whisper_service_module
+from app.audio import SAMPLE_RATE
+from app.handles import AudioHandle, AudioHandleCache
+from app.whisper_service import whisper_service
+from tests.conftest import wav_bytes
+
+client = TestClient(main.app)
+
+
+def test_mel_is_computed_once_per_size(monkeypatch):
+    calls = []
+    real = whisper_service_module.whisper.log_mel_spectrogram
+
+    def counting(audio, n_mels, padding=0):
+        calls.append(n_mels)
+        return real(audio, n_mels, padding=padding)
+
+    monkeypatch.setattr("app.handles.whisper.log_mel_spectrogram", counting)
+    handle = AudioHandle(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    first = handle.mel(80)
+    assert handle.mel(80) is first
+    handle.mel(128)
+    assert calls == [80, 128]
+    # One second of audio plus 30 s of padding, at 100 frames per second
+    assert first.shape == (80, 3100)
+
+
+def test_cache_evicts_least_recently_used_and_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.handles.time.time", lambda: now[0])
+    second = np.zeros(SAMPLE_RATE, dtype=np.float32)  # 64 KB
+    cache = AudioHandleCache(max_bytes=second.nbytes * 2, ttl_seconds=60)
+    a = cache.put(AudioHandle(second.copy()))
+    b = cache.put(AudioHandle(second.copy()))
+    assert cache.get(a.handle_id) is a
+    c = cache.put(AudioHandle(second.copy()))
+
+    assert cache.get(b.handle_id) is None
+    assert cache.get(a.handle_id) is a and cache.get(c.handle_id) is c
+
+    now[0] += 61
+    assert cache.get(a.handle_id) is None
+    assert cache.stats()["handles"] == 0
+
+
+def test_whisper_spectrogram_is_left_unpatched():
+    """Importing the app does not swap whisper's own log-mel function."""
+    # whisper re-exports the transcribe function under its module's name
+    transcribe_module = sys.modules["whisper.transcribe"]
+    assert transcribe_module.log_mel_spectrogram is whisper.audio.log_mel_spectrogram
+
+
+def test_handles_are_shared_through_the_directory(tmp_path):
+    """A handle stored by one worker process is served, and deleted, by another."""
+    first = AudioHandleCache(max_bytes=1 << 20, directory=str(tmp_path))
+    second = AudioHandleCache(max_bytes=1 << 20, directory=str(tmp_path))
+    audio = np.random.default_rng(0).uniform(-1, 1, SAMPLE_RATE).astype(np.float32)
+    stored = first.put(AudioHandle(audio, filename="a.wav", sha256="abc", size=10))
+
+    loaded = second.get(stored.handle_id)
+    assert np.array_equal(loaded.audio, audio)
+    assert (loaded.filename, loaded.sha256, loaded.created_at) == ("a.wav", "abc", stored.created_at)
+
+    assert second.delete(stored.handle_id)
+    assert first.get(stored.handle_id) is None
+    assert first.get("../../etc/passwd") is None
+
+
+class StoredUploadModel:
+    """Records the audio each transcribe gets, the language passes, encoder and decoder calls."""
+
+    is_multilingual = True
+    num_languages = 99
+    dims = SimpleNamespace(n_mels=80, n_audio_ctx=1500)
+    device = torch.device("cpu")
+    tokenizer = get_tokenizer(True, num_languages=99)
+
+    def __init__(self):
+        self.detected = []
+        self.transcribed = []
+        self.encoded = []
+        self.decoded = []
+
+    def embed_audio(self, mel):
+        features = torch.zeros(mel.shape[0], 4, 4)
+        self.encoded.append((tuple(mel.shape), features))
+        return features
+
+    def decode(self, features, options):
+        """One segment from 0.4 s to 2.6 s per window, ending on a single timestamp."""
+        self.decoded.append((features, options.task, options.language))
+        text = " stored" if options.task == "transcribe" else " translated"
+        tokens = [
+            self.tokenizer.timestamp_begin + 20,
+            *self.tokenizer.encode(text),
+            self.tokenizer.timestamp_begin + 130
+        ]
+        return SimpleNamespace(
+            tokens=tokens,
+            temperature=options.temperature,
+            avg_logprob=-0.1,
+            compression_ratio=1.0,
+            no_speech_prob=0.01
+        )
+
+    def detect_language(self, mel):
+        self.detected.append(tuple(mel.shape))
+        probs = {"en": 0.1, "ja": 0.9}
+        return None, probs if mel.ndim == 2 else [probs for _ in range(mel.shape[0])]
+
+    def transcribe(self, audio, task="transcribe", **options):
+        self.transcribed.append((audio, task, options.get("language")))
+        text = " stored" if task == "transcribe" else " translated"
+        return {
+            "text": text,
+            "language": options.get("language") or "en",
+            "segments": [{"id": 0, "seek": 0, "start": 0.4, "end": 2.6, "text": text}]
+        }
+
+
+@pytest.fixture
+def stored_model(service_models):
+    model = StoredUploadModel()
+    service_models(lambda key: model)
+    return model
+
+
+def test_combined_call_encodes_each_window_once(stored_model):
+    """Both tasks decode from one encoder pass per 30 s window and one detection."""
+    response = client.post(
+        "/transcribe/combined",
+        files={"file": ("call.wav", wav_bytes(45), "audio/wav")},
+        data={"model": "tiny"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+
+    assert stored_model.detected == [(80, 3000)]
+    assert stored_model.transcribed == []
+    assert [shape for shape, _ in stored_model.encoded] == [(1, 80, 3000), (1, 80, 3000)]
+    windows = (stored_model.decoded[:2], stored_model.decoded[2:])
+    for (_, features), window in zip(stored_model.encoded, windows):
+        assert [(task, language) for _, task, language in window] == [
+            ("transcribe", "ja"), ("translate", "ja")
+        ]
+        assert all(decoded.data_ptr() == features.data_ptr() for decoded, _, _ in window)
+    assert body["language"] == "ja"
+    assert body["transcription"]["text"] == " stored stored"
+    assert body["translation"]["text"] == " translated translated"
+    # Windows advance past their last timestamp, as in whisper's transcribe
+    assert [(s["start"], s["end"]) for s in body["transcription"]["segments"]] == [(0.0, 2.6), (30.0, 32.6)]
+    assert [(s["start"], s["end"]) for s in body["translation"]["segments"]] == [(0.0, 2.6), (30.0, 32.6)]
+
+
+def test_combined_call_is_admitted_at_twice_the_cost(stored_model, monkeypatch):
+    """With a translation, admission counts two decodes of the audio."""
+    admitted = []
+    original = main.admission.admit
+    # Other jobs keep teaching the scheduler its rate
+    monkeypatch.setattr(
+        type(whisper_service.scheduler), "seconds_per_cost", property(lambda self: 1.0)
+    )
+    monkeypatch.setattr(
+        main.admission, "admit",
+        lambda client_id, audio_seconds, compute_seconds: admitted.append(compute_seconds)
+        or original(client_id, audio_seconds, compute_seconds)
+    )
+    for translate in ("true", "false"):
+        response = client.post(
+            "/transcribe/combined",
+            files={"file": ("call.wav", wav_bytes(3), "audio/wav")},
+            data={"model": "tiny", "translate": translate},
+        )
+        assert response.status_code == 200
+    assert admitted[0] == pytest.approx(2 * admitted[1])
+
+
+def test_upload_handle_serves_later_requests(stored_model):
+    """One upload is decoded once, then referenced by ID until deleted."""
+    created = client.post("/uploads", files={"file": ("clip.wav", wav_bytes(3), "audio/wav")})
+    assert created.status_code == 200
+    upload_id = created.json()["upload_id"]
+    assert created.json()["duration"] == 3.0
+
+    detected = client.post(
+        "/detect-language", data={"upload_id": upload_id, "model": "tiny"}
+    )
+    assert detected.json()["detected_language"] == "ja"
+    transcribed = client.post("/transcribe", data={"upload_id": upload_id, "model": "tiny"})
+    assert transcribed.json()["text"] == " stored"
+    handle = whisper_service.audio_handles.get(upload_id)
+    audio, _, _ = stored_model.transcribed[0]
+    assert audio is handle.audio
+    # Language detection cached the spectrogram on the handle
+    assert client.get(f"/uploads/{upload_id}").json()["cached_mels"] == [80]
+
+    assert client.delete(f"/uploads/{upload_id}").status_code == 200
+    missing = client.post("/transcribe", data={"upload_id": upload_id, "model": "tiny"})
+    assert missing.status_code == 404
@@ -0,0 +1,103 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.audio import SAMPLE_RATE
+from app.live import LiveSession
+from app.main import app
+
+client = TestClient(app)
+
+TEST_AUDIO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "test_audio.wav")
+
+
+def load_test_audio_pcm() -> bytes:
+    """test_audio.wav resampled to 16 kHz int16 PCM, as a live client would send it."""
+    with wave.open(TEST_AUDIO, "rb") as f:
+        rate = f.getframerate()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+    positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+    resampled = np.interp(positions, np.arange(len(samples)), samples)
+    return resampled.astype("<i2").tobytes()
+
+
+class SegmentPerSecondModel:
+    """Returns one segment per second of audio it is given."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def transcribe(self, audio, **options):
+        self.prompts.append(options.get("initial_prompt"))
+        seconds = int(len(audio) / SAMPLE_RATE)
+        segments = [
+            {"start": float(i), "end": float(i + 1), "text": f" s{i}"} for i in range(seconds)
+        ]
+        return {"text": "".join(s["text"] for s in segments), "language": "en", "segments": segments}
+
+
+def test_session_commits_all_but_last_segment_after_commit_window():
+    session = LiveSession("s", commit_seconds=3.0)
+    session.append(np.zeros(4 * SAMPLE_RATE, dtype="<i2").tobytes())
+    snapshot = session.take_snapshot()
+    result = SegmentPerSecondModel().transcribe(snapshot["audio"])
+
+    messages = session.apply_result(snapshot, result)
+
+    assert [m["type"] for m in messages] == ["final", "partial"]
+    assert [s["id"] for s in messages[0]["segments"]] == [0, 1, 2]
+    assert messages[1]["start"] == 3.0
+    assert session.buffer_start == 3.0
+    assert len(session.buffer) == SAMPLE_RATE
+    assert session.language == "en"
+
+
+def test_odd_byte_frames_are_carried_over():
+    session = LiveSession("s")
+    session.append(b"\x00\x10\x00")
+    session.append(b"\x10")
+    assert len(session.buffer) == 2
+
+
+@pytest.fixture
+def live_model(service_models):
+    model = SegmentPerSecondModel()
+    service_models(lambda key: model)
+    return model
+
+
+def test_websocket_replays_test_audio(live_model):
+    """Replaying test_audio.wav as 100 ms frames yields captions and a summary."""
+    pcm = load_test_audio_pcm()
+    frame_bytes = SAMPLE_RATE // 10 * 2
+
+    with client.websocket_connect("/ws/transcribe?model=tiny") as websocket:
+        ready = websocket.receive_json()
+        assert ready["type"] == "ready"
+        assert ready["sample_rate"] == SAMPLE_RATE
+
+        for offset in range(0, len(pcm), frame_bytes):
+            websocket.send_bytes(pcm[offset:offset + frame_bytes])
+        websocket.send_json({"type": "end"})
+
+        messages = []
+        while True:
+            message = websocket.receive_json()
+            messages.append(message)
+            if message["type"] == "done":
+                break
+
+    finals = [m for m in messages if m["type"] == "final"]
+    assert finals
+    committed = [segment for m in finals for segment in m["segments"]]
+    assert [segment["id"] for segment in committed] == list(range(len(committed)))
+    assert committed[-1]["end"] <= 6.0
+
+    stats = messages[-1]["stats"]
+    assert stats["received_audio_seconds"] == pytest.approx(5.835, abs=0.01)
+    assert stats["decodes"] >= 1
+    assert stats["avg_latency"] is not None
+    assert client.get("/admin/live").json()["active_sessions"] == 0
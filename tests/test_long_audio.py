@@ -0,0 +1,89 @@
+import numpy as np
+
+from app.audio import SAMPLE_RATE, split_on_silence
+from app import long_audio
+from app.long_audio import stitch_results
+
+
+def speech_with_gaps(gaps_at, total_seconds):
+    """Noise everywhere except 0.5 s of silence starting at each gap."""
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, total_seconds * SAMPLE_RATE).astype(np.float32)
+    for gap in gaps_at:
+        start = int(gap * SAMPLE_RATE)
+        audio[start:start + SAMPLE_RATE // 2] = 0.0
+    return audio
+
+
+def test_split_cuts_inside_silences():
+    """Windows end at the quiet region closest before the nominal boundary."""
+    audio = speech_with_gaps([8, 17], total_seconds=25)
+    windows = split_on_silence(audio, window_seconds=10, search_seconds=5)
+
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert end == start
+    cuts = [end / SAMPLE_RATE for _, end in windows[:-1]]
+    assert 8 <= cuts[0] <= 8.5
+    assert 17 <= cuts[1] <= 17.5
+
+
+def test_short_audio_is_one_window():
+    audio = np.zeros(5 * SAMPLE_RATE, dtype=np.float32)
+    assert split_on_silence(audio, window_seconds=10) == [(0, len(audio))]
+
+
+def test_stitch_offsets_renumbers_and_dedupes_seams():
+    """Timestamps move to the original timeline and seam repeats are dropped."""
+    first = {
+        "language": "en",
+        "segments": [
+            {"id": 0, "seek": 0, "start": 0.0, "end": 4.0, "text": " Hello there."},
+            {"id": 1, "seek": 0, "start": 4.0, "end": 9.5, "text": " See you soon."},
+        ],
+    }
+    second = {
+        "language": "en",
+        "segments": [
+            {"id": 0, "seek": 0, "start": 0.0, "end": 0.4, "text": " soon."},
+            {
+                "id": 1, "seek": 0, "start": 0.5, "end": 3.0, "text": " Goodbye.",
+                "words": [{"word": " Goodbye.", "start": 0.5, "end": 3.0}],
+            },
+        ],
+    }
+
+    result = stitch_results([first, second], [0.0, 10.0])
+
+    assert [segment["id"] for segment in result["segments"]] == [0, 1, 2]
+    assert result["text"] == " Hello there. See you soon. Goodbye."
+    last = result["segments"][-1]
+    assert (last["start"], last["end"]) == (10.5, 13.0)
+    assert last["seek"] == 1000
+    assert last["words"][0]["start"] == 10.5
+    assert result["language"] == "en"
+
+
+def test_pool_process_keeps_one_model(monkeypatch):
+    """A pool process replaces its model when asked for another one."""
+    loaded = []
+
+    class FakeModel:
+        def __init__(self, key):
+            self.key = key
+
+        def transcribe(self, audio, **options):
+            return {"text": self.key, "segments": []}
+
+    def load(key, device, download_root):
+        loaded.append(key)
+        return FakeModel(key)
+
+    monkeypatch.setattr(long_audio, "load_model_variant", load)
+    monkeypatch.setattr(long_audio, "_process_model", None)
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    for key in ["small", "small", "base", "small"]:
+        assert long_audio._transcribe_window(audio, key, "/models", {})["text"] == key
+    assert loaded == ["small", "base", "small"]
+    assert long_audio._process_model[0] == "small"
@@ -50,3 +50,45 @@ def test_get_nonexistent_task():
     """Test getting a task that doesn't exist."""
     response = client.get("/tasks/nonexistent-task-id")
     assert response.status_code == 404
+
+
+def test_ready_reports_not_ready_before_preload(monkeypatch):
+    """Readiness fails until the preloaded models are warm."""
+    from app.whisper_service import whisper_service
+    monkeypatch.setattr(whisper_service, "model_status", {})
+    response = client.get("/ready")
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "not_ready"
+    assert all(status["state"] == "pending" for status in data["models"].values())
+
+
+def test_ready_after_models_are_warm(monkeypatch):
+    """Readiness passes once every preloaded model reports ready."""
+    from app.main import settings
+    from app.whisper_service import whisper_service
+    monkeypatch.setattr(
+        whisper_service,
+        "model_status",
+        {settings.whisper_model: {"state": "ready", "warmup_seconds": 0.5}}
+    )
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["models"][settings.whisper_model]["warmup_seconds"] == 0.5
+
+
+def test_prepare_model_records_load_and_warmup(monkeypatch):
+    """prepare_model loads the model, warms it up and records timings."""
+    import torch
+    from app.models import WhisperModel
+    from app.whisper_service import WhisperService
+
+    service = WhisperService()
+    monkeypatch.setattr(service.model_pool, "loader", lambda key: torch.nn.Linear(1, 1))
+    monkeypatch.setattr(service, "warmup", lambda model_name: 0.25)
+
+    status = service.prepare_model(WhisperModel.TINY)
+    assert status["state"] == "ready"
+    assert status["warmup_seconds"] == 0.25
+    assert service.model_status["tiny"] is status
+    assert "tiny" in service.models
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.backends import FasterWhisperBackend
+from app.model_pool import ModelInUseError, ModelPool, model_memory_bytes, model_parameters
+
+client = TestClient(app)
+
+
+def make_model(n_floats: int) -> torch.nn.Module:
+    """A module whose footprint is exactly n_floats * 4 bytes."""
+    return torch.nn.Linear(n_floats, 1, bias=False)
+
+
+def test_lru_model_is_evicted_over_budget():
+    """Loading past the budget drops the least recently used model."""
+    pool = ModelPool(lambda key: make_model(100), memory_budget=800)
+    pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+
+    assert set(pool.loaded()) == {"a", "c"}
+    events = [(e["event"], e["model"]) for e in pool.stats()["events"]]
+    assert ("evict", "b") in events
+    assert pool.stats()["resident_bytes"] == 800
+
+
+def test_pinned_model_is_not_evicted():
+    """Models in use stay resident even when the pool is over budget."""
+    pool = ModelPool(lambda key: make_model(100), memory_budget=400)
+    with pool.acquire("a"):
+        pool.get("b")
+        # "b" is the only unpinned candidate, so it goes instead of "a"
+        assert set(pool.loaded()) == {"a"}
+        with pytest.raises(ModelInUseError):
+            pool.evict("a")
+    assert pool.evict("a")
+    assert pool.loaded() == {}
+
+
+def test_concurrent_loads_collapse_into_one():
+    """Threads asking for the same cold model share one load."""
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return make_model(10)
+
+    pool = ModelPool(loader, memory_budget=10_000)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pool.get("large")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["large"]
+    assert len({id(model) for model in results}) == 1
+
+
+def test_load_error_reaches_waiting_threads():
+    """A failed load is reported to every caller that waited on it."""
+    def loader(key):
+        time.sleep(0.05)
+        raise RuntimeError("download failed")
+
+    pool = ModelPool(loader, memory_budget=10_000)
+    errors = []
+
+    def load():
+        try:
+            pool.get("large")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert pool.loaded() == {}
+
+
+def test_model_memory_bytes():
+    """Footprint counts parameters and buffers."""
+    assert model_memory_bytes(make_model(25)) == 100
+
+
+def test_models_outside_torch_are_sized_by_their_backend():
+    """Pool keys are stripped of backend and precision before the parameter lookup."""
+    assert model_parameters("small") == model_parameters("faster-whisper/small:int8") == 244_000_000
+    assert model_parameters("custom") == 0
+
+    pool = ModelPool(lambda key: object(), memory_budget=10**10)
+    pool.get("faster-whisper/tiny")
+    assert pool.stats()["resident_bytes"] == 39_000_000 * 4
+
+    engine = FasterWhisperBackend()
+    pool = ModelPool(
+        lambda key: object(), memory_budget=10**10,
+        sizer=lambda key, model: engine.model_size(model, key, "cuda")
+    )
+    pool.get("small:int8")
+    pool.get("small")
+    assert pool.stats()["resident_bytes"] == 244_000_000 * (1 + 2)
+
+
+def test_models_are_estimated_by_their_backend_before_loading():
+    """Room is made for an incoming model at its backend's bytes per parameter."""
+    engine = FasterWhisperBackend()
+    pool = ModelPool(
+        lambda key: object(), memory_budget=244_000_000 * 2,
+        sizer=lambda key, model: engine.model_size(model, key, "cpu")
+    )
+    pool.get("small:int8")
+    # At fp32 the new int8 model would not fit next to the first one
+    pool.get("faster-whisper/small:int8")
+    assert set(pool.loaded()) == {"small:int8", "faster-whisper/small:int8"}
+
+
+def test_admin_models_endpoint():
+    """The admin endpoint exposes budget, resident size and events."""
+    response = client.get("/admin/models")
+    assert response.status_code == 200
+    data = response.json()
+    assert "memory_budget_bytes" in data
+    assert "resident_bytes" in data
+    assert isinstance(data["events"], list)
+
+    response = client.delete("/admin/models/not-loaded")
+    assert response.status_code == 404
@@ -0,0 +1,111 @@
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+from whisper.model import ModelDimensions, Whisper
+
+from app import main
+from app import quantization
+from app.model_pool import model_memory_bytes
+from app.models import ModelPrecision, WhisperModel
+from app.whisper_service import whisper_service
+from tests.conftest import wav_bytes
+
+client = TestClient(main.app)
+
+
+def small_whisper() -> Whisper:
+    """Randomly initialised model with a realistic layer layout but few weights."""
+    torch.manual_seed(0)
+    dims = ModelDimensions(
+        n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+        n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=2
+    )
+    model = Whisper(dims).eval()
+    # Left uninitialised by Whisper, which expects checkpoint weights
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.01)
+    return model
+
+
+def test_linear_layers_become_int8():
+    model = small_whisper()
+    mel = torch.randn(1, 80, 3000)
+    with torch.no_grad():
+        expected = model.embed_audio(mel)
+    linear_bytes = sum(
+        module.weight.numel() * 4 for module in model.modules()
+        if isinstance(module, torch.nn.Linear)
+    )
+    fp32_bytes = model_memory_bytes(model)
+
+    quantized = quantization.quantize_dynamic_int8(model)
+    query = quantized.encoder.blocks[0].attn.query
+    assert isinstance(query, torch.ao.nn.quantized.dynamic.Linear)
+    # Linear weights shrink to a quarter; packed weights are still counted
+    assert model_memory_bytes(quantized) == pytest.approx(fp32_bytes - linear_bytes * 3 / 4, rel=0.01)
+    with torch.no_grad():
+        assert torch.allclose(quantized.embed_audio(mel), expected, atol=0.2)
+
+
+def test_quantized_model_is_cached_on_disk(monkeypatch, tmp_path):
+    """The fp32 checkpoint is read and quantized only once."""
+    loads = []
+
+    def load_model(name, device, download_root):
+        loads.append(name)
+        return small_whisper()
+
+    monkeypatch.setattr(quantization.whisper, "load_model", load_model)
+    first = quantization.load_model_variant("tiny:int8", "cpu", str(tmp_path))
+    path = quantization.quantized_path(str(tmp_path), "tiny")
+    assert path.startswith(str(tmp_path / "quantized"))
+
+    # A plain state dict: loadable without unpickling arbitrary objects
+    assert set(torch.load(path, weights_only=True)) == {"dims", "model_state_dict", "alignment_heads"}
+
+    second = quantization.load_model_variant("tiny:int8", "cpu", str(tmp_path))
+    assert loads == ["tiny"]
+    assert second.alignment_heads.is_sparse
+    assert isinstance(second.decoder.blocks[0].mlp[0], torch.ao.nn.quantized.dynamic.Linear)
+    tokens = torch.tensor([[50258, 50259]])
+    with torch.no_grad():
+        features = first.embed_audio(torch.randn(1, 80, 3000))
+        assert torch.equal(first.logits(tokens, features), second.logits(tokens, features))
+
+    quantization.load_model_variant("tiny", "cpu", str(tmp_path))
+    assert loads == ["tiny", "tiny"]
+
+
+def test_precision_comes_from_request_then_model_then_default(monkeypatch):
+    monkeypatch.setattr(whisper_service, "quantized_models", {"small"})
+    assert whisper_service.model_key(WhisperModel.SMALL) == "small:int8"
+    assert whisper_service.model_key(WhisperModel.SMALL, ModelPrecision.FP32) == "small"
+    assert whisper_service.model_key(WhisperModel.BASE) == "base"
+    assert whisper_service.model_key(WhisperModel.BASE, ModelPrecision.INT8) == "base:int8"
+
+    monkeypatch.setattr(whisper_service, "device", "cuda")
+    assert whisper_service.model_key(WhisperModel.SMALL) == "small"
+
+
+class RecordingModel:
+    def transcribe(self, audio, **options):
+        return {"text": " quantized", "language": "en", "segments": []}
+
+
+def test_transcribe_loads_requested_precision(service_models):
+    models = service_models(lambda key: RecordingModel())
+    audio = wav_bytes(seed=7)
+
+    response = client.post(
+        "/transcribe",
+        files={"file": ("clip.wav", audio, "audio/wav")},
+        data={"model": "tiny", "precision": "int8"},
+    )
+    assert response.status_code == 200
+    assert response.json()["text"] == " quantized"
+    assert list(models) == ["tiny:int8"]
+    assert client.post(
+        "/transcribe",
+        files={"file": ("clip.wav", audio, "audio/wav")},
+        data={"model": "tiny", "precision": "int4"},
+    ).status_code == 422
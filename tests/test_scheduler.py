@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+import wave
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.audio import probe_duration
+from app.cost import DEFAULT_DURATION_SECONDS, estimate_cost
+from app.scheduler import InferenceScheduler, JobPriority, QueueFullError
+from app.whisper_service import whisper_service
+
+client = TestClient(app)
+
+
+async def test_run_executes_off_event_loop():
+    """Jobs run on a worker thread, not the event loop thread."""
+    scheduler = InferenceScheduler(max_workers=1, max_queue_size=2)
+    loop_thread = threading.get_ident()
+    worker_thread = await scheduler.run(threading.get_ident)
+    assert worker_thread != loop_thread
+
+
+async def test_queue_full_rejects_with_retry_after():
+    """Submissions beyond the queue bound fail fast."""
+    scheduler = InferenceScheduler(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+    running = asyncio.ensure_future(scheduler.run(release.wait))
+    while scheduler.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+    queued = asyncio.ensure_future(scheduler.run(time.sleep, 0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFullError) as exc_info:
+        await scheduler.run(time.sleep, 0)
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert scheduler.stats()["rejected"] == 1
+
+
+async def test_exceptions_propagate_to_caller():
+    """Errors raised by the job surface in the awaiting coroutine."""
+    scheduler = InferenceScheduler(max_workers=1, max_queue_size=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await scheduler.run(fail)
+
+
+def test_async_endpoint_returns_503_when_queue_full(monkeypatch):
+    """A full queue is reported as 503 with a Retry-After header."""
+    monkeypatch.setattr(
+        whisper_service, "scheduler", InferenceScheduler(max_workers=1, max_queue_size=0)
+    )
+    response = client.post(
+        "/transcribe/async",
+        files={"file": ("clip.wav", b"RIFF", "audio/wav")},
+    )
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+async def run_in_order(scheduler, jobs):
+    """Block the only worker, queue ``jobs`` as (name, priority, cost), return run order."""
+    order = []
+    release = threading.Event()
+    blocker = asyncio.ensure_future(scheduler.run(release.wait))
+    while scheduler.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+    queued = []
+    for name, priority, cost in jobs:
+        queued.append(asyncio.ensure_future(
+            scheduler.run(order.append, name, priority=priority, cost=cost, enforce_limit=False)
+        ))
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(blocker, *queued)
+    return order
+
+
+async def test_interactive_before_batch_and_shortest_first():
+    """Sync work runs before async work, cheapest job first within a class."""
+    scheduler = InferenceScheduler(max_workers=1, aging_rate=0.0, batch_offset=1000.0)
+    order = await run_in_order(scheduler, [
+        ("batch-long", JobPriority.BATCH, 10800.0),
+        ("batch-short", JobPriority.BATCH, 5.0),
+        ("sync-long", JobPriority.INTERACTIVE, 600.0),
+        ("sync-short", JobPriority.INTERACTIVE, 10.0),
+    ])
+    assert order == ["sync-short", "sync-long", "batch-short", "batch-long"]
+
+
+async def test_aging_lets_waiting_jobs_overtake_cheaper_newcomers():
+    """A job that has waited long enough runs before a cheaper, newer one."""
+    scheduler = InferenceScheduler(max_workers=1, aging_rate=10000.0)
+    order = await run_in_order(scheduler, [
+        ("old-expensive", JobPriority.INTERACTIVE, 50.0),
+        ("new-cheap", JobPriority.INTERACTIVE, 1.0),
+    ])
+    assert order == ["old-expensive", "new-cheap"]
+
+
+async def test_uncosted_jobs_do_not_train_seconds_per_cost():
+    """Only jobs with an estimate update the learned rate; others queue as an average job."""
+    scheduler = InferenceScheduler(max_workers=1, aging_rate=0.0)
+    await scheduler.run(time.sleep, 0.05)
+    assert scheduler.seconds_per_cost == 1.0
+    await scheduler.run(time.sleep, 0.05, cost=0.5)
+    assert scheduler.seconds_per_cost < 1.0
+
+    order = await run_in_order(scheduler, [
+        ("uncosted", JobPriority.INTERACTIVE, None),
+        ("tiny", JobPriority.INTERACTIVE, 0.001),
+    ])
+    assert order == ["tiny", "uncosted"]
+
+
+async def test_position_and_eta():
+    """Queued jobs report their place in line and a growing ETA."""
+    scheduler = InferenceScheduler(max_workers=1)
+    release = threading.Event()
+    blocker = asyncio.ensure_future(scheduler.run(release.wait, job_id="running", cost=5.0))
+    while scheduler.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+    first = asyncio.ensure_future(scheduler.run(time.sleep, 0, job_id="a", cost=10.0))
+    second = asyncio.ensure_future(scheduler.run(time.sleep, 0, job_id="b", cost=20.0))
+    await asyncio.sleep(0.01)
+
+    assert scheduler.position("running")["queue_position"] == 0
+    a, b = scheduler.position("a"), scheduler.position("b")
+    assert (a["queue_position"], b["queue_position"]) == (1, 2)
+    assert 0 < a["eta_seconds"] < b["eta_seconds"]
+    assert scheduler.position("missing") is None
+
+    release.set()
+    await asyncio.gather(blocker, first, second)
+    assert scheduler.position("a") is None
+
+
+def test_cost_estimate_and_duration_probe(tmp_path):
+    """Cost scales with duration and model speed; WAV headers give the duration."""
+    assert estimate_cost(100.0, "large") == 100.0
+    assert estimate_cost(100.0, "tiny") < estimate_cost(100.0, "medium")
+    assert estimate_cost(None, "large") == DEFAULT_DURATION_SECONDS
+
+    path = tmp_path / "clip.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 16000 * 3)
+    assert probe_duration(str(path)) == 3.0
+
+    (tmp_path / "junk.bin").write_bytes(b"not audio")
+    assert probe_duration(str(tmp_path / "junk.bin")) is None
@@ -0,0 +1,91 @@
+import json
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import whisper_service as whisper_service_module
+from app.audio import SAMPLE_RATE
+from app.main import app
+from app.whisper_service import whisper_service
+
+client = TestClient(app)
+
+
+class WindowModel:
+    """Returns one segment per window and records the prompts it was given."""
+
+    def __init__(self):
+        self.prompts = []
+        self.delay = 0.0  # seconds spent per window
+
+    def transcribe(self, audio, **options):
+        time.sleep(self.delay)
+        self.prompts.append(options.get("initial_prompt"))
+        text = f" window {len(self.prompts)}"
+        return {
+            "text": text,
+            "language": "en",
+            "segments": [{"id": 0, "start": 0.0, "end": len(audio) / SAMPLE_RATE, "text": text}],
+        }
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def window_model(monkeypatch, service_models):
+    model = WindowModel()
+    audio = np.zeros(70 * SAMPLE_RATE, dtype=np.float32)
+    monkeypatch.setattr(whisper_service_module, "load_audio", lambda path: audio)
+    monkeypatch.setattr(whisper_service, "stream_window_seconds", 30)
+    service_models(lambda key: model)
+    return model
+
+
+def test_stream_emits_segments_then_summary(window_model, tmp_path):
+    """Each window's segments arrive as events on the original timeline."""
+    response = client.post(
+        "/transcribe/stream",
+        files={"file": ("clip.wav", b"RIFF-stream-test", "audio/wav")},
+        data={"model": "tiny"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names == ["segment", "segment", "segment", "done"]
+
+    segments = [data for name, data in events if name == "segment"]
+    assert [segment["id"] for segment in segments] == [0, 1, 2]
+    assert segments[1]["start"] == pytest.approx(30, abs=5)
+    assert segments[-1]["end"] == pytest.approx(70, abs=0.01)
+    assert segments[-1]["progress"] == 1.0
+
+    done = events[-1][1]
+    assert done["text"] == " window 1 window 2 window 3"
+    assert done["whisper_model"] == "tiny"
+    assert "processing_time" in done
+
+    # Later windows are conditioned on the text decoded so far
+    assert window_model.prompts[0] is None
+    assert window_model.prompts[2] == " window 1 window 2"
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_stopping_consumer_stops_decode_loop(window_model):
+    """Closing the stream early stops decoding at the next window."""
+    # Without a decode time all three windows can finish before the first event is read
+    window_model.delay = 0.2
+    stream = whisper_service.stream_transcription("clip.wav", whisper_service_module.WhisperModel.TINY)
+    first = await stream.__anext__()
+    assert first["segment"]["id"] == 0
+    await stream.aclose()
+    assert len(window_model.prompts) < 3
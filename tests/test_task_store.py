@@ -0,0 +1,195 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import TaskResult, TaskStatus, TranscriptionResponse
+from app.task_store import (
+    MemoryTaskStore,
+    OffloadingTaskStore,
+    RedisTaskStore,
+    SQLiteTaskStore,
+    TaskStateConflictError,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTaskStore()
+    if request.param == "sqlite":
+        return SQLiteTaskStore(str(tmp_path / "tasks.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisTaskStore(fakeredis.FakeRedis())
+
+
+def make_task(task_id: str, minutes_ago: int = 0) -> TaskResult:
+    created = datetime.now() - timedelta(minutes=minutes_ago)
+    return TaskResult(
+        task_id=task_id, status=TaskStatus.PENDING, created_at=created.isoformat()
+    )
+
+
+def test_create_get_and_delete(store):
+    """Records round-trip through the store and can be removed."""
+    store.create(make_task("a"))
+    assert store.get("a").status == TaskStatus.PENDING
+    assert store.get("missing") is None
+
+    assert store.delete("a")
+    assert not store.delete("a")
+    assert store.get("a") is None
+    assert store.count() == 0
+
+
+def test_status_transition_is_checked(store):
+    """A transition only applies when the task is in an expected state."""
+    store.create(make_task("a"))
+    updated = store.update(
+        "a", expected_status=[TaskStatus.PENDING], status=TaskStatus.PROCESSING
+    )
+    assert updated.status == TaskStatus.PROCESSING
+
+    with pytest.raises(TaskStateConflictError):
+        store.update("a", expected_status=[TaskStatus.PENDING], status=TaskStatus.FAILED)
+    assert store.get("a").status == TaskStatus.PROCESSING
+    assert store.update("missing", status=TaskStatus.FAILED) is None
+
+
+def test_only_one_claim_wins(store):
+    """Concurrent PENDING -> PROCESSING claims succeed exactly once."""
+    store.create(make_task("a"))
+    wins = []
+
+    def claim():
+        try:
+            store.update(
+                "a", expected_status=[TaskStatus.PENDING], status=TaskStatus.PROCESSING
+            )
+            wins.append(True)
+        except TaskStateConflictError:
+            pass
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(wins) == 1
+
+
+def test_list_and_count_by_status(store):
+    """Listings are newest first and the status index follows transitions."""
+    for index in range(5):
+        store.create(make_task(f"t{index}", minutes_ago=index))
+    store.update("t1", status=TaskStatus.COMPLETED)
+    store.update("t3", status=TaskStatus.COMPLETED)
+
+    assert [task.task_id for task in store.list_tasks()] == ["t0", "t1", "t2", "t3", "t4"]
+    assert [task.task_id for task in store.list_tasks(offset=1, limit=2)] == ["t1", "t2"]
+    completed = store.list_tasks(status=TaskStatus.COMPLETED)
+    assert [task.task_id for task in completed] == ["t1", "t3"]
+    assert store.count(TaskStatus.COMPLETED) == 2
+    assert store.count(TaskStatus.PENDING) == 3
+    assert store.count() == 5
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """A new SQLite store on the same file sees earlier records."""
+    path = str(tmp_path / "tasks.db")
+    SQLiteTaskStore(path).create(make_task("a"))
+    assert SQLiteTaskStore(path).get("a").task_id == "a"
+
+
+def test_prune_applies_ttl_and_max_count(store):
+    """Expired tasks go first, then the oldest finished tasks beyond the cap."""
+    for index in range(6):
+        store.create(make_task(f"t{index}", minutes_ago=index * 10))
+    for task_id in ["t1", "t2", "t4", "t5"]:
+        store.update(task_id, status=TaskStatus.COMPLETED)
+
+    # t4 and t5 are completed and older than 35 minutes
+    removed = store.prune({TaskStatus.COMPLETED: 35 * 60, TaskStatus.PENDING: 0})
+    assert removed == 2
+    assert store.get("t5") is None and store.get("t3") is not None
+
+    # Over the cap only finished tasks are evicted, oldest first
+    removed = store.prune({}, max_tasks=2)
+    assert removed == 2
+    assert sorted(task.task_id for task in store.list_tasks()) == ["t0", "t3"]
+
+
+def test_large_results_are_offloaded_and_loaded_lazily(tmp_path):
+    """Results above the threshold live in gzip files, not in the store."""
+    inner = MemoryTaskStore()
+    store = OffloadingTaskStore(inner, str(tmp_path / "results"), threshold=1024)
+    store.create(make_task("big"))
+    store.create(make_task("small"))
+    big = TranscriptionResponse(text="word " * 2000, processing_time=1.0, whisper_model="base")
+    small = TranscriptionResponse(text="hi", processing_time=1.0, whisper_model="base")
+    store.update("big", status=TaskStatus.COMPLETED, result=big)
+    store.update("small", status=TaskStatus.COMPLETED, result=small)
+
+    assert inner.get("big").result is None
+    assert inner.get("small").result.text == "hi"
+    assert store.get("big").result.text == big.text
+    assert (tmp_path / "results" / "big.json.gz").exists()
+
+    store.delete("big")
+    assert not (tmp_path / "results" / "big.json.gz").exists()
+
+    # A result for a task deleted meanwhile leaves no file behind
+    assert store.update("big", status=TaskStatus.COMPLETED, result=big) is None
+    assert list((tmp_path / "results").iterdir()) == []
+
+
+def test_redis_delete_sees_a_concurrent_status_change(monkeypatch):
+    """A status change between reading and deleting a task is not left in its index."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    store = RedisTaskStore(fakeredis.FakeRedis(server=server))
+    other = RedisTaskStore(fakeredis.FakeRedis(server=server))
+    store.create(make_task("a"))
+
+    parse = TaskResult.model_validate_json
+    raced = []
+
+    def racing_parse(data):
+        if not raced:
+            raced.append(True)
+            other.update("a", status=TaskStatus.COMPLETED)
+        return parse(data)
+
+    monkeypatch.setattr(TaskResult, "model_validate_json", racing_parse)
+    assert store.delete("a")
+    assert raced
+    assert store.count() == 0
+    assert store.count(TaskStatus.COMPLETED) == store.count(TaskStatus.PENDING) == 0
+
+
+def test_task_listing_and_delete_endpoints(monkeypatch):
+    """GET /tasks pages through tasks; DELETE /tasks/{id} cancels or frees them."""
+    store = MemoryTaskStore()
+    monkeypatch.setattr(main, "task_store", store)
+    for index in range(3):
+        store.create(make_task(f"t{index}", minutes_ago=index))
+    result = TranscriptionResponse(text="done", processing_time=1.0, whisper_model="base")
+    store.update("t1", status=TaskStatus.COMPLETED, result=result)
+    client = TestClient(main.app)
+
+    page = client.get("/tasks", params={"limit": 2}).json()
+    assert page["total"] == 3
+    assert [task["task_id"] for task in page["tasks"]] == ["t0", "t1"]
+    assert page["tasks"][1]["result"] is None
+
+    completed = client.get("/tasks", params={"status": "completed"}).json()
+    assert [task["task_id"] for task in completed["tasks"]] == ["t1"]
+
+    assert client.delete("/tasks/t0").json()["message"] == "Task t0 cancelled"
+    assert client.get("/tasks/t0").json()["status"] == "cancelled"
+    assert client.delete("/tasks/t1").status_code == 200
+    assert client.get("/tasks/t1").status_code == 404
+    assert client.delete("/tasks/missing").status_code == 404
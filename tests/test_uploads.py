@@ -0,0 +1,155 @@
+import hashlib
+import io
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app, settings
+from app.models import TaskResult, TaskStatus
+from app.task_store import MemoryTaskStore, SQLiteTaskStore
+from app.uploads import UploadTooLargeError, ingest_upload, sweep_stale_files
+from app.whisper_service import whisper_service
+
+client = TestClient(app)
+
+
+async def test_ingest_streams_to_disk_and_hashes(tmp_path):
+    """Uploads are written in chunks and hashed on the way through."""
+    content = os.urandom(10_000)
+    upload = UploadFile(io.BytesIO(content), filename="clip.wav")
+
+    ingested = await ingest_upload(upload, str(tmp_path), max_size=20_000, chunk_size=1024)
+
+    assert ingested.size == len(content)
+    assert ingested.sha256 == hashlib.sha256(content).hexdigest()
+    assert ingested.path.endswith(".wav")
+    with open(ingested.path, "rb") as f:
+        assert f.read() == content
+    ingested.cleanup()
+    assert not os.path.exists(ingested.path)
+
+
+async def test_ingest_rejects_oversized_and_removes_partial_file(tmp_path):
+    """Crossing the limit aborts the upload and leaves nothing behind."""
+    upload = UploadFile(io.BytesIO(b"x" * 5000), filename="clip.wav")
+
+    with pytest.raises(UploadTooLargeError):
+        await ingest_upload(upload, str(tmp_path), max_size=1000, chunk_size=512)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_detect_language_enforces_size_limit(monkeypatch, tmp_path):
+    """Endpoints that previously skipped the size check now return 413."""
+    monkeypatch.setattr(settings, "max_file_size", "1KB")
+    monkeypatch.setattr(settings, "temp_dir", str(tmp_path))
+    response = client.post(
+        "/detect-language",
+        files={"file": ("clip.wav", b"x" * 4096, "audio/wav")},
+    )
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+async def test_small_uploads_stay_in_memory(tmp_path):
+    """Uploads under the memory limit are kept as bytes; larger ones spill to disk."""
+    content = os.urandom(3000)
+    small = await ingest_upload(
+        UploadFile(io.BytesIO(content), filename="clip.wav"),
+        str(tmp_path), max_size=20_000, chunk_size=1024, memory_limit=4096
+    )
+    assert small.path is None and small.data == content
+    assert small.sha256 == hashlib.sha256(content).hexdigest()
+    assert os.listdir(tmp_path) == []
+
+    large = await ingest_upload(
+        UploadFile(io.BytesIO(content * 2), filename="clip.wav"),
+        str(tmp_path), max_size=20_000, chunk_size=1024, memory_limit=4096
+    )
+    assert large.data is None
+    with open(large.path, "rb") as f:
+        assert f.read() == content * 2
+
+    small.spill(str(tmp_path))
+    with open(small.path, "rb") as f:
+        assert f.read() == content
+    small.cleanup()
+    large.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def transcribed_sources(monkeypatch, tmp_path):
+    """Record what /transcribe hands the service, and the temp files at that point."""
+    sources = []
+
+    async def run_transcription(audio_path, model_name, **kwargs):
+        sources.append((audio_path, os.listdir(tmp_path)))
+        return {"text": "ok", "language": "en", "segments": [], "whisper_model": "tiny"}
+
+    monkeypatch.setattr(settings, "temp_dir", str(tmp_path))
+    monkeypatch.setattr(whisper_service, "run_transcription", run_transcription)
+    return sources
+
+
+def test_transcribe_decodes_in_memory(monkeypatch, transcribed_sources):
+    """Decoded PCM goes to the service and no temp file is written."""
+    audio = np.zeros(16000, dtype=np.float32)
+    monkeypatch.setattr(main, "decode_audio_bytes", lambda data: audio)
+    response = client.post(
+        "/transcribe", files={"file": ("clip.mp3", b"ID3-bytes", "audio/mpeg")}
+    )
+    assert response.status_code == 200
+    source, files = transcribed_sources[0]
+    assert source is audio
+    assert files == []
+
+
+def test_transcribe_spills_undecodable_uploads(monkeypatch, transcribed_sources):
+    """Input ffmpeg cannot read from a pipe is written to disk and passed by path."""
+    def fail(data):
+        raise RuntimeError("moov atom not found")
+
+    monkeypatch.setattr(main, "decode_audio_bytes", fail)
+    response = client.post(
+        "/transcribe", files={"file": ("clip.m4a", b"ftyp-bytes", "audio/mp4")}
+    )
+    assert response.status_code == 200
+    source, files = transcribed_sources[0]
+    assert source.endswith(".m4a") and files == [os.path.basename(source)]
+    assert not os.path.exists(source)
+
+
+def test_sweep_removes_orphans_but_keeps_active_task_uploads(monkeypatch, tmp_path):
+    """Old files go unless they belong to a task that is still waiting or running."""
+    store = MemoryTaskStore()
+    monkeypatch.setattr(main, "task_store", store)
+    for task_id, status in (("queued", TaskStatus.PENDING), ("done", TaskStatus.COMPLETED)):
+        store.create(TaskResult(
+            task_id=task_id, status=status, created_at=datetime.now().isoformat()
+        ))
+    for name in ("queued.wav", "done.wav", "orphan.wav", "fresh.wav"):
+        (tmp_path / name).write_bytes(b"audio")
+    old = time.time() - 7200
+    for name in ("queued.wav", "done.wav", "orphan.wav"):
+        os.utime(tmp_path / name, (old, old))
+
+    removed = sweep_stale_files(str(tmp_path), 3600, keep=main.is_active_task_file)
+    assert removed == 2
+    assert sorted(os.listdir(tmp_path)) == ["fresh.wav", "queued.wav"]
+
+
+async def test_sweep_is_skipped_without_a_shared_task_store(monkeypatch, tmp_path):
+    """Another worker's queued uploads are invisible to a per-process store."""
+    monkeypatch.setattr(main, "task_store", MemoryTaskStore())
+    swept = []
+    monkeypatch.setattr(main, "sweep_temp_files", lambda: swept.append(True))
+    await main.sweep_temp_files_periodically()
+    assert swept == []
+    assert SQLiteTaskStore(str(tmp_path / "tasks.db")).shared
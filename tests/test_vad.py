@@ -0,0 +1,91 @@
+import numpy as np
+
+from app import whisper_service as whisper_service_module
+from app.audio import SAMPLE_RATE
+from app.models import WhisperModel
+from app.vad import Timeline, detect_speech, remove_silence
+from app.whisper_service import WhisperService
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_detect_speech_finds_tone_regions():
+    """Loud regions are found, long silences are not."""
+    audio = np.concatenate([silence(2), tone(1), silence(3), tone(2), silence(1)])
+    regions = detect_speech(audio, padding_seconds=0.0)
+
+    assert len(regions) == 2
+    assert abs(regions[0][0] / SAMPLE_RATE - 2) < 0.05
+    assert abs(regions[1][1] / SAMPLE_RATE - 8) < 0.05
+
+
+def test_short_pauses_are_bridged():
+    audio = np.concatenate([tone(1), silence(0.2), tone(1)])
+    assert len(detect_speech(audio, min_silence_seconds=0.5)) == 1
+
+
+def test_timeline_maps_back_to_original_times():
+    """Compact timestamps land on the original timeline, ends stay in their region."""
+    timeline = Timeline([(2 * SAMPLE_RATE, 3 * SAMPLE_RATE), (6 * SAMPLE_RATE, 8 * SAMPLE_RATE)])
+    assert timeline.to_original(0.5) == 2.5
+    assert timeline.to_original(1.0) == 6.0
+    assert timeline.to_original(1.0, is_end=True) == 3.0
+    assert timeline.to_original(2.5, is_end=True) == 7.5
+
+
+def test_remove_silence_concatenates_regions():
+    audio = np.arange(10, dtype=np.float32)
+    speech, _ = remove_silence(audio, [(1, 3), (6, 8)])
+    assert speech.tolist() == [1, 2, 6, 7]
+
+
+class RecordingModel:
+    """Returns one segment spanning whatever audio it is given."""
+
+    def __init__(self):
+        self.audio_seconds = None
+
+    def transcribe(self, audio, **options):
+        self.audio_seconds = len(audio) / SAMPLE_RATE
+        return {
+            "text": " hi",
+            "language": "en",
+            "segments": [{"id": 0, "start": 0.0, "end": self.audio_seconds, "text": " hi"}],
+        }
+
+
+def test_transcribe_with_vad_skips_silence(monkeypatch):
+    """Only speech reaches the model and timestamps refer to the original audio."""
+    audio = np.concatenate([silence(5), tone(2), silence(5)])
+    monkeypatch.setattr(whisper_service_module, "load_audio", lambda path: audio)
+    service = WhisperService()
+    model = RecordingModel()
+    monkeypatch.setattr(service.model_pool, "loader", lambda key: model)
+
+    result = service.transcribe_audio("clip.wav", WhisperModel.BASE, vad=True)
+
+    assert model.audio_seconds < 3
+    assert result["vad"]["skipped_seconds"] > 9
+    segment = result["segments"][0]
+    assert 4.5 < segment["start"] < 5.1
+    assert 6.9 < segment["end"] < 7.5
+
+
+def test_transcribe_with_vad_on_pure_silence_skips_model(monkeypatch):
+    monkeypatch.setattr(whisper_service_module, "load_audio", lambda path: silence(10))
+    service = WhisperService()
+
+    def fail(key):
+        raise AssertionError("model should not load")
+
+    monkeypatch.setattr(service.model_pool, "loader", fail)
+    result = service.transcribe_audio("clip.wav", WhisperModel.BASE, vad=True)
+    assert result["text"] == ""
+    assert result["vad"]["speech_seconds"] == 0
@@ -0,0 +1,129 @@
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app import audio as audio_module
+from app.audio import SAMPLE_RATE, decode_audio_bytes, decode_wav, load_audio, resample
+from app.models import WhisperModel
+from app.whisper_service import WhisperService
+
+
+def wav_file(samples: np.ndarray, rate: int, sampwidth: int = 2) -> bytes:
+    """Integer PCM WAV via the stdlib writer; ``samples`` is (frames, channels) in [-1, 1)."""
+    samples = samples.reshape(len(samples), -1)
+    scale = {1: 127, 2: 32767, 3: 2 ** 23 - 1, 4: 2 ** 31 - 1}[sampwidth]
+    ints = np.round(samples * scale).astype(np.int64)
+    if sampwidth == 1:
+        raw = (ints + 128).astype(np.uint8).tobytes()
+    else:
+        raw = b"".join(
+            int(v).to_bytes(sampwidth, "little", signed=True) for v in ints.ravel()
+        )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(sampwidth)
+        f.setframerate(rate)
+        f.writeframes(raw)
+    return buffer.getvalue()
+
+
+def float_wav(samples: np.ndarray, rate: int, extensible: bool = False) -> bytes:
+    """Mono 32-bit float WAV, optionally with a WAVE_FORMAT_EXTENSIBLE header."""
+    body = samples.astype("<f4").tobytes()
+    if extensible:
+        fmt = struct.pack("<HHIIHHHHI", 0xFFFE, 1, rate, rate * 4, 4, 32, 22, 32, 0)
+        fmt += struct.pack("<H", 3) + b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+    else:
+        fmt = struct.pack("<HHIIHH", 3, 1, rate, rate * 4, 4, 32)
+    chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    chunks += b"LIST" + struct.pack("<I", 3) + b"abc\x00"  # odd-sized chunk with pad byte
+    chunks += b"data" + struct.pack("<I", len(body)) + body
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+@pytest.mark.parametrize("sampwidth", [1, 2, 3, 4])
+def test_integer_pcm_matches_source(sampwidth):
+    """16 kHz mono PCM needs no resampling and decodes to the written samples."""
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-0.9, 0.9, 1600)
+    decoded = decode_wav(wav_file(samples, SAMPLE_RATE, sampwidth))
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, samples, atol=1.5 / (2 ** (8 * sampwidth - 1)))
+
+
+def test_stereo_is_downmixed_and_float_formats_parse():
+    left = np.full(800, 0.5)
+    right = np.full(800, -0.25)
+    decoded = decode_wav(wav_file(np.stack([left, right], axis=1), SAMPLE_RATE))
+    assert np.allclose(decoded, 0.125, atol=1e-4)
+
+    samples = np.linspace(-1, 1, 400, dtype=np.float32)
+    assert np.array_equal(decode_wav(float_wav(samples, SAMPLE_RATE)), samples)
+    assert np.array_equal(decode_wav(float_wav(samples, SAMPLE_RATE, extensible=True)), samples)
+
+
+def test_unsupported_or_foreign_input_returns_none():
+    assert decode_wav(b"ID3\x04 not a wav file") is None
+    adpcm = bytearray(wav_file(np.zeros(100), SAMPLE_RATE))
+    adpcm[20:22] = struct.pack("<H", 2)  # MS ADPCM format tag
+    assert decode_wav(bytes(adpcm)) is None
+
+
+@pytest.mark.parametrize("rate", [8000, 22050, 44100, 48000])
+def test_resample_keeps_tones_and_removes_aliases(rate):
+    t = np.arange(rate * 2) / rate
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    out = resample(tone, rate)
+    assert len(out) == int(np.ceil(len(tone) * SAMPLE_RATE / rate))
+    expected = np.sin(2 * np.pi * 440 * np.arange(len(out)) / SAMPLE_RATE)
+    assert np.abs(out[400:-400] - expected[400:-400]).max() < 1e-3
+
+    if rate > 2 * 9000:
+        # Above the 8 kHz target Nyquist frequency: filtered out, not folded down
+        high = np.sin(2 * np.pi * 9000 * t).astype(np.float32)
+        assert np.abs(resample(high, rate)[400:-400]).max() < 0.01
+
+
+def test_wav_never_starts_ffmpeg(monkeypatch, tmp_path):
+    """WAV files and bytes decode in-process; other formats still use ffmpeg."""
+    def no_ffmpeg(*args, **kwargs):
+        raise AssertionError("ffmpeg should not run for WAV input")
+
+    monkeypatch.setattr(audio_module.whisper, "load_audio", no_ffmpeg)
+    monkeypatch.setattr(audio_module.subprocess, "run", no_ffmpeg)
+    data = wav_file(np.full(48000, 0.25), 48000)
+    path = tmp_path / "clip.wav"
+    path.write_bytes(data)
+
+    assert len(load_audio(str(path))) == SAMPLE_RATE
+    assert len(decode_audio_bytes(data)) == SAMPLE_RATE
+
+    (tmp_path / "clip.mp3").write_bytes(b"ID3-not-wav")
+    with pytest.raises(AssertionError):
+        load_audio(str(tmp_path / "clip.mp3"))
+
+
+def test_wav_paths_reach_the_engine_decoded(monkeypatch, tmp_path):
+    """Spooled uploads and task files are decoded before the engine sees them."""
+    def no_ffmpeg(*args, **kwargs):
+        raise AssertionError("ffmpeg should not run for WAV input")
+
+    monkeypatch.setattr(audio_module.whisper, "load_audio", no_ffmpeg)
+    monkeypatch.setattr(audio_module.subprocess, "run", no_ffmpeg)
+    path = tmp_path / "task.wav"
+    path.write_bytes(wav_file(np.full(16000, 0.25), 16000))
+    received = []
+
+    class Model:
+        def transcribe(self, audio, **options):
+            received.append(audio)
+            return {"text": "", "language": "en", "segments": []}
+
+    service = WhisperService()
+    monkeypatch.setattr(service.model_pool, "loader", lambda key: Model())
+    service.transcribe_audio(str(path), WhisperModel.TINY)
+    assert isinstance(received[0], np.ndarray) and len(received[0]) == SAMPLE_RATE
@@ -0,0 +1,80 @@
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from app import weights
+
+
+def small_whisper() -> Whisper:
+    torch.manual_seed(0)
+    dims = ModelDimensions(
+        n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+        n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=4
+    )
+    model = Whisper(dims).eval()
+    # Left uninitialised by Whisper, which expects checkpoint weights
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.01)
+    heads = torch.zeros(4, 2, dtype=torch.bool)
+    heads[3, 1] = True
+    model.register_buffer("alignment_heads", heads.to_sparse(), persistent=False)
+    return model
+
+
+def test_converted_weights_load_without_the_checkpoint(monkeypatch, tmp_path):
+    """Mapped weights reproduce the original model, alignment heads included."""
+    original = small_whisper()
+    loads = []
+
+    def load_model(name, device, download_root):
+        loads.append(name)
+        return original
+
+    monkeypatch.setattr(weights.whisper, "load_model", load_model)
+    path = weights.convert_checkpoint("tiny", str(tmp_path))
+    assert path == str(tmp_path / "mmap" / "tiny-fp32.pt")
+
+    mapped = weights.load_weights("tiny", "cpu", str(tmp_path))
+    assert loads == ["tiny"]
+    assert mapped.encoder.conv1.weight.data_ptr() != original.encoder.conv1.weight.data_ptr()
+    assert torch.equal(mapped.alignment_heads.to_dense(), original.alignment_heads.to_dense())
+    assert torch.equal(mapped.decoder.mask, original.decoder.mask)
+
+    mel = torch.randn(1, 80, 3000)
+    tokens = torch.tensor([[50258, 50259, 50359]])
+    with torch.no_grad():
+        features = original.embed_audio(mel)
+        assert torch.equal(mapped.embed_audio(mel), features)
+        assert torch.equal(mapped.logits(tokens, features), original.logits(tokens, features))
+
+
+def test_empty_model_allocates_no_weights():
+    """Weights stay on the meta device; torch's initialisers are left alone."""
+    dims = small_whisper().dims
+    initialisers = {name: getattr(torch.nn.init, name) for name in ("kaiming_uniform_", "normal_")}
+    model = weights.empty_model(dims)
+    assert all(parameter.is_meta for parameter in model.parameters())
+    assert not model.decoder.mask.is_meta and model.alignment_heads.is_sparse
+    assert all(getattr(torch.nn.init, name) is f for name, f in initialisers.items())
+
+    allocated = weights.empty_model(model.dims, device="cpu")
+    assert not any(parameter.is_meta for parameter in allocated.parameters())
+
+
+def test_falls_back_to_checkpoint(monkeypatch, tmp_path):
+    """Missing or unreadable converted weights, or mmap turned off, use the checkpoint."""
+    loads = []
+    monkeypatch.setattr(
+        weights.whisper, "load_model", lambda name, device, download_root: loads.append(name)
+    )
+    weights.load_weights("base", "cpu", str(tmp_path))
+
+    (tmp_path / "mmap").mkdir()
+    (tmp_path / "mmap" / "base-fp32.pt").write_bytes(b"truncated")
+    weights.load_weights("base", "cpu", str(tmp_path))
+    weights.load_weights("base", "cpu", str(tmp_path), mmap=False)
+    assert loads == ["base", "base", "base"]
+
+
+def test_process_memory_reports_shared_and_private():
+    memory = weights.process_memory()
+    if memory:
+        assert memory["rss"] >= memory["private"] > 0
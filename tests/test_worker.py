@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app import jobs, worker
+from app.models import TaskResult, TaskStatus, TranscriptionResponse
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = worker.WorkerRegistry(fakeredis.FakeRedis(), ttl=60)
+    monkeypatch.setattr(worker, "_registry", registry)
+    return registry
+
+
+def test_jobs_route_to_workers_holding_the_model(registry):
+    """A model held by a live worker gets its own queue; others go to whisper.any."""
+    assert worker.route_transcription("turbo") == worker.ANY_MODEL_QUEUE
+
+    registry.heartbeat("gpu-1", ["turbo", "base"])
+    assert worker.route_transcription("turbo") == "whisper.turbo"
+    assert worker.route_transcription("small") == worker.ANY_MODEL_QUEUE
+
+    registry.remove("gpu-1")
+    assert worker.route_transcription("turbo") == worker.ANY_MODEL_QUEUE
+
+
+def test_expired_workers_are_dropped(registry):
+    """A worker whose heartbeat key expired no longer receives routed jobs."""
+    registry.heartbeat("gpu-1", ["turbo"])
+    registry.client.delete(registry._key("gpu-1"))
+    assert registry.workers() == []
+    assert registry.holders("turbo") == []
+
+
+def test_worker_counters_and_queue_depths(registry):
+    """Completed, failed and retried attempts are counted per worker."""
+    registry.heartbeat("gpu-1", ["turbo"])
+    registry.record("gpu-1", "completed", 2.0)
+    registry.record("gpu-1", "completed", 1.0)
+    registry.record("gpu-1", "retried", 0.5)
+
+    [stats] = registry.workers()
+    assert stats["models"] == ["turbo"]
+    assert (stats["completed"], stats["failed"], stats["retried"]) == (2, 0, 1)
+    assert stats["jobs_per_minute"] > 0
+
+    registry.client.rpush("whisper.turbo", "job-1", "job-2")
+    depths = worker.queue_depths(registry.client)
+    assert depths["whisper.turbo"] == 2
+    assert depths[worker.ANY_MODEL_QUEUE] == 0
+
+
+def test_failed_attempt_is_retried_then_completes(registry, monkeypatch, tmp_path):
+    """A transient failure is retried and the task still completes."""
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"audio")
+    jobs.task_store.create(TaskResult(
+        task_id="job", status=TaskStatus.PENDING, created_at=datetime.now().isoformat()
+    ))
+    attempts = []
+
+    async def flaky_job(file_path, options):
+        attempts.append(file_path)
+        if len(attempts) == 1:
+            raise RuntimeError("CUDA out of memory")
+        return TranscriptionResponse(text="hello", processing_time=0.1, whisper_model="tiny")
+
+    monkeypatch.setattr(jobs, "run_transcription_job", flaky_job)
+    worker.transcribe.apply(args=("job", str(audio_path), {"model": "tiny"}))
+
+    task = jobs.task_store.get("job")
+    assert len(attempts) == 2
+    assert task.status == TaskStatus.COMPLETED
+    assert task.result.text == "hello"
+    assert not audio_path.exists()
+    [worker_key] = registry.client.keys("whisper:worker:*")
+    counters = {
+        key.decode(): value.decode()
+        for key, value in registry.client.hgetall(worker_key).items()
+    }
+    assert (counters["retried"], counters["completed"]) == ("1", "1")
+    jobs.task_store.delete("job")